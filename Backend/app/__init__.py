@@ -9,6 +9,8 @@ from flask import Flask
 from .config import Config
 from .extensions import init_extensions
 from .api import create_blueprints  # A function to gather all your blueprints
+from .jobs import register_jobs
+from .jwt_callbacks import register_jwt_callbacks
 
 def create_app():
     """Create and configure the Flask application.
@@ -21,10 +23,16 @@ def create_app():
     
     # Initialize all extensions (SQLAlchemy, JWT, PyMongo)
     init_extensions(app)
+
+    # Load the token's user through the user cache on JWT-protected requests
+    register_jwt_callbacks(app)
     
     # Register API blueprints (e.g., auth, calendar, user)
     blueprints = create_blueprints()
     for bp in blueprints:
         app.register_blueprint(bp)
+
+    # Schedule nightly background jobs
+    register_jobs(app)
     
     return app
@@ -1,4 +1,4 @@
-from app.api import auth_routes, calendar_routes, user_routes
+from app.api import auth_routes, calendar_routes, user_routes, metrics_routes
 
 
     
@@ -10,7 +10,8 @@ def create_blueprints():
     return [
         auth_routes.bp,      # Assuming auth_routes.py defines a blueprint named "bp"
         calendar_routes.bp,  # Similarly for calendar routes
-        user_routes.bp       # And user routes
+        user_routes.bp,      # And user routes
+        metrics_routes.bp    # Process metrics (cache hit rates, job throughput)
     ]
 
  # Assuming you have a function to register CLI commands in calendar_routes.py
\ No newline at end of file
@@ -1,11 +1,29 @@
 # app/blueprints/auth.py
 from urllib.parse import urlencode
+import click
 from flask import Blueprint, request, redirect, current_app, url_for
 from flask_jwt_extended import jwt_required
+from sqlalchemy.schema import CreateTable
+from app.extensions import mysql
+from app.models.mysql import RefreshToken
 from app.services.auth_service import AuthService
 from app.utils.validate import *
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+
+# usage: flask auth create-token-table [--sql]
+@bp.cli.command('create-token-table')
+@click.option('--sql', is_flag=True, help="Print the CREATE TABLE statement instead of running it.")
+def create_token_table(sql):
+    """
+    Create the refresh_tokens table on an existing database (run once before deploying token rotation)
+    """
+    if sql:
+        click.echo(f"{str(CreateTable(RefreshToken.__table__).compile(mysql.engine)).strip()};")
+        return
+    RefreshToken.__table__.create(mysql.engine, checkfirst=True)
+    click.echo("refresh_tokens table is in place")
+
 # link: https://127.0.0.1:5000/auth/register
 @bp.route('/register', methods=['POST'])
 def register():
@@ -51,6 +69,16 @@ def google_signin():
 
     response, status_code = auth_service.handle_google_signin(data)
     return response, status_code
+
+# link: https://127.0.0.1:5000/auth/google/callback
+@bp.route("/google/callback", methods=["GET"])
+def google_callback():
+    """
+    Finish the Google OAuth web flow (OAUTH_REDIRECT_URI)
+    """
+    auth_service = AuthService()
+    response, status_code = auth_service.handle_google_callback(request.args.get("code"))
+    return response, status_code
 # link: http://127.0.0.1:5000/auth/refresh
 @bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
@@ -60,4 +88,26 @@ def refresh():
     """
     auth_service = AuthService()
     response, status_code = auth_service.refresh_access_token()
+    return response, status_code
+
+# link: http://127.0.0.1:5000/auth/logout
+@bp.route('/logout', methods=['POST'])
+@jwt_required(refresh=True)
+def logout():
+    """
+    Revoke the refresh token sent with the request
+    """
+    auth_service = AuthService()
+    response, status_code = auth_service.logout()
+    return response, status_code
+
+# link: http://127.0.0.1:5000/auth/logout-all
+@bp.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    """
+    Revoke every refresh token of the current user
+    """
+    auth_service = AuthService()
+    response, status_code = auth_service.logout_everywhere()
     return response, status_code
\ No newline at end of file
@@ -4,13 +4,54 @@ from flask import Blueprint, request, redirect, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.mongodb.schedule import Schedule, Task
 from app.models.mongodb.user_data import AggregatedTaskData, GoogleFitData, MLData, ScheduleData, UserData
-from app.services import CalendarService, MLService
+from app.services import CalendarService, MLService, BatchPredictionService, ScheduleSuggestionService
+from app.utils.content_hash import content_hash
+from app.utils.schedule_conflicts import detect_conflicts
 from datetime import datetime
 from app.models.mongodb import Day  # Import the Day class from the appropriate module
 
 bp = Blueprint('calendar', __name__, url_prefix='/calendar')
 
 
+# usage: flask calendar predict-nightly [--date YYYY-MM-DD] [--batch-size N]
+@bp.cli.command('predict-nightly')
+@click.option('--date', 'date_str', default=None, help="Source day (defaults to today); predictions go to the next day.")
+@click.option('--batch-size', type=int, default=None, help="Users per inference batch.")
+@click.option('--explain/--no-explain', default=None, help="Store per-feature contributions next to MLData.")
+def predict_nightly(date_str, batch_size, explain):
+    """Run the nightly batch predictor once and print its throughput report"""
+    report = BatchPredictionService(batch_size=batch_size, explain=explain).run(date_str)
+    click.echo(report)
+
+
+# usage: flask calendar materialize-schedules [--date YYYY-MM-DD] [--force]
+@bp.cli.command('materialize-schedules')
+@click.option('--date', 'date_str', default=None, help="Only this day (defaults to every pending day).")
+@click.option('--force', is_flag=True, help="Recompute days that already have ScheduleData/AggregatedTaskData.")
+def materialize_schedules(date_str, force):
+    """Compute ScheduleData and AggregatedTaskData for all users in one pass"""
+    click.echo(CalendarService().materialize_schedule_data(date_str, force=force))
+
+
+# usage: flask calendar suggest-nightly [--date YYYY-MM-DD] [--workers N] [--no-resume]
+@bp.cli.command('suggest-nightly')
+@click.option('--date', 'date_str', default=None, help="Target day (defaults to tomorrow).")
+@click.option('--workers', type=int, default=None, help="Optimizer processes.")
+@click.option('--resume/--no-resume', default=True, help="Continue an unfinished run of the same day.")
+def suggest_nightly(date_str, workers, resume):
+    """Store optimizer-suggested schedules for every user and print the timing report"""
+    click.echo(ScheduleSuggestionService(workers=workers).run(date_str, resume=resume))
+
+
+# usage: flask calendar detect-conflicts [--date YYYY-MM-DD] [--max-reported N]
+@bp.cli.command('detect-conflicts')
+@click.option('--date', 'date_str', default=None, help="Only this day (defaults to every stored day).")
+@click.option('--max-reported', type=int, default=100, help="Days with conflicts listed in full.")
+def detect_conflicts_command(date_str, max_reported):
+    """Scan stored schedules for overlaps, deadline violations and tasks outside start/end"""
+    click.echo(CalendarService().detect_conflicts_for_all_users(date_str, max_reported))
+
+
 
 
 
@@ -28,6 +69,8 @@ def upload_days():
         return {"error": "User ID is required"}, 400
 
     days = request.json.get('days')
+    # Hash of the payload as sent: a re-sent identical upload is acknowledged without a write
+    digest = content_hash(days)
       
     
 
@@ -60,11 +103,41 @@ def upload_days():
     )
      
     
+    # Inconsistent tasks are still stored, but reported back so the client can fix them
+    conflicts = detect_conflicts(day.schedule)
+
+    if calendar_service.is_duplicate_upload(user_id, day.date, "schedule", digest):
+        return {"message": "Data already synced", "duplicate": True, "conflicts": conflicts}, 200
+    day.schedule_hash = digest
     operation = calendar_service.add_or_update_day_schedule(user_id,day)
     if not operation:
         return {"error": "Failed to sync data"}, 500
 
-    return {"message": "Data synced successfully"}, 200
+    return {"message": "Data synced successfully", "conflicts": conflicts}, 200
+
+
+# link: https://127.0.0.1:5000/calendar/update-task
+@bp.route('/update-task', methods=['POST'])
+@jwt_required()
+def update_task():
+    """Add ("old_task" omitted), edit, or remove ("new_task" omitted) one task of a day"""
+    calendar_service = CalendarService()
+    user_id = get_jwt_identity()
+    if not user_id:
+        return {"error": "User ID is required"}, 400
+
+    data = request.json or {}
+    date_str = data.get('date')
+    if not date_str:
+        return {"error": "Date is required"}, 400
+    if not data.get('old_task') and not data.get('new_task'):
+        return {"error": "old_task or new_task is required"}, 400
+
+    result = calendar_service.update_task(user_id, date_str, data.get('old_task'), data.get('new_task'))
+    if result is None:
+        return {"error": "Failed to update task"}, 404
+
+    return result, 200
 
 
 
@@ -74,7 +147,6 @@ def upload_days():
 def get_user_data():
     """Get user data for a specific day"""
     calendar_service = CalendarService()
-    ml_service = MLService()
     user_id = get_jwt_identity()
     if not user_id:
         return {"error": "User ID is required"}, 400
@@ -83,22 +155,51 @@ def get_user_data():
     if not date_str:
         return {"error": "Date is required"}, 400
     
-    # Get user data
-    
-    
-    ml_service.full_cycle_for_user(user_id)
+    # Get user data (read-only: predictions are prepared when Google Fit data is uploaded)
     user_data = calendar_service.get_user_data_for_day(user_id, date_str)
-   
-    UserData = UserData(
-        GoogleFitData=GoogleFitData(),
-        ScheduleData=ScheduleData(),
-        AggregatedTaskData=AggregatedTaskData(),
-        MLData=[]
-    )
-    
         
     return user_data, 200
 
+# link: https://127.0.0.1:5000/calendar/explanations?date=YYYY-MM-DD[&hour=HH]
+@bp.route('/explanations', methods=['GET'])
+@jwt_required()
+def get_explanations():
+    """Get the stored per-feature contributions behind a day's predictions (no model call)"""
+    user_id = get_jwt_identity()
+    if not user_id:
+        return {"error": "User ID is required"}, 400
+
+    date = request.args.get('date')
+    if not date:
+        return {"error": "Date is required"}, 400
+    hour = request.args.get('hour', type=int)
+    if hour is not None and not 0 <= hour < 24:
+        return {"error": "Hour must be between 0 and 23"}, 400
+
+    explanation = CalendarService().get_ml_explanation_for_day(user_id, date, hour)
+    if not explanation:
+        return {"error": "No explanation found"}, 404
+    return explanation, 200
+
+# link: https://127.0.0.1:5000/calendar/optimize-schedule
+@bp.route('/optimize-schedule', methods=['POST'])
+@jwt_required()
+def optimize_schedule():
+    """Suggest an arrangement of a day's tasks based on that day's CP/PE predictions (not saved)"""
+    user_id = get_jwt_identity()
+    if not user_id:
+        return {"error": "User ID is required"}, 400
+
+    data = request.json or {}
+    date = data.get('date')
+    if not date:
+        return {"error": "Date is required"}, 400
+
+    arranged = CalendarService().optimize_schedule_for_day(user_id, date, data.get('schedule'))
+    if arranged is None:
+        return {"error": "No schedule or predictions found for this day"}, 404
+    return arranged, 200
+
 # link: https://127.0.0.1:5000/calendar/get-days
 @bp.route('/get-days', methods=['GET'])
 @jwt_required()
@@ -121,6 +222,26 @@ def get_days():
     return days, 200
 
 
+# link: https://127.0.0.1:5000/calendar/sync?cursor=CURSOR&limit=N
+@bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sync_days():
+    """Page in the days changed after a sync cursor (the login response only carries today and tomorrow)"""
+    user_id = get_jwt_identity()
+    if not user_id:
+        return {"error": "User ID is required"}, 400
+    try:
+        page = CalendarService().sync_days(user_id, request.args.get('cursor'), request.args.get('limit', type=int))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return page, 200
+
+
+# link: https://127.0.0.1:5000/calendar/upload-google-fit?date=YYYY-MM-DD
+@bp.route('/upload-google-fit', methods=['POST'])
+@jwt_required()
+def upload_google_fit():
+    """Store a day's Google Fit data; the next day's predictions are queued in the background"""
     user_id = get_jwt_identity()
     if not user_id:
         return {"error": "User ID is required"}, 400
@@ -129,15 +250,37 @@ def get_days():
     data = data.get("data")
     
     # Validate structure:
-    if not data or "hourly_metrics" not in data or "sleep" not in data:
+    if not date or not data or "hourly_metrics" not in data or "sleep" not in data:
         return {"error": "Malformed payload"}, 400
 
     # Persist via your CalendarService:
-    success = CalendarService().update_google_fit_data(user_id, data)
+    try:
+        success = CalendarService().update_google_fit_data(user_id, data, date)
+    except (KeyError, TypeError, ValueError) as e:
+        return {"error": f"Malformed payload: {e}"}, 400
     if not success:
         return {"error": "Storage failed"}, 500
-    ML = MLService().generate_predictions(user_id)
-    if not ML:
-        return {"error": "ML prediction failed"}, 500
     # Return success response:
-    return {"status": "ok"}, 200
\ No newline at end of file
+    return {"status": "ok"}, 200
+
+
+# link: https://127.0.0.1:5000/calendar/upload-google-fit-raw?date=YYYY-MM-DD
+@bp.route('/upload-google-fit-raw', methods=['POST'])
+@jwt_required()
+def upload_google_fit_raw():
+    """Store a day's raw Google Fit samples; hourly buckets, sleep totals and HRV are computed on the server"""
+    user_id = get_jwt_identity()
+    if not user_id:
+        return {"error": "User ID is required"}, 400
+    data = (request.get_json() or {}).get("data")
+    date = request.args.get("date")
+    if not date or not isinstance(data, dict) or not any(data.get(k) for k in ("steps", "heart_rate", "sleep", "rr_intervals", "beats")):
+        return {"error": "Malformed payload"}, 400
+
+    try:
+        summary = CalendarService().ingest_raw_google_fit(user_id, data, date)
+    except (KeyError, TypeError, ValueError) as e:
+        return {"error": f"Malformed samples: {e}"}, 400
+    if summary is None:
+        return {"error": "Storage failed"}, 500
+    return {"status": "ok", **summary}, 200
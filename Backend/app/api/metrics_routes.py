@@ -0,0 +1,15 @@
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from app.utils.metrics import metrics
+
+bp = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+# link: https://127.0.0.1:5000/metrics
+@bp.route('', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """
+    Return this worker process's counters, gauges and timings
+    (cache hit rates, batch throughput, pool usage, ...)
+    """
+    return metrics.snapshot(), 200
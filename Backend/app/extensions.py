@@ -2,6 +2,9 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_mongoengine import MongoEngine
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.utils.db_pool import engine_options
+from app.utils.mongo_client import mongo_settings
 
 # Initialize SQLAlchemy for MySQL
 mysql = SQLAlchemy()
@@ -13,6 +16,9 @@ jwt = JWTManager()
 # Initialize MongoEngine for MongoDB
 Mongo = MongoEngine()
 
+# Background scheduler for prediction/batch jobs (one pending run per job id)
+scheduler = BackgroundScheduler(job_defaults={"coalesce": True, "max_instances": 1})
+
 # Initialize extensions with the app configuration
 def init_extensions(app):
     """Initialize extensions with the Flask app.
@@ -25,12 +31,23 @@ def init_extensions(app):
         # Point json_encoder to the provider class itself
         app.json_encoder = app.json.__class__
 
-    # Configure SQLAlchemy with the app configuration
+    # Configure SQLAlchemy with the app configuration (pool sized by SQLALCHEMY_POOL_*;
+    # explicit SQLALCHEMY_ENGINE_OPTIONS take precedence)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(app.config), **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    }
     mysql.init_app(app)
     migrate.init_app(app, mysql)
 
     # Configure JWTManager with the app configuration
     jwt.init_app(app)
 
-    # Configure MongoEngine with the app configuration
+    # Configure MongoEngine with the app configuration (MONGO_URI and the MONGO_* client
+    # options, unless MONGODB_SETTINGS is given explicitly)
+    if "MONGODB_SETTINGS" not in app.config:
+        app.config["MONGODB_SETTINGS"] = mongo_settings(app.config)
     Mongo.init_app(app)
+
+    # Start the background scheduler
+    if app.config.get("SCHEDULER_ENABLED") and not scheduler.running:
+        scheduler.start()
@@ -0,0 +1,103 @@
+import logging
+import time
+from datetime import datetime
+from app.extensions import scheduler
+logger = logging.getLogger(__name__)
+
+
+def _claim_run(job: str, run_key: str) -> bool:
+    """Whether this process runs `job` for `run_key`; every scheduler process schedules the same jobs."""
+    from app.repositories import JobCheckpointRepository
+    if JobCheckpointRepository().claim(job, run_key):
+        return True
+    logger.info(f"Skipping {job} {run_key}: claimed by another process")
+    return False
+
+
+def _interval_run_key(minutes: int) -> str:
+    """Run key of the current `minutes`-long interval (the same in every process)."""
+    return str(int(time.time() // (max(1, minutes) * 60)))
+
+
+def _nightly_predictions(app):
+    """Predict tomorrow for every user from today's data, then pre-arrange tomorrow's schedules."""
+    from app.services.batch_prediction_service import BatchPredictionService
+    from app.services.schedule_suggestion_service import ScheduleSuggestionService
+    with app.app_context():
+        if not _claim_run("nightly-predictions", datetime.now().strftime("%Y-%m-%d")):
+            return
+        try:
+            report = BatchPredictionService().run()
+        except Exception as e:
+            logger.error(f"Nightly batch prediction failed: {e}")
+            return
+        try:
+            # Suggestions need tomorrow's MLData, so they run only once the predictions are stored
+            ScheduleSuggestionService().run(report["target_date"])
+        except Exception as e:
+            logger.error(f"Nightly schedule suggestions failed: {e}")
+
+
+def _purge_expired_tokens(app):
+    """Drop refresh tokens past their expiry; revoked or not, they can no longer be used."""
+    from app.repositories import RefreshTokenRepository
+    with app.app_context():
+        if not _claim_run("purge-expired-tokens", datetime.now().strftime("%Y-%m-%d")):
+            return
+        try:
+            deleted = RefreshTokenRepository().delete_expired()
+            logger.info(f"Purged {deleted} expired refresh tokens")
+        except Exception as e:
+            logger.error(f"Refresh token purge failed: {e}")
+
+
+def _fit_sync(app):
+    """Pull yesterday's and today's Google Fit aggregates for every linked user."""
+    from app.services.fit_sync_service import FitSyncService
+    with app.app_context():
+        if not _claim_run("fit-sync", _interval_run_key(app.config.get("FIT_SYNC_INTERVAL_MINUTES", 60))):
+            return
+        try:
+            FitSyncService().run()
+        except Exception as e:
+            logger.error(f"Google Fit sync failed: {e}")
+
+
+def register_jobs(app):
+    """Register the recurring background jobs on the shared scheduler.
+
+    Every process with SCHEDULER_ENABLED (normally only run_scheduler.py) schedules
+    them; each run is claimed in job_checkpoints first, so it executes in one process only.
+
+    Args:
+        app (Flask): The Flask application instance the jobs run under.
+    """
+    if not app.config.get("SCHEDULER_ENABLED"):
+        return
+    scheduler.add_job(
+        _nightly_predictions,
+        trigger="cron",
+        hour=app.config.get("NIGHTLY_PREDICTION_HOUR", 23),
+        args=[app],
+        id="nightly-predictions",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        _purge_expired_tokens,
+        trigger="cron",
+        hour=4,
+        args=[app],
+        id="purge-expired-tokens",
+        replace_existing=True
+    )
+    if app.config.get("FIT_SYNC_ENABLED"):
+        scheduler.add_job(
+            _fit_sync,
+            trigger="interval",
+            minutes=app.config.get("FIT_SYNC_INTERVAL_MINUTES", 60),
+            args=[app],
+            id="fit-sync",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
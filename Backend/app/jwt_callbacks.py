@@ -0,0 +1,39 @@
+import logging
+from app.extensions import jwt
+logger = logging.getLogger(__name__)
+
+
+def _load_user(jwt_header, jwt_data):
+    """Resolve the token's identity to a User; None rejects the token.
+
+    Access tokens go through the user cache (identity only), so another process may
+    accept a deleted user's access token until USER_CACHE_TTL passes. Refresh tokens,
+    used rarely, are checked against MySQL.
+    """
+    from app.repositories.user_repository import UserRepository
+    return UserRepository().get_user_by_id(jwt_data["sub"], fresh=jwt_data.get("type") == "refresh") or None
+
+
+def _is_revoked(jwt_header, jwt_data) -> bool:
+    """Refresh tokens that were rotated, logged out or revoked (answered from memory).
+
+    Replaying a rotated token also revokes the rest of the user's tokens.
+    """
+    if jwt_data.get("type") != "refresh":
+        return False
+    from app.services.token_service import TokenService
+    token_service = TokenService()
+    if not token_service.is_revoked(jwt_data["jti"]):
+        return False
+    token_service.revoked_use(jwt_data)
+    return True
+
+
+def register_jwt_callbacks(app):
+    """Register the flask_jwt_extended callbacks on the shared JWTManager.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    jwt.user_lookup_loader(_load_user)
+    jwt.token_in_blocklist_loader(_is_revoked)
@@ -3,3 +3,5 @@ from app.models.mongodb.calendar import *
 from app.models.mongodb.day import *
 from app.models.mongodb.schedule import *
 from app.models.mongodb.user_data import *
+from app.models.mongodb.prediction_cache import *
+from app.models.mongodb.job_checkpoint import *
@@ -1,6 +1,6 @@
 from app.extensions import Mongo as me
 from datetime import datetime
-from app.models.mongodb.day import Day  # Assumes Day is an EmbeddedDocument with fields: date, user_data, etc.
+from app.models.mongodb.day import Day, DayTombstone  # Assumes Day is an EmbeddedDocument with fields: date, user_data, etc.
 
 class Calendar(me.Document):
     """
@@ -9,6 +9,7 @@ class Calendar(me.Document):
     Attributes:
         user_id (str): The unique identifier for the user (linked to MySQL user data).
         days (list[Day]): A list of Day objects representing the user's daily data.
+        deleted_days (list[DayTombstone]): Recently removed days, reported by /calendar/sync.
     --------------------
     Structure example: {
         "user_id": "12345",
@@ -21,9 +22,11 @@ class Calendar(me.Document):
     
     user_id = me.StringField(required=True, unique=True)  # Links with secure user data in MySQL
     days = me.EmbeddedDocumentListField(Day)
+    deleted_days = me.EmbeddedDocumentListField(DayTombstone)
     
     meta = {
-        'collection': 'calendars'
+        'collection': 'calendars',
+        'indexes': ['days.date']  # Batch jobs select calendars by day
     }
     #-------------------------------------------------------------------
     # Set user_id (to link MySQL user_id with MongoDB)
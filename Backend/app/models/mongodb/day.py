@@ -11,6 +11,9 @@ class Day(me.EmbeddedDocument):
         Date (str): The date of the day in "YYYY-MM-DD" format (e.g., "2025-02-16").
         Schedule (Schedule): The schedule for the day, including tasks and related data.
         UserData (UserData): The user data associated with the day, such as fitness or ML predictions.
+        suggested_schedule (Schedule): The schedule pre-arranged overnight around the day's ML predictions.
+        schedule_hash (str): Content hash of the last uploaded day payload (duplicate uploads are skipped).
+        google_fit_hash (str): Content hash of the last uploaded Google Fit payload.
         Last_modified (datetime): The timestamp of the last modification to the day's data.
 
     Example Structure:
@@ -64,13 +67,21 @@ class Day(me.EmbeddedDocument):
                 ...
             ]
         },
+        "suggested_schedule": {
+            "start": "08:00",
+            "end": "20:00",
+            "tasks": [...]
+        },
         "Last_modified": "2025-02-16T12:34:56Z"
     }
     """
     date = me.StringField(required=True)  # e.g., "2025-02-16"
     schedule = me.EmbeddedDocumentField(Schedule, required=False)
     UserData = me.EmbeddedDocumentField(UserData, required=False)
-    Last_modified = me.DateTimeField(default=datetime.now())
+    suggested_schedule = me.EmbeddedDocumentField(Schedule, required=False)
+    schedule_hash = me.StringField()
+    google_fit_hash = me.StringField()
+    Last_modified = me.DateTimeField(default=datetime.now)
     
     def to_dict(self):
         """
@@ -80,6 +91,27 @@ class Day(me.EmbeddedDocument):
             "date": self.date,
             "schedule": self.schedule.to_dict() if self.schedule else None,
             "UserData": self.UserData.to_dict() if self.UserData else None,
+            "suggested_schedule": self.suggested_schedule.to_dict() if self.suggested_schedule else None,
             "Last_modified": self.Last_modified.isoformat() if self.Last_modified else None
         }
 
+
+class DayTombstone(me.EmbeddedDocument):
+    """
+    Record of a removed day, so /calendar/sync can report the deletion to clients.
+
+    Attributes:
+        date (str): The removed day's date in "YYYY-MM-DD" format.
+        deleted_at (datetime): When the day was removed (ordered with the days' Last_modified).
+    """
+    date = me.StringField(required=True)
+    deleted_at = me.DateTimeField(default=datetime.now)
+
+    def to_dict(self):
+        """
+        Convert the DayTombstone object to a dictionary to make it serializable.
+        """
+        return {
+            "date": self.date,
+            "deleted_at": self.deleted_at.isoformat() if self.deleted_at else None
+        }
@@ -0,0 +1,60 @@
+from datetime import datetime
+from app.extensions import Mongo as me
+
+class JobCheckpoint(me.Document):
+    """
+    JobCheckpoint model for resuming long-running batch jobs after a crash.
+
+    Batch jobs stream users in user_id order and record the last user whose
+    results were written, so a restarted run continues after that user.
+
+    Attributes:
+        job (str): The job name (e.g., "schedule-suggestions").
+        run_key (str): Identifies one run of the job (e.g., the target date).
+        last_user_id (str): The last user whose results were written.
+        processed (int): The number of users processed so far in this run.
+        status (str): "running" or "done".
+        started_at (datetime): When the run started.
+        updated_at (datetime): When the checkpoint was last written.
+    --------------------
+    Structure example: {
+        "job": "schedule-suggestions",
+        "run_key": "2025-02-17",
+        "last_user_id": "12345",
+        "processed": 1500,
+        "status": "running",
+        "started_at": "2025-02-16T23:05:00Z",
+        "updated_at": "2025-02-16T23:09:12Z"
+    }
+    """
+    job = me.StringField(required=True)
+    run_key = me.StringField(required=True)
+    last_user_id = me.StringField()
+    processed = me.IntField(default=0)
+    status = me.StringField(choices=("running", "done"), default="running")
+    started_at = me.DateTimeField(default=datetime.now)
+    updated_at = me.DateTimeField(default=datetime.now)
+
+    meta = {
+        'collection': 'job_checkpoints',
+        'indexes': [
+            {'fields': ['job', 'run_key'], 'unique': True}
+        ]
+    }
+
+    def to_dict(self):
+        """
+        Convert the JobCheckpoint object to a dictionary representation.
+
+        Returns:
+            dict: A dictionary representation of the JobCheckpoint object.
+        """
+        return {
+            "job": self.job,
+            "run_key": self.run_key,
+            "last_user_id": self.last_user_id,
+            "processed": self.processed,
+            "status": self.status,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
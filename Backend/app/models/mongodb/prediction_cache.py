@@ -0,0 +1,57 @@
+from datetime import datetime
+from app.extensions import Mongo as me
+
+class PredictionCacheEntry(me.Document):
+    """
+    PredictionCacheEntry model for the persistent tier of the prediction cache.
+
+    Attributes:
+        user_id (str): The unique identifier for the user.
+        date (str): The predicted day in "YYYY-MM-DD" format.
+        fingerprint (str): Hash of the model inputs (source day's Google Fit + task data).
+        model_version (str): Version tag of the global/private models used.
+        predictions (list[dict]): The 24 predictions returned for that key.
+        created_at (datetime): When the entry was stored.
+    --------------------
+    Structure example: {
+        "user_id": "12345",
+        "date": "2025-02-17",
+        "fingerprint": "9f2c...",
+        "model_version": "a41b...",
+        "predictions": [
+            {"time_slot": "08:00-09:00", "CP": 0.85, "PE": 0.75},
+            ...
+        ],
+        "created_at": "2025-02-16T23:00:00Z"
+    }
+    """
+    user_id = me.StringField(required=True)
+    date = me.StringField(required=True)
+    fingerprint = me.StringField(required=True)
+    model_version = me.StringField(required=True)
+    predictions = me.ListField(me.DictField())
+    created_at = me.DateTimeField(default=datetime.now)
+
+    meta = {
+        'collection': 'prediction_cache',
+        'indexes': [
+            {'fields': ['user_id', 'date', 'fingerprint', 'model_version'], 'unique': True},
+            {'fields': ['created_at'], 'expireAfterSeconds': 14 * 24 * 3600}
+        ]
+    }
+
+    def to_dict(self):
+        """
+        Convert the PredictionCacheEntry object to a dictionary representation.
+
+        Returns:
+            dict: A dictionary representation of the PredictionCacheEntry object.
+        """
+        return {
+            "user_id": self.user_id,
+            "date": self.date,
+            "fingerprint": self.fingerprint,
+            "model_version": self.model_version,
+            "predictions": self.predictions,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
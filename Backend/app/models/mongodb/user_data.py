@@ -1,5 +1,9 @@
 from datetime import datetime
+import numpy as np
+from app.config import Config
 from app.extensions import Mongo as me
+from app.utils.hourly_encoding import COS_TIME, HOURS, SIN_TIME, SLOT_LABELS, as_number, pack, slot_hour, unpack
+from app.utils.slot_aggregation import aggregate_slots, apply_task_delta
 
 #---------------------------------
 # Google Fit Data Models
@@ -68,6 +72,100 @@ class HourlyMetric(me.EmbeddedDocument):
             **self.time_features.to_mongo().to_dict()
         }
 
+
+class _HourlySeries:
+    """
+    Shared behaviour of the compact, hour-indexed documents (index = hour of day, 0-23).
+
+    Each channel is stored as a 24-element array, or, with packed encoding, all
+    channels together as one little-endian float32 blob of shape (channels, 24).
+    """
+    CHANNELS = ()
+
+    def values(self) -> np.ndarray:
+        """
+        Return the series as a (24, len(CHANNELS)) float matrix.
+        """
+        if self.packed:
+            return unpack(self.packed, len(self.CHANNELS)).T
+        values = np.zeros((HOURS, len(self.CHANNELS)), dtype=float)
+        for j, channel in enumerate(self.CHANNELS):
+            column = (getattr(self, channel) or [])[:HOURS]
+            values[:len(column), j] = column
+        return values
+
+    @classmethod
+    def from_values(cls, values, packed: bool = None):
+        """
+        Build the document from a (24, len(CHANNELS)) matrix.
+
+        Args:
+            values (array-like): One row per hour, one column per channel.
+            packed (bool, optional): Store as a float32 blob. Defaults to HOURLY_ENCODING == "packed".
+        """
+        values = np.asarray(values, dtype=float).reshape(HOURS, len(cls.CHANNELS))
+        if Config.HOURLY_ENCODING == "packed" if packed is None else packed:
+            return cls(packed=pack(values.T))
+        return cls(**{channel: values[:, j].tolist() for j, channel in enumerate(cls.CHANNELS)})
+
+
+class HourlyMetricSeries(_HourlySeries, me.EmbeddedDocument):
+    """
+    Compact storage of a day's 24 hourly health metrics (replaces 24 HourlyMetric subdocuments).
+
+    Attributes:
+        steps (list[float]): Steps per hour, index = hour of day.
+        heart_rate (list[float]): Heart rate per hour, index = hour of day.
+        packed (bytes): Both channels as float32 (steps row, then heart_rate row), when packed.
+    --------------------
+    Structure example: {
+        "steps": [0, 0, ..., 812, 430],
+        "heart_rate": [58.0, 57.5, ..., 74.0, 66.0]
+    }
+    """
+    CHANNELS = ("steps", "heart_rate")
+    steps = me.ListField(me.FloatField())
+    heart_rate = me.ListField(me.FloatField())
+    packed = me.BinaryField()
+
+    @classmethod
+    def from_metrics(cls, metrics, packed: bool = None):
+        """
+        Build the series from HourlyMetric documents or dicts with hour_range, steps and heart_rate.
+        """
+        values = np.zeros((HOURS, 2), dtype=float)
+        for metric in metrics or []:
+            get = metric.get if isinstance(metric, dict) else lambda name: getattr(metric, name, None)
+            hour = slot_hour(get("hour_range"))
+            if hour >= 0:
+                values[hour] = [get("steps") or 0, get("heart_rate") or 0]
+        return cls.from_values(values, packed)
+
+    def to_metrics(self) -> list:
+        """
+        Expand to the legacy list of 24 HourlyMetric documents (time features derived).
+        """
+        return [
+            HourlyMetric(
+                hour_range=SLOT_LABELS[hour],
+                steps=as_number(steps),
+                heart_rate=float(heart_rate),
+                time_features=TimeFeatures(sin_time=float(SIN_TIME[hour]), cos_time=float(COS_TIME[hour]))
+            )
+            for hour, (steps, heart_rate) in enumerate(self.values())
+        ]
+
+    def to_dict(self):
+        """
+        Convert the HourlyMetricSeries object to a dictionary representation.
+
+        Returns:
+            dict: {"steps": [...24], "heart_rate": [...24]} regardless of the storage encoding.
+        """
+        values = self.values()
+        return {"steps": [as_number(v) for v in values[:, 0]], "heart_rate": values[:, 1].tolist()}
+
+
 class SleepStageData(me.EmbeddedDocument):
     """
     Detailed sleep stage metrics
@@ -93,14 +191,52 @@ class SleepStageData(me.EmbeddedDocument):
             "awake_episodes": self.awake_episodes
         }
 
+class HRVMetrics(me.EmbeddedDocument):
+    """
+    Time-domain heart rate variability computed on the server from the day's beat stream.
+    --------------------
+    Structure example: {
+        "rmssd": 42.3,
+        "sdnn": 55.1,
+        "pnn50": 18.7,
+        "mean_hr": 68.2,
+        "beats": 61234,
+        "artifact_ratio": 0.012
+    }
+    """
+    rmssd = me.FloatField(default=0.0)
+    sdnn = me.FloatField(default=0.0)
+    pnn50 = me.FloatField(default=0.0)  # % of successive differences > 50 ms
+    mean_hr = me.FloatField(default=0.0)
+    beats = me.IntField(default=0)  # RR intervals kept after artifact filtering
+    artifact_ratio = me.FloatField(default=0.0)
+
+    def to_dict(self):
+        """
+        Convert the HRVMetrics object to a dictionary representation.
+
+        Returns:
+            dict: A dictionary representation of the HRVMetrics object.
+        """
+        return {
+            "rmssd": self.rmssd,
+            "sdnn": self.sdnn,
+            "pnn50": self.pnn50,
+            "mean_hr": self.mean_hr,
+            "beats": self.beats,
+            "artifact_ratio": self.artifact_ratio
+        }
+
 class GoogleFitData(me.EmbeddedDocument):
     """
     Complete Google Fit dataset for prediction pipeline
     """
     meta_data = me.EmbeddedDocumentField(GoogleFitMetaData)
-    hourly_metrics = me.EmbeddedDocumentListField(HourlyMetric)
+    hourly_metrics = me.EmbeddedDocumentListField(HourlyMetric)  # legacy encoding, still read
+    hourly = me.EmbeddedDocumentField(HourlyMetricSeries)
     sleep = me.EmbeddedDocumentField(SleepStageData)
     hrv = me.FloatField(default=0.0)  # Heart Rate Variability (RMSSD)
+    hrv_metrics = me.EmbeddedDocumentField(HRVMetrics)  # set when computed from raw RR intervals
     last_updated = me.DateTimeField(default=datetime.now)
     
     def to_dict(self):
@@ -111,13 +247,30 @@ class GoogleFitData(me.EmbeddedDocument):
             dict: A dictionary representation of the GoogleFitData object.
         """
         return {
-            "meta_data": self.meta_data.to_mongo().to_dict(),
-            "hourly_metrics": [metric.to_mongo().to_dict() for metric in self.hourly_metrics],
-            "sleep": self.sleep.to_mongo().to_dict(),
+            "meta_data": self.meta_data.to_mongo().to_dict() if self.meta_data else None,
+            "hourly_metrics": [metric.to_mongo().to_dict() for metric in self.get_hourly_metrics()],
+            "sleep": self.sleep.to_mongo().to_dict() if self.sleep else None,
             "hrv": self.hrv,
+            "hrv_metrics": self.hrv_metrics.to_dict() if self.hrv_metrics else None,
             "last_updated": self.last_updated
         }
 
+    def get_hourly_metrics(self) -> list:
+        """
+        The 24 hourly metrics as HourlyMetric documents, from either storage encoding.
+        """
+        if self.hourly:
+            return self.hourly.to_metrics()
+        return list(self.hourly_metrics or [])
+
+    def hourly_values(self) -> np.ndarray:
+        """
+        The hourly metrics as a (24, 2) [steps, heart_rate] matrix, index = hour of day.
+        """
+        if self.hourly:
+            return self.hourly.values()
+        return HourlyMetricSeries.from_metrics(self.hourly_metrics, packed=False).values()
+
     def to_prediction_format(self):
         """Convert to ML pipeline input format"""
         return {
@@ -128,7 +281,7 @@ class GoogleFitData(me.EmbeddedDocument):
                     'heart_rate': metric.heart_rate,
                     **metric.time_features.to_mongo()
                 }
-                for metric in self.hourly_metrics
+                for metric in self.get_hourly_metrics()
             ],
             'sleep': self.sleep.to_mongo().to_dict(),
             'hrv': self.hrv
@@ -170,6 +323,116 @@ class MLData(me.EmbeddedDocument):
             "predicted_CP": self.predicted_CP,
             "predicted_PE": self.predicted_PE
         }
+
+
+class MLPredictionSeries(_HourlySeries, me.EmbeddedDocument):
+    """
+    Compact storage of a day's 24 predictions (replaces 24 MLData subdocuments).
+
+    Attributes:
+        cp (list[float]): Predicted cognitive performance per hour, index = hour of day.
+        pe (list[float]): Predicted physical energy per hour, index = hour of day.
+        packed (bytes): Both channels as float32 (cp row, then pe row), when packed.
+    --------------------
+    Structure example: {
+        "cp": [0.41, 0.39, ..., 0.85, 0.62],
+        "pe": [0.30, 0.28, ..., 0.75, 0.55]
+    }
+    """
+    CHANNELS = ("cp", "pe")
+    cp = me.ListField(me.FloatField())
+    pe = me.ListField(me.FloatField())
+    packed = me.BinaryField()
+
+    @classmethod
+    def from_predictions(cls, predictions, packed: bool = None):
+        """
+        Build the series from the pipeline's [{'time_slot', 'CP', 'PE'}, ...] output.
+        """
+        values = np.zeros((HOURS, 2), dtype=float)
+        for prediction in predictions or []:
+            hour = slot_hour(prediction.get("time_slot"))
+            if hour >= 0:
+                values[hour] = [prediction.get("CP") or 0, prediction.get("PE") or 0]
+        return cls.from_values(values, packed)
+
+    def to_ml_data(self) -> list:
+        """
+        Expand to the legacy list of 24 MLData documents.
+        """
+        return [
+            MLData(time_slot=SLOT_LABELS[hour], predicted_CP=float(cp), predicted_PE=float(pe))
+            for hour, (cp, pe) in enumerate(self.values())
+        ]
+
+    def to_dict(self):
+        """
+        Convert the MLPredictionSeries object to a dictionary representation.
+
+        Returns:
+            dict: {"cp": [...24], "pe": [...24]} regardless of the storage encoding.
+        """
+        values = self.values()
+        return {"cp": values[:, 0].tolist(), "pe": values[:, 1].tolist()}
+
+
+class MLExplanation(me.EmbeddedDocument):
+    """
+    MLExplanation model for storing per-feature contributions behind the 24 MLData predictions.
+
+    Contributions come from XGBoost `pred_contribs` (global model plus the user's
+    private residual model, if any): for every slot, the feature contributions plus
+    the trailing bias term sum to the raw (unclipped) prediction.
+
+    Attributes:
+        features (list[str]): Feature names, in column order of every contribution row.
+        cp (list[list[float]]): 24 rows of len(features) + 1 contributions (last = bias) for CP.
+        pe (list[list[float]]): Same for PE.
+        model_version (str): Version tag of the models that produced the predictions.
+    --------------------
+    Structure example: {
+        "features": ["steps", "heart_rate", ...],
+        "cp": [[0.012, -0.003, ..., 0.41], ...],
+        "pe": [[0.020, 0.001, ..., 0.38], ...],
+        "model_version": "a41b..."
+    }
+    """
+    features = me.ListField(me.StringField())
+    cp = me.ListField(me.ListField(me.FloatField()))
+    pe = me.ListField(me.ListField(me.FloatField()))
+    model_version = me.StringField()
+
+    def to_dict(self):
+        """
+        Convert the MLExplanation object to a dictionary representation.
+        
+        Returns:
+            dict: A dictionary representation of the MLExplanation object.
+        """
+        return {
+            "features": self.features,
+            "cp": self.cp,
+            "pe": self.pe,
+            "model_version": self.model_version
+        }
+
+    def for_slot(self, hour: int) -> dict:
+        """
+        Contributions for one slot, keyed by feature name.
+
+        Args:
+            hour (int): The slot's starting hour (0-23).
+
+        Returns:
+            dict: {"CP": {feature: value, ..., "bias": value}, "PE": {...}}
+        """
+        names = list(self.features) + ["bias"]
+        return {
+            "CP": dict(zip(names, self.cp[hour])) if self.cp else {},
+            "PE": dict(zip(names, self.pe[hour])) if self.pe else {}
+        }
+
+
 #---------------------------------
 # Shedule Data Models
 #---------------------------------
@@ -207,7 +470,7 @@ class AggregatedTaskData(me.EmbeddedDocument):
     #--------------------------------
     # AggregatedTaskData methods
     #--------------------------------
-    def aggregate_by_time_slots(self, start_of_day: str = None, end_of_day: str = None, slot_minutes: int = 60) -> dict:
+    def aggregate_by_time_slots(self, start_of_day: str = None, end_of_day: str = None, slot_minutes: int = 60, tasks=None) -> dict:
         """
         Aggregates task data into time slots.
 
@@ -215,78 +478,38 @@ class AggregatedTaskData(me.EmbeddedDocument):
             start_of_day (str, optional): Start time of the day in "HH:MM" format. Defaults to the schedule's start time.
             end_of_day (str, optional): End time of the day in "HH:MM" format. Defaults to the schedule's end time.
             slot_minutes (int, optional): Duration of each time slot in minutes. Defaults to 60.
+            tasks (list[Task], optional): The day's tasks (Task documents or dicts).
 
         Returns:
             dict: A dictionary where keys are time slot ranges (e.g., "08:00-09:00") and values contain aggregated task data.
         """
-        tasks = me.EmbeddedDocumentListField('Task')
         self.start = start_of_day or self.start
         self.end = end_of_day or self.end
-        def time_to_minutes(t_str) -> int:
-            """
-            Converts a time string in "HH:MM" format to the total number of minutes since midnight.
-
-            Args:
-                t_str (str): Time string in "HH:MM" format.
 
-            Returns:
-                int: Total minutes since midnight.
-            """
-            h, m = map(int, t_str.split(":"))
-            return h * 60 + m
-
-        start_min = time_to_minutes(start_of_day or self.start)
-        end_min = time_to_minutes(end_of_day or self.end)
-        
-        # Create slots dictionary
-        slots = {}
-        
-        while slot_time < end_min:
-            slot_end = slot_time + slot_minutes
-            slot_key = "{:02d}:{:02d}-{:02d}:{:02d}".format(slot_time // 60, slot_time % 60,
-                                                               slot_end // 60, slot_end % 60)
-            slots[slot_key] = {"total_mental": 0, "total_physical": 0, "total_exhaustion": 0, "total_duration": 0}
-            slot_time += slot_minutes
-            
-
-        # Aggregate task values per slot
-        for task in self.tasks:
-            task_start = time_to_minutes(task.start_time)
-            task_end = time_to_minutes(task.end_time)
-            task_duration = task_end - task_start
-            if task_duration <= 0:
-                continue  # Skip invalid tasks
-
-            for slot_key in slots:
-                # Extract slot start and end from the key
-                slot_parts = slot_key.split("-")
-                slot_start = time_to_minutes(slot_parts[0])
-                slot_end = time_to_minutes(slot_parts[1])
-                # Calculate overlap between task and slot
-                overlap = max(0, min(task_end, slot_end) - max(task_start, slot_start))
-                if overlap > 0:
-                    proportion = overlap / task_duration
-                    slots[slot_key]["total_mental"] += task.mental * overlap
-                    slots[slot_key]["total_physical"] += task.physical * overlap
-                    slots[slot_key]["total_exhaustion"] += task.exhaustion * overlap
-                    slots[slot_key]["total_duration"] += overlap
-
-        # Compute averages for each slot
-        for slot_key, data in slots.items():
-            if data["total_duration"] > 0:
-                data["avg_mental"] = data["total_mental"] / data["total_duration"]
-                data["avg_physical"] = data["total_physical"] / data["total_duration"]
-                data["avg_exhaustion"] = data["total_exhaustion"] / data["total_duration"]
-            else:
-                data["avg_mental"] = 0
-                data["avg_physical"] = 0
-                data["avg_exhaustion"] = 0
+        # One prefix-sum sweep over the day's minutes (see app.utils.slot_aggregation)
+        slots = aggregate_slots(tasks, self.start, self.end, slot_minutes)
         # slots structure example: {
         #     "08:00-09:00": {"total_mental": 100, "total_physical": 200, ...},
         #     "09:00-10:00": {"total_mental": 150, "total_physical": 250, ...},
         self.slots = slots  # Store the slots in the instance variable
         return slots  # Return the slots for further use if needed
 
+    def apply_task_edit(self, old_task=None, new_task=None) -> list:
+        """
+        Incrementally update the stored slots for one added, edited or removed task.
+
+        Args:
+            old_task (Task or dict, optional): The task before the edit (None when adding).
+            new_task (Task or dict, optional): The task after the edit (None when removing).
+
+        Returns:
+            list[str]: The keys of the slots that changed.
+        """
+        slots = dict(self.slots or {})
+        changed = apply_task_delta(slots, old_task, new_task)
+        self.slots = slots
+        return changed
+
     def to_dict(self):
         """
         Convert the AggregatedTaskData object to a dictionary representation.
@@ -373,7 +596,10 @@ class UserData(me.EmbeddedDocument):
         googlefit (EmbeddedDocumentField): Google Fit data for the user.
         schedule_data (EmbeddedDocumentField): Schedule-related data for the user.
         AggregatedTaskData (EmbeddedDocumentField): Aggregated task data for the user.
-        MLdata (EmbeddedDocumentListField): Machine learning predictions for the user.
+        MLdata (EmbeddedDocumentListField): Machine learning predictions for the user (legacy encoding).
+        MLPredictions (EmbeddedDocumentField): The same predictions as compact hour-indexed arrays.
+        MLExplanation (EmbeddedDocumentField): Per-feature contributions behind MLdata (served
+            separately by /calendar/explanations, not included in to_dict).
     --------------------
     Structure example: {
         "googlefit": {
@@ -390,7 +616,29 @@ class UserData(me.EmbeddedDocument):
     GoogleFitData = me.EmbeddedDocumentField(GoogleFitData)
     ScheduleData = me.EmbeddedDocumentField(ScheduleData)
     AggregatedTaskData = me.EmbeddedDocumentField(AggregatedTaskData)
-    MLData = me.EmbeddedDocumentListField(MLData)
+    MLData = me.EmbeddedDocumentListField(MLData)  # legacy encoding, still read
+    MLPredictions = me.EmbeddedDocumentField(MLPredictionSeries)
+    MLExplanation = me.EmbeddedDocumentField(MLExplanation)
+
+    def get_ml_data(self) -> list:
+        """
+        The day's predictions as MLData documents, from either storage encoding.
+        """
+        if self.MLPredictions:
+            return self.MLPredictions.to_ml_data()
+        return list(self.MLData or [])
+
+    def ml_values(self) -> np.ndarray:
+        """
+        The day's predictions as a (24, 2) [CP, PE] matrix, index = hour of day.
+        """
+        if self.MLPredictions:
+            return self.MLPredictions.values()
+        return MLPredictionSeries.from_predictions(
+            [{"time_slot": m.time_slot, "CP": m.predicted_CP, "PE": m.predicted_PE} for m in self.MLData or []],
+            packed=False
+        ).values()
+
     def to_dict(self):
         """
         Convert the UserData object to a dictionary representation.
@@ -399,9 +647,9 @@ class UserData(me.EmbeddedDocument):
             dict: A dictionary representation of the UserData object.
         """
         return {
-            "googlefit": self.GoogleFitData.to_mongo().to_dict() if self.GoogleFitData else None,
+            "googlefit": self.GoogleFitData.to_dict() if self.GoogleFitData else None,
             "schedule_data": self.ScheduleData.to_mongo().to_dict() if self.ScheduleData else None,
             "AggregatedTaskData": self.AggregatedTaskData.to_mongo().to_dict() if self.AggregatedTaskData else None,
-            "MLdata": [data.to_mongo().to_dict() for data in self.MLData] if self.MLData else []
+            "MLdata": [data.to_dict() for data in self.get_ml_data()]
         }
        
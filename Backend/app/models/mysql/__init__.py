@@ -1,2 +1,3 @@
 # Import all models
 from app.models.mysql.user import *
+from app.models.mysql.refresh_token import *
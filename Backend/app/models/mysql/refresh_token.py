@@ -0,0 +1,36 @@
+from datetime import datetime
+from app.extensions import mysql
+
+
+class RefreshToken(mysql.Model):
+    """
+    RefreshToken Model:
+    One issued refresh token, identified by its JWT id.
+
+    Attributes:
+        jti (str): Primary key, the token's "jti" claim.
+        user_id (str): The user the token was issued to.
+        expires_at (datetime): The token's "exp" claim.
+        revoked_at (datetime, optional): When the token was rotated, logged out or revoked.
+        replaced_by (str, optional): jti of the token issued when this one was rotated.
+        created_at (datetime): Timestamp when the token was issued.
+    """
+    __tablename__ = 'refresh_tokens'
+
+    jti = mysql.Column(mysql.String(36), primary_key=True)
+    user_id = mysql.Column(mysql.String(36), mysql.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    expires_at = mysql.Column(mysql.DateTime, nullable=False)
+    revoked_at = mysql.Column(mysql.DateTime, nullable=True, index=True)
+    replaced_by = mysql.Column(mysql.String(36), nullable=True)
+    created_at = mysql.Column(mysql.DateTime, default=datetime.now)
+
+    def to_dict(self) -> dict:
+        """Converts the RefreshToken object into a dictionary representation."""
+        return {
+            "jti": self.jti,
+            "user_id": self.user_id,
+            "expires_at": self.expires_at.isoformat(),
+            "revoked_at": self.revoked_at.isoformat() if self.revoked_at else None,
+            "replaced_by": self.replaced_by,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import TimeSeriesSplit, ParameterSampler
+logger = logging.getLogger(__name__)
+
+
+def _fit_and_score(estimator, fold):
+    """Fit one estimator on a cached, already-preprocessed fold and return its MAE per target."""
+    estimator.fit(fold["X_train"], fold["y_train"])
+    pred = np.asarray(estimator.predict(fold["X_test"]))
+    y_test = fold["y_test"].reshape(len(fold["y_test"]), -1)
+    pred = pred.reshape(len(pred), -1)
+    return [mean_absolute_error(y_test[:, j], pred[:, j]) for j in range(y_test.shape[1])]
+
+
+class TimeSeriesCV:
+    """
+    Rolling-origin (expanding window) cross-validation for the CP/PE models.
+
+    Folds are built once per (X, y, preprocessor) and the fitted imputer/scaler
+    outputs of every fold are cached, so evaluating many candidate regressors only
+    pays for the regressor fits. Folds are evaluated in parallel.
+
+    When `dates` (the calendar day each sample belongs to) are given, the folds are
+    cut on the distinct dates shared by all users: every training row is from an
+    earlier day than every validation row, whichever user it belongs to, and the rows
+    of one day are never split between training and validation. `gap` and
+    `max_train_size` then count days.
+    """
+
+    def __init__(self, n_splits: int = 5, gap: int = 0, max_train_size: int = None, n_jobs: int = -1):
+        """
+        Args:
+            n_splits (int, optional): Number of rolling origins. Defaults to 5.
+            gap (int, optional): Samples left out between train and test. Defaults to 0.
+            max_train_size (int, optional): Cap on the training window (sliding instead of expanding).
+            n_jobs (int, optional): Parallel fold evaluations (-1 = all cores). Defaults to -1.
+        """
+        self.n_splits = n_splits
+        self.gap = gap
+        self.max_train_size = max_train_size
+        self.n_jobs = n_jobs
+        self.max_cached_datasets = 8
+        self._fold_cache = {}  # dataset fingerprint -> preprocessed folds
+
+    #--------------------------------
+    # Fold construction
+    #--------------------------------
+    def split(self, n_samples: int, dates=None) -> list:
+        """
+        Build rolling-origin (train_idx, test_idx) pairs.
+
+        Args:
+            n_samples (int): Number of samples, in temporal order (only used without dates).
+            dates (array-like, optional): 'YYYY-MM-DD' date per sample, in any order.
+                Samples without a date are left out of every fold.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: One (train, test) index pair per fold.
+        """
+        splitter = TimeSeriesSplit(n_splits=self.n_splits, gap=self.gap, max_train_size=self.max_train_size)
+        if dates is None:
+            return list(splitter.split(np.arange(n_samples)))
+
+        dates = pd.Series(np.asarray(dates, dtype=object))
+        days = np.array(sorted(dates.dropna().unique()))
+        if len(days) <= self.n_splits + self.gap:
+            # Too few days for n_splits validation windows
+            return []
+        day_of_sample = dates.map({day: i for i, day in enumerate(days)}).fillna(-1).to_numpy(dtype=int)
+        return [
+            (np.flatnonzero(np.isin(day_of_sample, train_days)), np.flatnonzero(np.isin(day_of_sample, test_days)))
+            for train_days, test_days in splitter.split(days)
+        ]
+
+    @staticmethod
+    def _fingerprint(X, y, dates, preprocessor) -> str:
+        h = hashlib.sha1()
+        for arr in (np.ascontiguousarray(X, dtype=float), np.ascontiguousarray(y, dtype=float)):
+            h.update(str(arr.shape).encode())
+            h.update(arr.tobytes())
+        if dates is not None:
+            h.update(np.asarray(dates).astype(str).tobytes())
+        h.update(repr(sorted(preprocessor.get_params(deep=True).items(), key=lambda kv: kv[0])).encode())
+        return h.hexdigest()
+
+    def build_folds(self, X, y, preprocessor, columns=None, dates=None) -> list:
+        """
+        Split the data and fit the preprocessor on each training window, once.
+
+        Args:
+            X (array-like): Feature matrix in temporal order.
+            y (array-like): Targets.
+            preprocessor: Unfitted scikit-learn transformer (imputer + scaler).
+            columns (list[str], optional): Column names the preprocessor selects on.
+            dates (array-like, optional): Calendar date per sample (see split).
+
+        Returns:
+            list[dict]: Per fold: "X_train", "X_test" (transformed), "y_train", "y_test".
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        key = self._fingerprint(X, y, dates, preprocessor)
+        if key in self._fold_cache:
+            return self._fold_cache[key]
+
+        folds = []
+        for train_idx, test_idx in self.split(len(X), dates):
+            X_train = pd.DataFrame(X[train_idx], columns=columns) if columns else X[train_idx]
+            X_test = pd.DataFrame(X[test_idx], columns=columns) if columns else X[test_idx]
+            fitted = clone(preprocessor).fit(X_train)
+            folds.append({
+                "X_train": fitted.transform(X_train),
+                "X_test": fitted.transform(X_test),
+                "y_train": y[train_idx],
+                "y_test": y[test_idx]
+            })
+        if len(self._fold_cache) >= self.max_cached_datasets:
+            self._fold_cache.pop(next(iter(self._fold_cache)))
+        self._fold_cache[key] = folds
+        return folds
+
+    #--------------------------------
+    # Evaluation & model selection
+    #--------------------------------
+    def evaluate(self, estimator, folds: list) -> dict:
+        """
+        Fit and score a (regressor-only) estimator on every cached fold in parallel.
+
+        Returns:
+            dict: {"mae": overall MAE, "mae_per_target": [...], "fold_mae": [[...], ...]}
+        """
+        if not folds:
+            return {"mae": None, "mae_per_target": [], "fold_mae": []}
+        fold_mae = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_score)(clone(estimator), fold) for fold in folds
+        )
+        per_target = np.mean(np.asarray(fold_mae), axis=0)
+        return {
+            "mae": float(np.mean(per_target)),
+            "mae_per_target": [float(v) for v in per_target],
+            "fold_mae": [[float(v) for v in scores] for scores in fold_mae]
+        }
+
+    def select(self, estimator, param_distributions: dict, folds: list, n_iter: int = 20, random_state: int = 42) -> dict:
+        """
+        Randomized search over estimator parameters on the cached folds.
+
+        Args:
+            estimator: Regressor to tune (parameters are set on clones).
+            param_distributions (dict): Parameter name -> list or scipy distribution.
+            folds (list): Output of build_folds.
+            n_iter (int, optional): Number of candidates. Defaults to 20.
+
+        Returns:
+            dict: {"best_params": ..., "best_mae": ..., "results": [{"params", "mae"}, ...]};
+            without folds (too little history) best_params is {} and best_mae None.
+        """
+        if not folds:
+            return {"best_params": {}, "best_mae": None, "results": []}
+        results = []
+        for params in ParameterSampler(param_distributions, n_iter=n_iter, random_state=random_state):
+            score = self.evaluate(clone(estimator).set_params(**params), folds)
+            results.append({"params": params, "mae": score["mae"]})
+        scored = [r for r in results if r["mae"] is not None]
+        best = min(scored, key=lambda r: r["mae"]) if scored else {"params": {}, "mae": None}
+        return {"best_params": best["params"], "best_mae": best["mae"], "results": results}
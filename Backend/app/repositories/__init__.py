@@ -1,4 +1,7 @@
 # Import repository modules to expose them at the package level.
 from app.repositories.user_repository import *
 from app.repositories.calendar_repository import *
-from app.repositories.ML_dataPipeline import *
\ No newline at end of file
+from app.repositories.ML_dataPipeline import *
+from app.repositories.prediction_cache_repository import *
+from app.repositories.job_checkpoint_repository import *
+from app.repositories.refresh_token_repository import *
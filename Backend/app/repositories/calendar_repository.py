@@ -1,8 +1,14 @@
 import logging
+import time
 from datetime import datetime, timezone
+from itertools import islice
 from typing import Optional, Dict, List
+from pymongo import UpdateOne
+from app.config import Config
 from app.extensions import Mongo
 from app.models.mongodb import * # Import all models
+from app.utils.mongo_client import read_preference
+from app.utils.slot_aggregation import aggregate_slots_batch, apply_task_delta
 logger = logging.getLogger(__name__)
 
 class CalendarRepository:
@@ -10,6 +16,13 @@ class CalendarRepository:
     
     def __init__(self):
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        # Read-only queries may be served by secondaries (MONGO_READ_PREFERENCE); duplicate
+        # checks and read-modify-write paths keep reading the primary
+        self.read_preference = read_preference(Config.MONGO_READ_PREFERENCE, Config.MONGO_MAX_STALENESS_SECONDS)
+
+    def _reads(self):
+        """The calendars collection for read-only queries."""
+        return Calendar._get_collection().with_options(read_preference=self.read_preference)
 
     # --------------------------------
     # Calendar CRUD Operations
@@ -24,10 +37,13 @@ class CalendarRepository:
             self.logger.error(f"Calendar creation failed for {user_id}: {str(e)}")
             return None
         
-    def get_calendar(self, user_id: str) -> Calendar:
-        """Safe calendar retrieval with error handling"""
+    def get_calendar(self, user_id: str, read_only: bool = False) -> Calendar:
+        """Safe calendar retrieval with error handling (read_only: the calendar will not be saved)"""
         try:
-            cal=Calendar.objects(user_id=user_id).first()
+            query = Calendar.objects(user_id=user_id)
+            if read_only:
+                query = query.read_preference(self.read_preference)
+            cal=query.first()
             return cal if cal else None
         except Exception as e:
             self.logger.error(f"Calendar retrieval failed for {user_id}: {str(e)}")
@@ -51,7 +67,7 @@ class CalendarRepository:
     
     def get_day(self, user_id: str, date_str: str) -> Optional[dict]:
         """Type-safe day retrieval"""
-        cal = self.get_calendar(user_id)
+        cal = self.get_calendar(user_id, read_only=True)
         if not cal:
             print(f"Calendar not found for user: {user_id}")
             return None
@@ -62,6 +78,211 @@ class CalendarRepository:
                 return d.to_dict() if d else {}  # Access 'schedule' as an attribute
         return None
     
+    def get_day_document(self, user_id: str, date_str: str) -> Optional[Day]:
+        """Fetch a single Day without loading the rest of the calendar"""
+        try:
+            doc = self._reads().find_one(
+                {"user_id": user_id},
+                {"days": {"$elemMatch": {"date": date_str}}}
+            )
+            if not doc or not doc.get("days"):
+                return None
+            return Day._from_son(doc["days"][0])
+        except Exception as e:
+            self.logger.error(f"Day retrieval failed for {user_id} on {date_str}: {str(e)}")
+            return None
+
+    def get_days(self, user_id: str, dates: List[str]) -> Dict[str, Day]:
+        """
+        Fetch only the given days of a calendar (the rest of the history is not loaded).
+
+        Returns:
+            dict: {date: Day} for the dates that exist.
+        """
+        try:
+            docs = self._reads().aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$project": {"_id": 0, "days": {"$filter": {
+                    "input": "$days", "as": "d", "cond": {"$in": ["$$d.date", list(dates)]}
+                }}}}
+            ])
+            return {day["date"]: Day._from_son(day) for doc in docs for day in doc.get("days") or []}
+        except Exception as e:
+            self.logger.error(f"Days retrieval failed for {user_id}: {str(e)}")
+            return {}
+
+    def get_days_modified_after(self, user_id: str, modified_after: datetime = None, after_date: str = "",
+                                limit: int = 50) -> List[Day]:
+        """
+        Page through a calendar's days in (Last_modified, date) order, starting after a cursor.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            modified_after (datetime, optional): Last_modified of the cursor day; None starts at the beginning.
+            after_date (str, optional): Date of the cursor day (tie-break for equal Last_modified).
+            limit (int, optional): Maximum number of days returned. Defaults to 50.
+
+        Returns:
+            list[Day]: Up to `limit` days; days without Last_modified sort first.
+        """
+        modified = {"$ifNull": ["$$d.Last_modified", datetime.min]}
+        cursor = modified_after or datetime.min
+        after = {"$or": [
+            {"$gt": [modified, cursor]},
+            {"$and": [{"$eq": [modified, cursor]}, {"$gt": ["$$d.date", after_date or ""]}]}
+        ]}
+        try:
+            docs = self._reads().aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$project": {"_id": 0, "days": {"$filter": {"input": "$days", "as": "d", "cond": after}}}},
+                {"$unwind": "$days"},
+                {"$replaceRoot": {"newRoot": "$days"}},
+                {"$addFields": {"_modified": {"$ifNull": ["$Last_modified", datetime.min]}}},
+                {"$sort": {"_modified": 1, "date": 1}},
+                {"$limit": limit}
+            ])
+            return [Day._from_son({k: v for k, v in day.items() if k != "_modified"}) for day in docs]
+        except Exception as e:
+            self.logger.error(f"Day sync failed for {user_id}: {str(e)}")
+            return []
+
+    def get_deleted_days_after(self, user_id: str, deleted_after: datetime = None, after_date: str = "",
+                               limit: int = 50) -> List[DayTombstone]:
+        """
+        Page through a calendar's removed days in (deleted_at, date) order, starting after a cursor.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            deleted_after (datetime, optional): Timestamp of the cursor; None starts at the beginning.
+            after_date (str, optional): Date of the cursor (tie-break for equal timestamps).
+            limit (int, optional): Maximum number of tombstones returned. Defaults to 50.
+
+        Returns:
+            list[DayTombstone]: Up to `limit` tombstones.
+        """
+        cursor = deleted_after or datetime.min
+        after = {"$or": [
+            {"$gt": ["$$d.deleted_at", cursor]},
+            {"$and": [{"$eq": ["$$d.deleted_at", cursor]}, {"$gt": ["$$d.date", after_date or ""]}]}
+        ]}
+        try:
+            docs = self._reads().aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$project": {"_id": 0, "deleted_days": {"$filter": {
+                    "input": {"$ifNull": ["$deleted_days", []]}, "as": "d", "cond": after
+                }}}},
+                {"$unwind": "$deleted_days"},
+                {"$replaceRoot": {"newRoot": "$deleted_days"}},
+                {"$sort": {"deleted_at": 1, "date": 1}},
+                {"$limit": limit}
+            ])
+            return [DayTombstone._from_son(tombstone) for tombstone in docs]
+        except Exception as e:
+            self.logger.error(f"Deleted day sync failed for {user_id}: {str(e)}")
+            return []
+
+    def has_content_hash(self, user_id: str, date_str: str, field: str, digest: str) -> bool:
+        """
+        Whether the day already holds content with this hash ('schedule_hash' or 'google_fit_hash').
+
+        Only the calendar _id is projected, so a duplicate upload costs one indexed lookup.
+        """
+        try:
+            return Calendar._get_collection().find_one(
+                {"user_id": user_id, "days": {"$elemMatch": {"date": date_str, field: digest}}},
+                {"_id": 1}
+            ) is not None
+        except Exception as e:
+            self.logger.error(f"Content hash lookup failed for {user_id} on {date_str}: {str(e)}")
+            return False
+
+    def _day_update_ops(self, user_id: str, date_str: str, user_data_fields: Dict, day_fields: Dict = None,
+                        containers: tuple = (), unset_fields: tuple = ()) -> List[UpdateOne]:
+        """
+        Build ordered update operations that set UserData sub-fields on one day in place.
+
+        The day is pushed if it does not exist yet and a missing/null UserData is
+        initialised first, so the final positional $set always has a target. Fields
+        may be dotted paths into a UserData sub-document (e.g. "GoogleFitData.sleep");
+        name that sub-document in `containers` so it is initialised too when null.
+        UserData sub-fields in `unset_fields` are removed by the same final update.
+        """
+        now = datetime.now()
+        updates = {f"days.$.UserData.{field}": value for field, value in user_data_fields.items()}
+        updates.update({f"days.$.{field}": value for field, value in (day_fields or {}).items()})
+        updates["days.$.Last_modified"] = now
+        final_update = {"$set": updates}
+        if unset_fields:
+            final_update["$unset"] = {f"days.$.UserData.{field}": "" for field in unset_fields}
+        return [
+            UpdateOne(
+                {"user_id": user_id, "days.date": {"$ne": date_str}},
+                {"$push": {"days": {"date": date_str, "UserData": {}, "Last_modified": now}}}
+            ),
+            UpdateOne(
+                {"user_id": user_id, "days": {"$elemMatch": {"date": date_str, "UserData": None}}},
+                {"$set": {"days.$.UserData": {}}}
+            ),
+            *(UpdateOne(
+                {"user_id": user_id, "days": {"$elemMatch": {"date": date_str, f"UserData.{container}": None}}},
+                {"$set": {f"days.$.UserData.{container}": {}}}
+            ) for container in containers),
+            UpdateOne(
+                {"user_id": user_id, "days.date": date_str},
+                final_update
+            )
+        ]
+
+    def iter_days(self, date_str: str, batch_size: int = 500, after_user_id: str = None):
+        """
+        Stream (user_id, Day) for every calendar that has `date_str`, fetching only that day.
+
+        Args:
+            date_str (str): The date in 'YYYY-MM-DD' format.
+            batch_size (int, optional): Cursor batch size. Defaults to 500.
+            after_user_id (str, optional): Resume point; users are streamed in user_id order
+                and only those after this one are returned.
+
+        Yields:
+            tuple: (user_id, Day)
+        """
+        query = {"days.date": date_str}
+        if after_user_id is not None:
+            query["user_id"] = {"$gt": after_user_id}
+        cursor = self._reads().find(
+            query,
+            {"user_id": 1, "days": {"$elemMatch": {"date": date_str}}},
+            batch_size=batch_size
+        ).sort("user_id", 1)
+        for doc in cursor:
+            if doc.get("days"):
+                yield doc["user_id"], Day._from_son(doc["days"][0])
+
+    def bulk_write(self, operations: List[UpdateOne], batch_size: int = 1000) -> int:
+        """
+        Apply update operations in ordered chunks of `batch_size`.
+
+        Returns:
+            int: The number of modified documents.
+        """
+        modified = 0
+        collection = Calendar._get_collection()
+        for i in range(0, len(operations), batch_size):
+            result = collection.bulk_write(operations[i:i + batch_size], ordered=True)
+            modified += result.modified_count
+        return modified
+
+    def bulk_write_days(self, day_operations: List[List[UpdateOne]], batch_size: int = 1000) -> int:
+        """
+        Apply the operation lists of several days (from _day_update_ops): every set-up
+        operation (push the day, initialise UserData) first, then the final updates.
+
+        Returns:
+            int: The number of days their final update modified (set-up operations are not counted).
+        """
+        self.bulk_write([op for operations in day_operations for op in operations[:-1]], batch_size)
+        return self.bulk_write([operations[-1] for operations in day_operations], batch_size)
+
     def add_or_update_day(self, user_id: str, day: Day) -> bool:
             """Atomic day update with transaction support"""
             try:
@@ -74,8 +295,10 @@ class CalendarRepository:
                         UserData = d.UserData
                         cal.days.remove(d)
                         day.UserData = UserData
+                        day.google_fit_hash = d.google_fit_hash
                         break
                 
+                day.Last_modified = datetime.now()
                 cal.days.append(day)
                 cal.save()
                 return True
@@ -89,7 +312,7 @@ class CalendarRepository:
     def get_day_schedule(self, user_id: str, date_str: str) -> dict:
         """Retrieve the schedule for a specific day"""
         try:
-            calendar = self.get_calendar(user_id)
+            calendar = self.get_calendar(user_id, read_only=True)
             if not calendar:
                 return None
             day = calendar.get_day(date_str)
@@ -101,17 +324,20 @@ class CalendarRepository:
             return None
     
     def remove_day(self, user_id: str, date_str: str) -> bool:
-        """Remove a day from the calendar by its date"""
+        """Remove a day from the calendar by its date, leaving a tombstone for /calendar/sync"""
         try:
-            calendar = self.get_calendar(user_id)
-            if not calendar:
-                return False
-            original_count = len(calendar.days)
-            calendar.remove_day(date_str)
-            if len(calendar.days) != original_count:
-                calendar.save()
-                return True
-            return False
+            # One atomic update; only the latest SYNC_MAX_TOMBSTONES tombstones are kept
+            result = Calendar._get_collection().update_one(
+                {"user_id": user_id, "days.date": date_str},
+                {
+                    "$pull": {"days": {"date": date_str}},
+                    "$push": {"deleted_days": {
+                        "$each": [{"date": date_str, "deleted_at": datetime.now()}],
+                        "$slice": -Config.SYNC_MAX_TOMBSTONES
+                    }}
+                }
+            )
+            return result.modified_count > 0
         except Exception as e:
             self.logger.error(f"Day removal failed for {date_str}: {str(e)}")
             return False
@@ -124,7 +350,7 @@ class CalendarRepository:
     def get_UserData(self, user_id: str, date_str: str) -> Optional[UserData]:
         """Retrieve user data for a specific date"""
         try:
-            cal = self.get_calendar(user_id)
+            cal = self.get_calendar(user_id, read_only=True)
             if not cal:
                 return None
             for day in cal.get('days', []):
@@ -139,34 +365,34 @@ class CalendarRepository:
             self.logger.error(f"User data retrieval failed for {date_str}: {str(e)}")
             return None
         
-    def get_all_UserData(self, user_id: str) -> List[UserData]:
-        """Retrieve all user data for the given user ID"""
+    def get_all_UserData(self, user_id: str, with_dates: bool = False) -> List[UserData]:
+        """Retrieve all user data for the given user ID (as (date, UserData) pairs with `with_dates`)"""
         try:
-            calendar = self.get_calendar(user_id)
+            calendar = self.get_calendar(user_id, read_only=True)
             if not calendar:
                 return []
             
-            return [day.UserData for day in calendar.days if day and day.UserData and isinstance(day.UserData, UserData) and day.UserData.to_mongo() is not None]
+            days = [day for day in calendar.days if day and day.UserData and isinstance(day.UserData, UserData) and day.UserData.to_mongo() is not None]
+            if with_dates:
+                return [(day.date, day.UserData) for day in days]
+            return [day.UserData for day in days]
         except Exception as e:
             self.logger.error(f"Failed to retrieve all user data for {user_id}: {str(e)}")
             return []
     
     # Google Fit Data Operations
-    def update_google_fit_data(self, user_id: str, date_str: str, fit_data: GoogleFitData) -> bool:
+    def update_google_fit_data(self, user_id: str, date_str: str, fit_data: GoogleFitData, content_hash: str = None) -> bool:
         """Type-safe Google Fit update with schema validation"""
         try:
-            calendar = self.get_calendar(user_id)
-            if not calendar:
+            fit_data.validate()
+            day_fields = {"google_fit_hash": content_hash} if content_hash else None
+            result = Calendar._get_collection().bulk_write(
+                self._day_update_ops(user_id, date_str, {"GoogleFitData": fit_data.to_mongo().to_dict()}, day_fields),
+                ordered=True
+            )
+            if not result.matched_count:
                 self.logger.error(f"Calendar not found: {user_id}")
                 return False
-
-            day = calendar.get_day(date_str) or Day(date=date_str)
-            day.UserData = day.UserData or UserData()
-            day.UserData.GoogleFitData = fit_data
-            day.Last_modified = datetime.now()
-            
-            calendar.days.append(day)
-            calendar.save()
             return True
         except Mongo.ValidationError as e:
             self.logger.error(f"Data validation failed: {str(e)}")
@@ -178,7 +404,7 @@ class CalendarRepository:
     def get_google_fit_data(self, user_id: str, date_str: str) -> Optional[GoogleFitData]:
         """Type-safe Google Fit data retrieval"""
         try:
-            calendar = self.get_calendar(user_id)
+            calendar = self.get_calendar(user_id, read_only=True)
             if not calendar:
                 return None
 
@@ -192,104 +418,251 @@ class CalendarRepository:
             return None
 
     # Schedule Data & Tasks Data Operations
-    def state_schedule_data(self, user_id: str, date_str: str) -> bool:
-        """Retrieve and populate ScheduleData and AggregatedTaskData for the given date."""
-        try:
-            calendar = self.get_calendar(user_id)
-            if not calendar:
-                return None
+    def iter_schedule_days(self, date_str: str = None, user_ids: List[str] = None, force: bool = False, batch_size: int = 500):
+        """
+        Stream (user_id, date, schedule) for days whose ScheduleData/AggregatedTaskData is missing.
 
-            day = calendar.get_day(date_str)
-            if not day:
-                return None
-            schedule_start = day.Schedule['start'] if day.Schedule else "08:00"
-            schedule_end = day.Schedule['end'] if day.Schedule else "20:00"
-            schedule_daily_score = day.Schedule['daily_score'] if day.Schedule else 0
-            Schedule_exhaustion = day.Schedule['exhaustion'] if day.Schedule else 0
-            schedule_done = day.Schedule['done'] if day.Schedule else 0.0
-            
-            
-            # Ensure UserData exists
-            day.UserData = day.UserData or UserData()
-
-            # Populate ScheduleData
-            if not day.UserData.schedule_data:
-                day.UserData.ScheduleData = ScheduleData(
-                    start=schedule_start,
-                    end=schedule_end,
-                    daily_score=schedule_daily_score,
-                    exhaustion=Schedule_exhaustion,
-                    done=schedule_done
-                )
-
-            # Populate AggregatedTaskData
-            if not day.UserData.AggregatedTaskData:
-                aggregated_task_data = AggregatedTaskData(
-                    start=schedule_start,
-                    end=schedule_end)
-                aggregated_task_data.aggregate_by_time_slots()
-                day.UserData.AggregatedTaskData = aggregated_task_data
-
-            # Save the updated calendar
-            calendar.save()
-            return True
+        Only each day's date and schedule are projected, server-side, so calendars are
+        never loaded whole.
+
+        Args:
+            date_str (str, optional): Restrict to this date ('YYYY-MM-DD'); all dates if None.
+            user_ids (list[str], optional): Restrict to these users; all users if None.
+            force (bool, optional): Also yield days that are already materialized.
+            batch_size (int, optional): Cursor batch size. Defaults to 500.
+
+        Yields:
+            tuple: (user_id, date_str, schedule dict or None)
+        """
+        match = {}
+        if date_str:
+            match["days.date"] = date_str
+        if user_ids is not None:
+            match["user_id"] = {"$in": list(user_ids)}
+
+        conditions = []
+        if date_str:
+            conditions.append({"$eq": ["$$d.date", date_str]})
+        if not force:
+            conditions.append({"$or": [
+                {"$eq": [{"$ifNull": ["$$d.UserData.ScheduleData.start", None]}, None]},
+                {"$eq": [{"$ifNull": ["$$d.UserData.AggregatedTaskData.slots", None]}, None]}
+            ]})
+        days = {"$filter": {"input": "$days", "as": "d", "cond": {"$and": conditions}}} if conditions else "$days"
+
+        cursor = Calendar._get_collection().aggregate([
+            {"$match": match},
+            {"$project": {
+                "_id": 0,
+                "user_id": 1,
+                "days": {"$map": {"input": days, "as": "d", "in": {"date": "$$d.date", "schedule": "$$d.schedule"}}}
+            }}
+        ], batchSize=batch_size)
+        for doc in cursor:
+            for day in doc.get("days") or []:
+                yield doc["user_id"], day["date"], day.get("schedule")
+
+    def materialize_schedule_data(self, date_str: str = None, user_ids: List[str] = None, force: bool = False,
+                                  batch_size: int = 500, write_batch_size: int = 1000) -> Dict:
+        """
+        Compute ScheduleData and AggregatedTaskData for every pending day in one streaming pass.
+
+        Days are aggregated `batch_size` at a time with the vectorized slot sweep and the
+        results are written in place with chunked bulk_write calls.
+
+        Args:
+            date_str (str, optional): Only materialize this date; all dates if None.
+            user_ids (list[str], optional): Only these users; all users if None.
+            force (bool, optional): Recompute days that are already materialized.
+            batch_size (int, optional): Days aggregated per batch. Defaults to 500.
+            write_batch_size (int, optional): Operations per bulk_write. Defaults to 1000.
+
+        Returns:
+            dict: {"days": ..., "modified_days": ..., "seconds": ...}
+        """
+        started = time.perf_counter()
+        stream = self.iter_schedule_days(date_str, user_ids, force, batch_size)
+        days, modified = 0, 0
+        while True:
+            batch = list(islice(stream, batch_size))
+            if not batch:
+                break
+            days += len(batch)
+            headers = []
+            for _, _, schedule in batch:
+                headers.append({
+                    "start": schedule.get("start") if schedule else "08:00",
+                    "end": schedule.get("end") if schedule else "20:00",
+                    "daily_score": (schedule or {}).get("daily_score", 0),
+                    "exhaustion": (schedule or {}).get("exhaustion", 0),
+                    "done": (schedule or {}).get("done", 0.0)
+                })
+            all_slots = aggregate_slots_batch(
+                ((schedule or {}).get("tasks") or [], header["start"], header["end"])
+                for (_, _, schedule), header in zip(batch, headers)
+            )
+            day_operations = []
+            for (user_id, day_date, _), header, slots in zip(batch, headers, all_slots):
+                fields = {
+                    "ScheduleData": ScheduleData(**header).to_mongo().to_dict(),
+                    "AggregatedTaskData": {"start": header["start"], "end": header["end"], "slots": slots}
+                }
+                # The day already exists, so the "push missing day" op is not needed
+                day_operations.append(self._day_update_ops(user_id, day_date, fields)[1:])
+            modified += self.bulk_write_days(day_operations, write_batch_size)
+        return {"days": days, "modified_days": modified, "seconds": round(time.perf_counter() - started, 3)}
+
+    def state_schedule_data(self, user_id: str, date_str: str, force: bool = False) -> bool:
+        """
+        Compute and store ScheduleData and AggregatedTaskData for the given date, unless
+        the day already has them (`force` recomputes). True if the day exists.
+        """
+        try:
+            if self.materialize_schedule_data(date_str, [user_id], force=force)["days"] > 0:
+                return True
+            return Calendar._get_collection().count_documents({"user_id": user_id, "days.date": date_str}, limit=1) > 0
         except Exception as e:
             self.logger.error(f"Failed to retrieve or populate schedule data for {user_id} on {date_str}: {str(e)}")
             return None
-    
+
     def state_all_schedule_data(self, user_id: str) -> bool:
-        """Retrieve and populate ScheduleData and AggregatedTaskData for all days."""
+        """Compute and store ScheduleData and AggregatedTaskData for all pending days of a user."""
         try:
-            calendar = self.get_calendar(user_id)
-            if not calendar:
+            self.materialize_schedule_data(user_ids=[user_id])
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve or populate schedule data for {user_id}: {str(e)}")
+            return None
+
+    def update_task(self, user_id: str, date_str: str, old_task: Optional[Dict], new_task: Optional[Dict]) -> Optional[Dict]:
+        """
+        Add, replace or remove one task and patch the stored slot aggregates incrementally.
+
+        Only the day's AggregatedTaskData slots and the stored copy of the old task are read;
+        the task and the slots it overlaps are written back with targeted $set/$push/$pull
+        operators, so the cost does not depend on how many tasks or days the calendar holds.
+
+        Args:
+            user_id (str): The user ID.
+            date_str (str): The date in 'YYYY-MM-DD' format.
+            old_task (dict, optional): The task as stored (matched by name/start/end); None to add.
+            new_task (dict, optional): The task after the edit; None to remove.
+
+        Returns:
+            dict: {"task": ..., "changed_slots": {slot_key: slot_data}}, or None on failure.
+        """
+        try:
+            if old_task is None and new_task is None:
                 return None
+            task_son = None
+            if new_task is not None:
+                task = Task(**new_task)
+                task.validate()
+                task_son = task.to_mongo().to_dict()
+            old_key = {k: old_task.get(k) for k in ("name", "start", "end")} if old_task else None
 
-            for day in calendar.days:
-                if not day.UserData:
-                    day.UserData = UserData()
-                
-                if not day.UserData.ScheduleData and not day.UserData.AggregatedTaskData:
-                    self.state_schedule_data(user_id, day.date)
+            collection = Calendar._get_collection()
+            tasks_expr = {"$ifNull": ["$day.schedule.tasks", []]}
+            docs = list(collection.aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$project": {
+                    "_id": 0,
+                    "day": {"$arrayElemAt": [
+                        {"$filter": {"input": "$days", "as": "d", "cond": {"$eq": ["$$d.date", date_str]}}}, 0
+                    ]}
+                }},
+                {"$project": {
+                    "day_found": {"$gt": ["$day.date", None]},
+                    "has_schedule": {"$gt": ["$day.schedule", None]},
+                    "slots": "$day.UserData.AggregatedTaskData.slots",
+                    "old_index": {"$indexOfArray": [
+                        {"$map": {"input": tasks_expr, "as": "t",
+                                  "in": {k: f"$$t.{k}" for k in ("name", "start", "end")}}},
+                        old_key
+                    ]} if old_key else {"$literal": -1}
+                }},
+                {"$project": {
+                    "day_found": 1, "has_schedule": 1, "slots": 1, "old_index": 1,
+                    "old_task": {"$arrayElemAt": [tasks_expr, "$old_index"]} if old_key else {"$literal": None}
+                }}
+            ]))
+            if not docs or not docs[0]["day_found"]:
+                return None
+            doc = docs[0]
+            if old_key and doc["old_index"] < 0:
+                self.logger.warning(f"Task {old_key} not found for {user_id} on {date_str}")
+                return None
 
-            # Save the updated calendar
-            calendar.save()
-            return True
+            # The stored copy of the old task is what the slots were aggregated from
+            day_filter = {"date": date_str}
+            # The schedule no longer matches the last upload, so re-uploading that payload must not be skipped
+            update = {"$set": {"days.$.Last_modified": datetime.now()}, "$unset": {"days.$.schedule_hash": ""}}
+            if old_key:
+                index = doc["old_index"]
+                day_filter.update({f"schedule.tasks.{index}.{k}": v for k, v in old_key.items()})
+                if task_son is not None:
+                    update["$set"][f"days.$.schedule.tasks.{index}"] = task_son
+                else:
+                    update["$pull"] = {"days.$.schedule.tasks": old_key}
+            elif doc["has_schedule"]:
+                update["$push"] = {"days.$.schedule.tasks": task_son}
+            else:
+                update["$set"]["days.$.schedule"] = {"tasks": [task_son]}
+
+            slots = doc.get("slots") or {}
+            changed = apply_task_delta(slots, doc.get("old_task"), task_son)
+            for key in changed:
+                update["$set"][f"days.$.UserData.AggregatedTaskData.slots.{key}"] = slots[key]
+
+            result = collection.update_one({"user_id": user_id, "days": {"$elemMatch": day_filter}}, update)
+            if not result.matched_count:
+                # The task list changed between the read and the write
+                return None
+            return {"task": new_task, "changed_slots": {key: slots[key] for key in changed}}
         except Exception as e:
-            self.logger.error(f"Failed to retrieve or populate schedule data for {user_id}: {str(e)}")
+            self.logger.error(f"Task update failed for {user_id} on {date_str}: {str(e)}")
             return None
-    
+
     # ML Data Operations
     def update_ml_predictions(self, user_id: str, date_str: str, predictions: List[Dict]) -> bool:
-        """ML data update with timezone awareness"""
+        """ML data update in place, without rewriting the whole calendar"""
         try:
-            calendar = self.get_calendar(user_id)
-            if not calendar:
-                return False
-
-            day = calendar.get_day(date_str)[0]
-            if not day:
-                day = Day(date=date_str)
-                calendar.days.append(day)
-
-            day.UserData = day.UserData or UserData()
-            day.UserData.MLData = [
-                MLData(time_slot=pred["time_slot"],
-                    predicted_CP=pred["CP"],
-                    predicted_PE=pred["PE"]
-                )
-                 for pred in predictions
-            ]
-            day.Last_modified = datetime.now()
-            calendar.save()
-            return True
+            fields = {
+                "MLPredictions": MLPredictionSeries.from_predictions(predictions).to_mongo().to_dict(),
+                "MLData": []  # drop the legacy per-slot encoding
+            }
+            # An explanation of the previous predictions would no longer match them
+            result = Calendar._get_collection().bulk_write(
+                self._day_update_ops(user_id, date_str, fields, unset_fields=("MLExplanation",)),
+                ordered=True
+            )
+            return result.matched_count > 0
         except Exception as e:
             self.logger.error(f"ML prediction update failed: {str(e)}")
             return False
     
+    def get_ml_explanation(self, user_id: str, date_str: str) -> Optional[MLExplanation]:
+        """Fetch only the stored prediction explanation of one day"""
+        try:
+            docs = list(self._reads().aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$project": {
+                    "_id": 0,
+                    "day": {"$filter": {"input": "$days", "as": "d", "cond": {"$eq": ["$$d.date", date_str]}}}
+                }},
+                {"$project": {"explanation": {"$arrayElemAt": ["$day.UserData.MLExplanation", 0]}}}
+            ]))
+            if not docs or not docs[0].get("explanation"):
+                return None
+            return MLExplanation._from_son(docs[0]["explanation"])
+        except Exception as e:
+            self.logger.error(f"ML explanation retrieval failed: {str(e)}")
+            return None
+
     def get_ml_data(self, user_id: str, date_str: str) -> Dict:
         """Structured data for ML pipeline with error handling"""
         try:
-            calendar = self.get_calendar(user_id)
+            calendar = self.get_calendar(user_id, read_only=True)
             if not calendar:
                 return None
 
@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from mongoengine.errors import NotUniqueError
+from app.models.mongodb.job_checkpoint import JobCheckpoint
+logger = logging.getLogger(__name__)
+
+class JobCheckpointRepository:
+    """Progress markers that let batch jobs resume where a crashed run stopped."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+
+    def get(self, job: str, run_key: str) -> Optional[JobCheckpoint]:
+        """
+        Fetch the checkpoint of one run.
+
+        Args:
+            job (str): The job name.
+            run_key (str): The run identifier (e.g., the target date).
+
+        Returns:
+            JobCheckpoint: The checkpoint, or None if the run never started.
+        """
+        try:
+            return JobCheckpoint.objects(job=job, run_key=run_key).first()
+        except Exception as e:
+            self.logger.error(f"Checkpoint retrieval failed for {job}/{run_key}: {str(e)}")
+            return None
+
+    def claim(self, job: str, run_key: str) -> bool:
+        """
+        Take one run of a job for this process.
+
+        The (job, run_key) index is unique, so when several processes schedule the
+        same run exactly one insert succeeds; the others skip the run.
+
+        Returns:
+            bool: True if this caller owns the run, False if it was already claimed
+                  (or the claim could not be recorded).
+        """
+        try:
+            now = datetime.now()
+            JobCheckpoint(job=job, run_key=run_key, status="running", started_at=now, updated_at=now).save(
+                force_insert=True
+            )
+            return True
+        except NotUniqueError:
+            return False
+        except Exception as e:
+            self.logger.error(f"Run claim failed for {job}/{run_key}: {str(e)}")
+            return False
+
+    def start(self, job: str, run_key: str) -> bool:
+        """Reset the run's checkpoint to the beginning."""
+        try:
+            now = datetime.now()
+            JobCheckpoint.objects(job=job, run_key=run_key).update_one(
+                set__last_user_id=None, set__processed=0, set__status="running",
+                set__started_at=now, set__updated_at=now, upsert=True
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Checkpoint reset failed for {job}/{run_key}: {str(e)}")
+            return False
+
+    def advance(self, job: str, run_key: str, last_user_id: str, processed: int) -> bool:
+        """Record that every user up to and including `last_user_id` has been written."""
+        try:
+            JobCheckpoint.objects(job=job, run_key=run_key).update_one(
+                set__last_user_id=last_user_id, set__processed=processed,
+                set__updated_at=datetime.now(), upsert=True
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Checkpoint update failed for {job}/{run_key}: {str(e)}")
+            return False
+
+    def finish(self, job: str, run_key: str) -> bool:
+        """Mark the run as complete."""
+        try:
+            JobCheckpoint.objects(job=job, run_key=run_key).update_one(
+                set__status="done", set__updated_at=datetime.now(), upsert=True
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Checkpoint completion failed for {job}/{run_key}: {str(e)}")
+            return False
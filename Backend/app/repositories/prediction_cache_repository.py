@@ -0,0 +1,80 @@
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict
+from app.config import Config
+from app.models.mongodb.prediction_cache import PredictionCacheEntry
+from app.utils.lru_cache import LRUCache
+logger = logging.getLogger(__name__)
+
+# In-memory tier, shared by every repository instance in this process
+_memory_tier = LRUCache("prediction_cache", capacity=Config.PREDICTION_CACHE_SIZE)
+
+class PredictionCacheRepository:
+    """
+    Two-tier cache of next-day predictions.
+
+    Entries are keyed by (user_id, date, input fingerprint, model version), so a
+    change in either the source day's data or the trained models is a miss.
+    Lookups hit the in-memory LRU tier first and fall back to MongoDB; MongoDB
+    hits are promoted into memory.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.memory = _memory_tier
+
+    @staticmethod
+    def _key(user_id: str, date_str: str, fingerprint: str, model_version: str) -> tuple:
+        return (str(user_id), date_str, fingerprint, model_version)
+
+    def get(self, user_id: str, date_str: str, fingerprint: str, model_version: str) -> Optional[List[Dict]]:
+        """
+        Look up cached predictions.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            date_str (str): The predicted day in 'YYYY-MM-DD' format.
+            fingerprint (str): Hash of the model inputs.
+            model_version (str): Version tag of the models.
+
+        Returns:
+            list[dict]: The cached predictions, or None on a miss.
+        """
+        key = self._key(user_id, date_str, fingerprint, model_version)
+        predictions = self.memory.get(key)
+        if predictions is not None:
+            return predictions
+        try:
+            entry = PredictionCacheEntry.objects(
+                user_id=str(user_id), date=date_str,
+                fingerprint=fingerprint, model_version=model_version
+            ).only('predictions').first()
+        except Exception as e:
+            self.logger.error(f"Prediction cache lookup failed for {user_id}: {str(e)}")
+            return None
+        if not entry:
+            return None
+        self.memory.set(key, entry.predictions)
+        return entry.predictions
+
+    def set(self, user_id: str, date_str: str, fingerprint: str, model_version: str, predictions: List[Dict]) -> bool:
+        """
+        Store predictions in both tiers.
+
+        Returns:
+            bool: True if the persistent tier was written, False otherwise.
+        """
+        self.memory.set(self._key(user_id, date_str, fingerprint, model_version), predictions)
+        try:
+            PredictionCacheEntry.objects(
+                user_id=str(user_id), date=date_str,
+                fingerprint=fingerprint, model_version=model_version
+            ).update_one(
+                set__predictions=predictions,
+                set_on_insert__created_at=datetime.now(),
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Prediction cache write failed for {user_id}: {str(e)}")
+            return False
@@ -0,0 +1,122 @@
+# refresh_token_repository.py
+import logging
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from app.extensions import mysql
+from app.models.mysql import RefreshToken
+logger = logging.getLogger(__name__)
+
+class RefreshTokenRepository:
+    """
+    Persistent record of issued refresh tokens and their revocation.
+    """
+    def __init__(self, session=None):
+        self.session = session or mysql.session
+
+    def add(self, jti: str, user_id: str, expires_at: datetime) -> RefreshToken:
+        """
+        Record a newly issued refresh token.
+        """
+        token = RefreshToken(jti=jti, user_id=user_id, expires_at=expires_at)
+        self.session.add(token)
+        self.session.commit()
+        return token
+
+    def rotate(self, old_jti: str, new_jti: str, user_id: str, expires_at: datetime, old_expires_at: datetime) -> datetime:
+        """
+        Revoke the presented refresh token and record its replacement in one commit.
+
+        The old token is claimed with a conditional UPDATE (only while revoked_at is
+        NULL), so of two concurrent or replayed rotations of one token exactly one
+        succeeds, whichever process serves them.
+
+        Returns:
+            datetime: The revocation time of the old token, or None if it had already
+                      been revoked (the token is being reused).
+        """
+        now = datetime.now()
+        claimed = self.session.query(RefreshToken).filter(
+            RefreshToken.jti == old_jti,
+            RefreshToken.revoked_at.is_(None)
+        ).update({"revoked_at": now, "replaced_by": new_jti}, synchronize_session=False)
+        if not claimed:
+            if self.session.get(RefreshToken, old_jti) is not None:
+                self.session.rollback()
+                return None
+            # Issued before tokens were recorded
+            self.session.add(RefreshToken(jti=old_jti, user_id=user_id, expires_at=old_expires_at,
+                                          revoked_at=now, replaced_by=new_jti))
+        self.session.add(RefreshToken(jti=new_jti, user_id=user_id, expires_at=expires_at))
+        try:
+            self.session.commit()
+        except IntegrityError:
+            # Another request recorded the same unrecorded token first
+            self.session.rollback()
+            return None
+        return now
+
+    def was_rotated(self, jti: str) -> bool:
+        """
+        Whether a refresh token was already exchanged for a replacement.
+        """
+        token = self.session.get(RefreshToken, jti)
+        return token is not None and token.replaced_by is not None
+
+    def revoke(self, jti: str, user_id: str, expires_at: datetime) -> datetime:
+        """
+        Revoke one refresh token (logout).
+
+        Returns:
+            datetime: The revocation time.
+        """
+        token = self.session.get(RefreshToken, jti)
+        if token is None:
+            token = RefreshToken(jti=jti, user_id=user_id, expires_at=expires_at)
+            self.session.add(token)
+        token.revoked_at = token.revoked_at or datetime.now()
+        self.session.commit()
+        return token.revoked_at
+
+    def revoke_all(self, user_id: str) -> list:
+        """
+        Revoke every unexpired refresh token of a user.
+
+        Returns:
+            list[tuple]: (jti, expires_at) of the tokens revoked now.
+        """
+        now = datetime.now()
+        tokens = self.session.query(RefreshToken).filter(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now
+        ).all()
+        for token in tokens:
+            token.revoked_at = now
+        self.session.commit()
+        return [(token.jti, token.expires_at) for token in tokens]
+
+    def revoked_since(self, since: datetime = None) -> list:
+        """
+        Unexpired revoked tokens, optionally only those revoked after `since`.
+
+        Returns:
+            list[tuple]: (jti, expires_at, revoked_at)
+        """
+        query = self.session.query(RefreshToken.jti, RefreshToken.expires_at, RefreshToken.revoked_at).filter(
+            RefreshToken.revoked_at.isnot(None),
+            RefreshToken.expires_at > datetime.now()
+        )
+        if since is not None:
+            query = query.filter(RefreshToken.revoked_at >= since)
+        return [tuple(row) for row in query.all()]
+
+    def delete_expired(self) -> int:
+        """
+        Delete tokens past their expiry (they can no longer be used either way).
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        deleted = self.session.query(RefreshToken).filter(RefreshToken.expires_at <= datetime.now()).delete()
+        self.session.commit()
+        return deleted
@@ -1,9 +1,20 @@
 # user_repository.py
 import logging
+from sqlalchemy.orm import make_transient_to_detached
+from app.config import Config
 from app.extensions import mysql
 from app.models.mysql import *
+from app.utils.lru_cache import LRUCache
 logger = logging.getLogger(__name__)
 
+# Column values of recently used users, keyed by id (shared by every repository in this process).
+# Only identity/profile columns: the password hash and Google tokens are always read from MySQL,
+# since other processes cannot invalidate this copy
+_SECRET_COLUMNS = ("password_hash", "access_token", "refresh_token")
+_user_cache = LRUCache("user_cache", capacity=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+# email -> id, checked against the cached row's email on use
+_email_index = LRUCache("user_email_index", capacity=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+
 class UserRepository:
     """
     A repository class for performing CRUD operations and managing user-related data.
@@ -11,6 +22,40 @@ class UserRepository:
     def __init__(self, session=None):
         # Use the provided session or the global db.session
         self.session = session or mysql.session
+        self.cache = _user_cache
+
+    #--------------------------------
+    # User cache
+    #--------------------------------
+    def _remember(self, user: User) -> User:
+        if user:
+            self.cache.set(user.id, {
+                column.key: getattr(user, column.key)
+                for column in User.__table__.columns if column.key not in _SECRET_COLUMNS
+            })
+            _email_index.set(user.email, user.id)
+        return user
+
+    def _from_cache(self, user_id: str):
+        """
+        Rebuild a cached user as a persistent instance of this session without a SELECT.
+        The secret columns are not cached; reading one from the instance loads it.
+
+        Returns:
+            User: The user, or None on a cache miss.
+        """
+        state = self.cache.get(user_id)
+        if state is None:
+            return None
+        user = User(**state)
+        make_transient_to_detached(user)
+        return self.session.merge(user, load=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drop a user from the cache; call after changing or deleting the user row.
+        """
+        self.cache.invalidate(user_id)
 
     #--------------------------------
     # User CRUD Operations
@@ -36,30 +81,41 @@ class UserRepository:
         return user
 
     ## get user by id
-    def get_user_by_id(self, user_id: str) -> User:
+    def get_user_by_id(self, user_id: str, fresh: bool = False) -> User:
         """
         Retrieve a user by their unique ID.
 
         Args:
             user_id (int): The unique identifier of the user.
+            fresh (bool, optional): Skip the cache and SELECT the row (use before checking
+                the password or acting on the account). Defaults to False.
 
         Returns:
             User: The User object if found, otherwise False.
         """
-        return self.session.query(User).filter_by(id=user_id).first() or False
+        user = None if fresh else self._from_cache(user_id)
+        if user is not None:
+            return user
+        return self._remember(self.session.query(User).filter_by(id=user_id).populate_existing().first()) or False
 
     ## get user by email
-    def get_user_by_email(self, email: str) -> User:
+    def get_user_by_email(self, email: str, fresh: bool = False) -> User:
         """
         Retrieve a user by their email address.
 
         Args:
             email (str): The email address of the user.
+            fresh (bool, optional): Skip the cache and SELECT the row (use before checking
+                the password). Defaults to False.
 
         Returns:
             User: The User object if found, otherwise False.
         """
-        return self.session.query(User).filter_by(email=email).first() or False
+        user_id = None if fresh else _email_index.get(email)
+        user = self._from_cache(user_id) if user_id else None
+        if user is not None and user.email == email:
+            return user
+        return self._remember(self.session.query(User).filter_by(email=email).populate_existing().first()) or False
     
     ## delete a user
     def delete_user(self, user_id: str) -> bool:
@@ -72,10 +128,11 @@ class UserRepository:
         Returns:
             bool: True if the user was successfully deleted, False otherwise.
         """
-        user = self.get_user_by_id(user_id)
+        user = self.get_user_by_id(user_id, fresh=True)
         if user:
             self.session.delete(user)
             self.session.commit()
+            self.invalidate(user_id)
             return True
         return False
     
@@ -95,17 +152,72 @@ class UserRepository:
             return user.id
         return None
     
+    def _iter_keyset(self, columns: list, *criteria, batch_size: int = 1000):
+        """
+        Stream rows of `columns` (the first being User.id) in id order, one page at a time.
+
+        Keyset pagination (WHERE id > last ORDER BY id LIMIT n) uses the primary key
+        index for every page and holds no cursor open between pages, so memory stays
+        at one page however large the table is (pymysql buffers whole result sets,
+        which rules out yield_per here).
+        """
+        last_id = None
+        while True:
+            query = self.session.query(*columns).filter(*criteria)
+            if last_id is not None:
+                query = query.filter(User.id > last_id)
+            rows = query.order_by(User.id).limit(batch_size).all()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    ## stream all user ids
+    def iter_user_ids(self, batch_size: int = 1000):
+        """
+        Stream every user ID, selecting only the id column.
+
+        Args:
+            batch_size (int, optional): IDs fetched per query. Defaults to 1000.
+
+        Yields:
+            str: User IDs in ascending order.
+        """
+        for (user_id,) in self._iter_keyset([User.id], batch_size=batch_size):
+            yield user_id
+
     ## get all users id
     def get_all_users_id(self) -> list:
         """
         Retrieve a list of all user IDs in the database.
 
+        Prefer iter_user_ids for large tables.
+
         Returns:
             list: A list of unique user IDs.
         """
-        users = self.session.query(User).all()
-        return [user.id for user in users]
-    
+        return list(self.iter_user_ids())
+
+    ## stream google tokens of linked users
+    def iter_google_fit_tokens(self, batch_size: int = 1000):
+        """
+        Stream the Google tokens of users with a linked Google account that hold any.
+
+        Args:
+            batch_size (int, optional): Users fetched per query. Defaults to 1000.
+
+        Yields:
+            tuple: (user_id, access_token, refresh_token)
+        """
+        rows = self._iter_keyset(
+            [User.id, User.access_token, User.refresh_token],
+            User.oauth_id.isnot(None),
+            (User.access_token.isnot(None)) | (User.refresh_token.isnot(None)),
+            batch_size=batch_size
+        )
+        for user_id, access_token, refresh_token in rows:
+            yield user_id, access_token, refresh_token
+
     ## get all users with google fit data
     def get_all_users_with_google_fit(self) -> list:
         """
@@ -139,6 +251,7 @@ class UserRepository:
                 if hasattr(user, key):
                     setattr(user, key, value)
             self.session.commit()
+            self.invalidate(user_id)
             return user
         return None
     
@@ -165,9 +278,31 @@ class UserRepository:
             user.access_token = access_token
             user.refresh_token = refresh_token
             self.session.commit()
+            self.invalidate(user_id)
             return True
         return False
 
+    ## save refreshed access tokens of many users
+    def save_access_tokens(self, access_tokens: dict) -> int:
+        """
+        Stores refreshed Google access tokens for many users in one commit.
+
+        Args:
+            access_tokens (dict): {user_id: access_token}.
+
+        Returns:
+            int: The number of users updated.
+        """
+        if not access_tokens:
+            return 0
+        self.session.bulk_update_mappings(
+            User, [{"id": user_id, "access_token": token} for user_id, token in access_tokens.items()]
+        )
+        self.session.commit()
+        for user_id in access_tokens:
+            self.invalidate(user_id)
+        return len(access_tokens)
+
     ## get tokens
     def get_tokens(self, user_id: str) -> dict:
         """
@@ -179,7 +314,7 @@ class UserRepository:
         Returns:
             dict: A dictionary containing the JWT token and refresh token if the user exists, otherwise None.
         """
-        user = self.get_user_by_id(user_id)
+        user = self.get_user_by_id(user_id, fresh=True)
         if user:
             return {
                 "access_token": user.access_token,
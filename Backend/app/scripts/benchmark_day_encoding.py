@@ -0,0 +1,67 @@
+# benchmark_day_encoding.py
+"""
+Compare the per-day storage size and deserialization time of the hourly data
+encodings: legacy (24 HourlyMetric + 24 MLData subdocuments), 24-element arrays,
+and packed float32 blobs.
+
+usage: python -m app.scripts.benchmark_day_encoding [--repeat 2000]
+"""
+import argparse
+import random
+import time
+import bson
+from app.models.mongodb.user_data import (
+    GoogleFitData, HourlyMetric, HourlyMetricSeries, MLData, MLPredictionSeries, SleepStageData, TimeFeatures, UserData
+)
+from app.utils.hourly_encoding import COS_TIME, SIN_TIME, SLOT_LABELS
+
+
+def make_user_data(encoding: str, seed: int = 0) -> UserData:
+    """One day of Google Fit metrics and predictions in the given encoding."""
+    rnd = random.Random(seed)
+    metrics = [
+        {"hour_range": SLOT_LABELS[h], "steps": rnd.randint(0, 2000), "heart_rate": round(rnd.uniform(55, 110), 1)}
+        for h in range(24)
+    ]
+    predictions = [{"time_slot": SLOT_LABELS[h], "CP": rnd.random(), "PE": rnd.random()} for h in range(24)]
+    fit = GoogleFitData(sleep=SleepStageData(total_hours=7.5, deep_hours=1.5, rem_hours=1.8, light_hours=4.2), hrv=42.0)
+    user_data = UserData(GoogleFitData=fit)
+    if encoding == "legacy":
+        fit.hourly_metrics = [
+            HourlyMetric(
+                time_features=TimeFeatures(sin_time=float(SIN_TIME[h]), cos_time=float(COS_TIME[h])), **m
+            ) for h, m in enumerate(metrics)
+        ]
+        user_data.MLData = [MLData(time_slot=p["time_slot"], predicted_CP=p["CP"], predicted_PE=p["PE"]) for p in predictions]
+    else:
+        packed = encoding == "packed"
+        fit.hourly = HourlyMetricSeries.from_metrics(metrics, packed=packed)
+        user_data.MLPredictions = MLPredictionSeries.from_predictions(predictions, packed=packed)
+    return user_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'encoding':>9} {'bytes':>7} {'decode us':>10} {'decode+read us':>15}")
+    for encoding in ("legacy", "arrays", "packed"):
+        raw = bson.encode(make_user_data(encoding).to_mongo().to_dict())
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            UserData._from_son(bson.decode(raw))
+        decode = (time.perf_counter() - started) / args.repeat
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            user_data = UserData._from_son(bson.decode(raw))
+            user_data.GoogleFitData.hourly_values()
+            user_data.ml_values()
+        read = (time.perf_counter() - started) / args.repeat
+        print(f"{encoding:>9} {len(raw):>7} {decode * 1e6:>10.1f} {read * 1e6:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
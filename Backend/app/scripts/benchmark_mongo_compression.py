@@ -0,0 +1,144 @@
+# benchmark_mongo_compression.py
+"""
+Payload size and latency of full-calendar reads with and without MongoDB wire
+compression.
+
+1. Locally: BSON size of one synthetic calendar (--days days with schedules, Google
+   Fit metrics and predictions) and its size / compress / decompress time with each
+   installed wire compressor (zlib always; snappy needs python-snappy, zstd needs
+   zstandard).
+2. Against a server (--uri, skipped if unreachable): the calendar is stored in a
+   scratch collection and read --reads times per compressor; reported are the
+   median read latency and the bytes the server sent per read (serverStatus
+   network.bytesOut), plus the transfer time those bytes take at --mbps.
+
+usage: python -m app.scripts.benchmark_mongo_compression [--uri mongodb://localhost:27017/owler_bench]
+                                                         [--days 365] [--reads 50] [--mbps 100]
+"""
+import argparse
+import random
+import statistics
+import time
+import zlib
+from datetime import datetime, timedelta
+import bson
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from app.models.mongodb import Calendar, Day, Schedule, Task
+from app.scripts.benchmark_day_encoding import make_user_data
+from app.utils.mongo_client import available_compressors
+
+COLLECTION = "calendar_compression_bench"
+
+
+def make_calendar(days: int, seed: int = 0) -> dict:
+    """A calendar document with `days` days of schedules, Fit metrics and predictions."""
+    rnd = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    calendar = Calendar(user_id="benchmark-user", days=[])
+    for offset in range(days):
+        tasks = []
+        for i in range(rnd.randint(4, 10)):
+            hour = 8 + i
+            tasks.append(Task(
+                name=f"Task {i} {rnd.choice(['study', 'gym', 'meeting', 'reading', 'project'])}",
+                start=f"{hour:02d}:00", end=f"{hour:02d}:45", deadline=f"{hour + 1:02d}:00",
+                done=rnd.random() < 0.7, mental=rnd.randint(1, 10), physical=rnd.randint(1, 10),
+                exhaustion=rnd.randint(0, 10), priority=rnd.randint(1, 5)
+            ))
+        calendar.days.append(Day(
+            date=(start + timedelta(days=offset)).strftime("%Y-%m-%d"),
+            schedule=Schedule(start="08:00", end="20:00", done=rnd.random(), exhaustion=rnd.randint(0, 10),
+                              daily_score=rnd.randint(0, 100), tasks=tasks),
+            UserData=make_user_data("arrays", seed=seed * 100000 + offset)
+        ))
+    return calendar.to_mongo().to_dict()
+
+
+def _codecs(names: list) -> dict:
+    codecs = {}
+    for name in names:
+        if name == "zlib":
+            codecs[name] = (lambda data: zlib.compress(data, 6), zlib.decompress)
+        elif name == "snappy":
+            import snappy
+            codecs[name] = (snappy.compress, snappy.uncompress)
+        elif name == "zstd":
+            import zstandard
+            codecs[name] = (zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress)
+    return codecs
+
+
+def local_sizes(raw: bytes, compressors: list, repeat: int = 20):
+    print(f"{'codec':>7} {'bytes':>10} {'ratio':>6} {'compress ms':>12} {'decompress ms':>14}")
+    print(f"{'none':>7} {len(raw):>10} {1.0:>6.2f} {0.0:>12.2f} {0.0:>14.2f}")
+    for name, (compress, decompress) in _codecs(compressors).items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            packed = compress(raw)
+        compress_ms = (time.perf_counter() - started) / repeat * 1000
+        started = time.perf_counter()
+        for _ in range(repeat):
+            decompress(packed)
+        decompress_ms = (time.perf_counter() - started) / repeat * 1000
+        print(f"{name:>7} {len(packed):>10} {len(raw) / len(packed):>6.2f} {compress_ms:>12.2f} {decompress_ms:>14.2f}")
+
+
+def _bytes_out(client: MongoClient) -> int:
+    return client.admin.command("serverStatus")["network"]["bytesOut"]
+
+
+def server_reads(uri: str, doc: dict, compressors: list, reads: int, mbps: float):
+    try:
+        setup = MongoClient(uri, serverSelectionTimeoutMS=3000)
+        collection = setup.get_default_database(default="owler_bench")[COLLECTION]
+        collection.drop()
+        collection.insert_one(doc)
+    except PyMongoError as e:
+        print(f"\nServer benchmark skipped ({uri} unreachable: {e.__class__.__name__})")
+        return
+
+    print(f"\n{'wire':>7} {'p50 ms':>8} {'p95 ms':>8} {'bytes/read':>11} {f'at {mbps:g} Mbit/s ms':>18}")
+    for name in ["none"] + compressors:
+        options = {} if name == "none" else {"compressors": name}
+        client = MongoClient(uri, serverSelectionTimeoutMS=3000, **options)
+        target = client.get_default_database(default="owler_bench")[COLLECTION]
+        target.find_one({"user_id": doc["user_id"]})  # connect and negotiate compression
+        # The counter includes the reply to the previous serverStatus: measure one reply's
+        # size back to back and subtract it from the window
+        first = _bytes_out(client)
+        before = _bytes_out(client)
+        status_bytes = before - first
+        latencies = []
+        for _ in range(reads):
+            started = time.perf_counter()
+            target.find_one({"user_id": doc["user_id"]})
+            latencies.append(time.perf_counter() - started)
+        per_read = max(0, _bytes_out(client) - before - status_bytes) / reads
+        latencies.sort()
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        transfer_ms = per_read * 8 / (mbps * 1e6) * 1000
+        print(f"{name:>7} {statistics.median(latencies) * 1000:>8.2f} {p95 * 1000:>8.2f} {per_read:>11.0f} {transfer_ms:>18.2f}")
+        client.close()
+    collection.drop()
+    setup.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017/owler_bench")
+    parser.add_argument("--days", type=int, default=365, help="Days in the calendar.")
+    parser.add_argument("--reads", type=int, default=50, help="Full-calendar reads per compressor.")
+    parser.add_argument("--mbps", type=float, default=100.0, help="Link speed for the transfer-time column.")
+    args = parser.parse_args()
+
+    doc = make_calendar(args.days)
+    raw = bson.encode(doc)
+    compressors = available_compressors(["zstd", "snappy", "zlib"])
+    print(f"Calendar with {args.days} days: {len(raw)} bytes of BSON; compressors installed: {', '.join(compressors)}\n")
+    local_sizes(raw, compressors)
+    server_reads(args.uri, doc, compressors, args.reads, args.mbps)
+
+
+if __name__ == "__main__":
+    main()
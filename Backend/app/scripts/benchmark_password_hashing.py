@@ -0,0 +1,64 @@
+# benchmark_password_hashing.py
+"""
+Login throughput under concurrency: password checks run inline in the request threads
+versus in the PasswordHasher process pool.
+
+While the logins run, a probe thread measures the latency of a trivial request-sized
+piece of Python work, i.e. how much the logins starve every other endpoint.
+
+usage: python -m app.scripts.benchmark_password_hashing [--logins 64] [--threads 16] [--workers 4]
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from app.utils.password_hasher import PasswordHasher
+
+
+def probe(stop: threading.Event, latencies: list):
+    """Stand-in for a cheap endpoint: a little Python work every 5 ms."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        sum(i * i for i in range(2000))
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.005)
+
+
+def run(hasher: PasswordHasher, stored: str, logins: int, threads: int) -> tuple:
+    stop, latencies = threading.Event(), []
+    prober = threading.Thread(target=probe, args=(stop, latencies))
+    prober.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda _: hasher.verify(stored, "correct horse"), range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+    assert all(results)
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+    return logins / elapsed, statistics.median(latencies) if latencies else 0.0, p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent request threads.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Hashing processes.")
+    parser.add_argument("--method", default="scrypt:32768:8:1")
+    args = parser.parse_args()
+
+    stored = generate_password_hash("correct horse", args.method)
+    print(f"{'mode':>8} {'logins/s':>9} {'probe p50 ms':>13} {'probe p95 ms':>13}")
+    for mode, workers in (("inline", 0), ("pool", args.workers)):
+        hasher = PasswordHasher(args.method, workers=workers, max_pending=args.logins)
+        hasher.verify(stored, "correct horse")  # start the pool outside the measurement
+        throughput, p50, p95 = run(hasher, stored, args.logins, args.threads)
+        print(f"{mode:>8} {throughput:>9.1f} {p50 * 1000:>13.2f} {p95 * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmark_schedule_optimizer.py
+"""
+Benchmark the server-side schedule optimizer against a minute-array greedy scan
+(the approach used by the Android ScheduleOptimizer) on days with hundreds of tasks.
+
+Both place tasks only at the same candidate starts (every --anchor-step minutes; 1
+compares against the Android per-minute scan), so the timings compare the search,
+not the number of candidates.
+
+usage: python -m app.scripts.benchmark_schedule_optimizer [--tasks 100 300 500] [--repeat 3] [--anchor-step 15]
+"""
+import argparse
+import random
+import time
+from app.utils.schedule_optimizer import ANCHOR_STEP, optimize_schedule
+from app.utils.slot_aggregation import time_to_minutes
+
+DAY_START, DAY_END = "06:00", "23:00"
+
+
+def make_day(n_tasks: int, seed: int = 0) -> tuple:
+    """Random schedule with n_tasks short tasks plus 24 hourly MLData predictions."""
+    rnd = random.Random(seed)
+    window = time_to_minutes(DAY_END) - time_to_minutes(DAY_START)
+    max_duration = max(1, int(0.8 * window / n_tasks) * 2 - 1)  # ~80% of the window is booked
+    tasks = []
+    for i in range(n_tasks):
+        duration = rnd.randint(1, max_duration)
+        start = time_to_minutes(DAY_START) + rnd.randint(0, window - duration)
+        tasks.append({
+            "name": f"task-{i}",
+            "start": "{:02d}:{:02d}".format(start // 60, start % 60),
+            "end": "{:02d}:{:02d}".format((start + duration) // 60, (start + duration) % 60),
+            "deadline": DAY_END,
+            "done": False,
+            "mental": rnd.randint(1, 10),
+            "physical": rnd.randint(1, 10),
+            "exhaustion": rnd.randint(0, 10),
+            "priority": rnd.randint(1, 5)
+        })
+    schedule = {"start": DAY_START, "end": DAY_END, "tasks": tasks}
+    ml_data = [
+        {"time_slot": f"{h:02d}:00-{h + 1:02d}:00", "predicted_CP": rnd.random(), "predicted_PE": rnd.random()}
+        for h in range(24)
+    ]
+    return schedule, ml_data
+
+
+def greedy_minute_scan(schedule: dict, ml_data: list, anchor_step: int = 1) -> int:
+    """
+    Baseline: boolean occupied[] array, every anchor start checked and scored by brute
+    force, falling back to the leftmost free gap.
+    """
+    day_start, day_end = time_to_minutes(schedule["start"]), time_to_minutes(schedule["end"])
+    occupied = [False] * (day_end - day_start)
+    cp = [0.0] * len(occupied)
+    pe = [0.0] * len(occupied)
+    for entry in ml_data:
+        start, end = (time_to_minutes(t) for t in entry["time_slot"].split("-"))
+        for m in range(max(start, day_start), min(end, day_end)):
+            cp[m - day_start], pe[m - day_start] = entry["predicted_CP"], entry["predicted_PE"]
+    placed = 0
+    for task in schedule["tasks"]:
+        duration = time_to_minutes(task["end"]) - time_to_minutes(task["start"])
+        best, best_score = -1, -1.0
+        for t in range(0, len(occupied) - duration + 1, anchor_step):
+            if any(occupied[t:t + duration]):
+                continue
+            score = task["mental"] * sum(cp[t:t + duration]) + task["physical"] * sum(pe[t:t + duration])
+            if score > best_score:
+                best, best_score = t, score
+        if best < 0:
+            # Like the optimizer: no anchor fits, take the leftmost free gap
+            best = next((t for t in range(len(occupied) - duration + 1) if not any(occupied[t:t + duration])), -1)
+        if best >= 0:
+            occupied[best:best + duration] = [True] * duration
+            placed += 1
+    return placed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100, 300, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--anchor-step", type=int, default=ANCHOR_STEP, help="Minutes between candidate starts.")
+    args = parser.parse_args()
+
+    print(f"Candidate starts every {args.anchor_step} min")
+    print(f"{'tasks':>6} {'optimizer ms':>13} {'placed':>7} {'minute scan ms':>15} {'placed':>7} {'speedup':>8}")
+    for n_tasks in args.tasks:
+        schedule, ml_data = make_day(n_tasks)
+        fast, slow = [], []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = optimize_schedule(schedule, ml_data, anchor_step=args.anchor_step)
+            fast.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            placed_baseline = greedy_minute_scan(schedule, ml_data, args.anchor_step)
+            slow.append(time.perf_counter() - started)
+        placed = n_tasks - len(result["unscheduled"])
+        print(f"{n_tasks:>6} {min(fast) * 1000:>13.1f} {placed:>7} {min(slow) * 1000:>15.1f} "
+              f"{placed_baseline:>7} {min(slow) / min(fast):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
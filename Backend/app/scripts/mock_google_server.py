@@ -0,0 +1,299 @@
+# mock_google_server.py
+"""
+Local stand-in for Google's OAuth endpoints, for testing sign-in without network access.
+
+Serves a freshly generated signing certificate the way Google does and mints ID tokens
+signed with it:
+
+  GET  /oauth2/v1/certs      {kid: PEM certificate}, Cache-Control: public, max-age=<--max-age>
+  GET  /id-token?sub=&email=&name=&aud=   a signed ID token for those claims
+  GET  /auth-code?sub=&email=&name=       a one-time authorization code for those claims
+  POST /token                authorization_code and refresh_token grants (form encoded)
+  POST /fitness/v1/users/me/dataset:aggregate
+                             Google Fit aggregates (steps, heart rate, sleep segments) for the
+                             bearer token's user: synthetic, deterministic per user and window
+  GET  /stats                request counts per path
+
+Every response can be delayed (--latency, to make round trips visible) and the next N
+requests to a path can be made to fail with 503 (MockGoogle.fail, to exercise retries).
+
+usage: python -m app.scripts.mock_google_server [--port 8089] [--max-age 3600] [--client-id ID] [--latency 0]
+then run the app with GOOGLE_CERTS_URL=http://127.0.0.1:8089/oauth2/v1/certs
+                      GOOGLE_TOKEN_URL=http://127.0.0.1:8089/token
+                  and GOOGLE_FIT_API_URL=http://127.0.0.1:8089/fitness/v1/users/me
+"""
+import argparse
+import datetime
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+
+class MockGoogle:
+    """
+    Fake Google OAuth server with one RSA signing key.
+
+    Usable from a script (serve_forever) or a test (start / stop in a background thread).
+    """
+    def __init__(self, port: int = 8089, max_age: int = 3600, client_id: str = "test-client-id", kid: str = "mock-key-1",
+                 latency: float = 0.0):
+        self.port = port
+        self.max_age = max_age
+        self.client_id = client_id
+        self.kid = kid
+        self.latency = latency
+        self.requests = Counter()
+        self.failures = Counter()  # path -> number of upcoming requests answered with 503
+        self.codes = {}  # authorization code -> ID-token claims (redeemable once)
+        self.refresh_tokens = {}  # refresh token -> ID-token claims
+        self.access_tokens = {}  # access token -> (sub, expiry epoch seconds)
+        self.fit_calls = defaultdict(list)  # sub -> monotonic times of its Fit API calls
+        self._lock = threading.Lock()
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        key_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        self.signer = crypt.RSASigner.from_string(key_pem, key_id=kid)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "mock-google")])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=30))
+            .sign(key, hashes.SHA256())
+        )
+        self.certs = {kid: cert.public_bytes(serialization.Encoding.PEM).decode()}
+        self.server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def mint_id_token(self, sub: str = "1234567890", email: str = "user@example.com", name: str = "Test User",
+                      aud: str = None, lifetime: int = 3600, **claims) -> str:
+        """A Google-style ID token signed with the served key."""
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com", "aud": aud or self.client_id, "sub": sub,
+            "email": email, "email_verified": True, "name": name, "iat": now, "exp": now + lifetime, **claims
+        }
+        return jwt.encode(self.signer, payload).decode()
+
+    def fail(self, path: str, times: int = 1) -> None:
+        """Answer the next `times` requests to `path` with 503."""
+        self.failures[path] += times
+
+    def issue_code(self, **claims) -> str:
+        """A one-time authorization code; redeeming it at /token yields an ID token with these claims."""
+        code = "code-" + secrets.token_urlsafe(12)
+        with self._lock:
+            self.codes[code] = claims
+        return code
+
+    def _access_token(self, sub: str, lifetime: int = 3599) -> str:
+        token = "ya29.mock-" + secrets.token_urlsafe(16)
+        with self._lock:
+            self.access_tokens[token] = (sub, time.time() + lifetime)
+        return token
+
+    def grant(self, sub: str, refresh_token: str = None, **claims) -> tuple:
+        """
+        Register a linked account directly (as if it had completed the web flow).
+
+        Returns:
+            tuple: (access_token, refresh_token)
+        """
+        refresh_token = refresh_token or "1//mock-" + secrets.token_urlsafe(16)
+        with self._lock:
+            self.refresh_tokens[refresh_token] = {"sub": sub, **claims}
+        return self._access_token(sub), refresh_token
+
+    def expire_access_tokens(self) -> None:
+        """Make every issued access token answer 401, as after an hour."""
+        with self._lock:
+            self.access_tokens = {token: (sub, 0) for token, (sub, _) in self.access_tokens.items()}
+
+    def _token(self, query, body, headers):
+        form = {k: v[0] for k, v in parse_qs(body).items()}
+        grant = form.get("grant_type")
+        if form.get("client_id") != self.client_id:
+            return 401, {"error": "invalid_client"}, {}
+        if grant == "authorization_code":
+            with self._lock:
+                claims = self.codes.pop(form.get("code"), None)
+            if claims is None:
+                return 400, {"error": "invalid_grant", "error_description": "Bad Request"}, {}
+            refresh_token = "1//mock-" + secrets.token_urlsafe(16)
+            with self._lock:
+                self.refresh_tokens[refresh_token] = claims
+            return 200, {
+                "access_token": self._access_token(claims.get("sub", "1234567890")), "expires_in": 3599,
+                "refresh_token": refresh_token, "id_token": self.mint_id_token(**claims),
+                "scope": "openid email profile", "token_type": "Bearer"
+            }, {}
+        if grant == "refresh_token":
+            claims = self.refresh_tokens.get(form.get("refresh_token"))
+            if claims is None:
+                return 400, {"error": "invalid_grant", "error_description": "Token has been expired or revoked."}, {}
+            return 200, {
+                "access_token": self._access_token(claims.get("sub", "1234567890")), "expires_in": 3599,
+                "scope": "openid email profile", "token_type": "Bearer"
+            }, {}
+        return 400, {"error": "unsupported_grant_type"}, {}
+
+    @staticmethod
+    def _fit_points(sub: str, data_type: str, start_ms: int, end_ms: int) -> list:
+        rng = random.Random(f"{sub}:{data_type}:{start_ms}")
+        if data_type == "com.google.sleep.segment":
+            # One night, 5 h into the window (23:00 for an 18:00 start): light / deep / rem
+            # cycles with a short awake episode
+            points, t = [], start_ms + 5 * 3_600_000
+            for stage, minutes in ((4, 60), (5, 70), (6, 30), (1, 10), (4, 80), (5, 50), (6, 60), (4, 60)):
+                minutes += rng.randint(-10, 10)
+                points.append({
+                    "startTimeNanos": str(t * 1_000_000), "endTimeNanos": str((t + minutes * 60_000) * 1_000_000),
+                    "dataTypeName": data_type, "value": [{"intVal": stage}]
+                })
+                t += minutes * 60_000
+            return points
+        if data_type == "com.google.step_count.delta":
+            value = [{"intVal": rng.randint(0, 1500)}]
+        else:  # heart_rate.summary: average, max, min
+            average = rng.uniform(55, 95)
+            value = [{"fpVal": round(average, 1)}, {"fpVal": round(average + 20, 1)}, {"fpVal": round(average - 10, 1)}]
+        return [{"startTimeNanos": str(start_ms * 1_000_000), "endTimeNanos": str(end_ms * 1_000_000),
+                 "dataTypeName": data_type, "value": value}]
+
+    def _aggregate(self, query, body, headers):
+        token = (headers.get("Authorization") or "").removeprefix("Bearer ")
+        with self._lock:
+            sub, expires = self.access_tokens.get(token, (None, 0))
+        if sub is None or expires < time.time():
+            return 401, {"error": {"code": 401, "status": "UNAUTHENTICATED"}}, {}
+        self.fit_calls[sub].append(time.monotonic())
+        request = json.loads(body or "{}")
+        start, end = int(request["startTimeMillis"]), int(request["endTimeMillis"])
+        width = int(request.get("bucketByTime", {}).get("durationMillis", end - start))
+        data_types = [a["dataTypeName"] for a in request.get("aggregateBy", [])]
+        buckets = []
+        for bucket_start in range(start, end, width):
+            bucket_end = min(bucket_start + width, end)
+            buckets.append({
+                "startTimeMillis": str(bucket_start), "endTimeMillis": str(bucket_end),
+                "dataset": [
+                    {
+                        "dataSourceId": f"derived:{data_type.replace('heart_rate.bpm', 'heart_rate.summary')}"
+                                        ":com.google.android.gms:aggregated",
+                        "point": self._fit_points(
+                            sub, data_type.replace("heart_rate.bpm", "heart_rate.summary"), bucket_start, bucket_end
+                        )
+                    }
+                    for data_type in data_types
+                ]
+            })
+        return 200, {"bucket": buckets}, {}
+
+    def routes(self) -> dict:
+        """{(method, path): handler(query, body, headers) -> (status, json, headers)}"""
+        return {
+            ("GET", "/oauth2/v1/certs"): lambda query, body, headers: (
+                200, self.certs, {"Cache-Control": f"public, max-age={self.max_age}, must-revalidate, no-transform"}
+            ),
+            ("GET", "/id-token"): lambda query, body, headers: (
+                200, {"id_token": self.mint_id_token(**{k: v[0] for k, v in query.items()})}, {}
+            ),
+            ("GET", "/auth-code"): lambda query, body, headers: (
+                200, {"code": self.issue_code(**{k: v[0] for k, v in query.items()})}, {}
+            ),
+            ("POST", "/token"): self._token,
+            ("POST", "/fitness/v1/users/me/dataset:aggregate"): self._aggregate,
+            ("GET", "/stats"): lambda query, body, headers: (200, dict(self.requests), {}),
+        }
+
+    def _handler(self):
+        mock = self
+        routes = self.routes()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse the connection
+
+            def _dispatch(self, method):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                body = self.rfile.read(length).decode() if length else ""
+                mock.requests[url.path] += 1
+                if mock.latency:
+                    time.sleep(mock.latency)
+                route = routes.get((method, url.path))
+                with mock._lock:
+                    failing = mock.failures[url.path] > 0
+                    if failing:
+                        mock.failures[url.path] -= 1
+                if failing:
+                    status, payload, headers = 503, {"error": "backendError"}, {}
+                elif route:
+                    status, payload, headers = route(parse_qs(url.query), body, self.headers)
+                else:
+                    status, payload, headers = 404, {"error": "not_found"}, {}
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockGoogle":
+        """Serve in a daemon thread (port 0 picks a free port)."""
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--max-age", type=int, default=3600, help="Cache-Control max-age of the certificates.")
+    parser.add_argument("--client-id", default="test-client-id", help="Default audience of minted ID tokens.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    args = parser.parse_args()
+
+    mock = MockGoogle(args.port, args.max_age, args.client_id, latency=args.latency)
+    mock.server = ThreadingHTTPServer(("127.0.0.1", args.port), mock._handler())
+    print(f"Mock Google on {mock.base_url} (certs: {mock.base_url}/oauth2/v1/certs)")
+    print(f"Sample ID token: {mock.mint_id_token()}")
+    print(f"Sample authorization code: {mock.issue_code(sub='1234567890', email='user@example.com', name='Test User')}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,8 @@ from app.services.auth_service import *
 from app.services.calendar_service import *
 
 from app.services.ml_service import *
+from app.services.batch_prediction_service import *
 from app.services.user_service import *
+from app.services.token_service import *
+from app.services.fit_sync_service import *
+from app.services.schedule_suggestion_service import *
@@ -1,12 +1,13 @@
 import datetime
 import logging
 import requests
-from werkzeug.security import generate_password_hash, check_password_hash
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token as google_id_token
-from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
+from flask_jwt_extended import get_jwt, get_jwt_identity
 from app.models.mysql.user import User
 from app.repositories import UserRepository, CalendarRepository
+from app.services.calendar_service import CalendarService
+from app.services.token_service import TokenService
+from app.utils.google_auth import GoogleOAuthError, get_id_token_verifier, get_oauth_client
+from app.utils.password_hasher import PasswordHasherBusy, get_password_hasher
 from flask import current_app
 
 logger = logging.getLogger(__name__)
@@ -58,8 +59,11 @@ class AuthService:
         if self.user_repo.get_user_by_email(email):
             return {"msg": "User already exists"}, 409
 
-        # Hash the password
-        password_hash = generate_password_hash(password)
+        # Hash the password (in the hashing process pool)
+        try:
+            password_hash = get_password_hasher(current_app.config).hash(password)
+        except PasswordHasherBusy:
+            return {"msg": "Server busy, please retry shortly"}, 503
 
         # Create the user in MySQL
         user = self.user_repo.create_user(email=email, name=name, password_hash=password_hash, age=age, gender=gender)
@@ -70,8 +74,7 @@ class AuthService:
             return {"msg": "Failed to create calendar"}, 500
 
         # Issue JWT tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = TokenService().issue_tokens(user.id)
 
         return {
             "msg": "User registered successfully",
@@ -85,11 +88,13 @@ class AuthService:
         Authenticates a user using their email and password.
 
         Args:
-            data (dict): A dictionary containing 'email' and 'password' keys.
+            data (dict): A dictionary containing 'email' and 'password' keys, and optionally
+                'today' ('YYYY-MM-DD', the client's date).
 
         Returns:
-            tuple: A dictionary with a success message, JWT tokens, and user details, 
-                   or an error message with an HTTP status code.
+            tuple: A dictionary with a success message, JWT tokens, user details and the
+                   session bootstrap (today's and tomorrow's days plus a sync cursor for
+                   /calendar/sync), or an error message with an HTTP status code.
         """
         email = data.get("email")
         password = data.get("password")
@@ -97,19 +102,26 @@ class AuthService:
         if not email or not password:
             return {"msg": "Missing email or password"}, 400
 
-        user = self.user_repo.get_user_by_email(email)
-        if not user or not check_password_hash(user.password_hash, password):
-            return {"msg": "Bad email or password"}, 401
+        # The password hash is never served from the user cache
+        user = self.user_repo.get_user_by_email(email, fresh=True)
+        hasher = get_password_hasher(current_app.config)
+        try:
+            if not user or not hasher.verify(user.password_hash, password):
+                return {"msg": "Bad email or password"}, 401
+            # Hashes made with an older method/cost are upgraded while the password is at hand
+            if hasher.needs_rehash(user.password_hash):
+                self.user_repo.update_user_profile(user.id, password_hash=hasher.hash(password))
+        except PasswordHasherBusy:
+            return {"msg": "Server busy, please retry shortly"}, 503
 
         # Issue tokens on successful authentication
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = TokenService().issue_tokens(user.id)
 
         return {
             "msg": "Login successful",
             "access_token": access_token,
             "refresh_token": refresh_token,
-            "calendar": self.calendar_repo.get_calendar(user.id).to_dict(),
+            "session": CalendarService().get_session_bootstrap(user.id, data.get("today")),
             "user": user.to_dict()
         }, 200
     
@@ -153,34 +165,27 @@ class AuthService:
         if not code:
             return {"msg": "Missing authorization code"}, 400
 
-        client_id = current_app.config.get("OAUTH_CLIENT_ID")
-        client_secret = current_app.config.get("OAUTH_CLIENT_SECRET")
-        redirect_uri = current_app.config.get("OAUTH_REDIRECT_URI")
-
-        token_url = "https://oauth2.googleapis.com/token"
-        token_data = {
-            "code": code,
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "redirect_uri": redirect_uri,
-            "grant_type": "authorization_code"
-        }
-        token_resp = requests.post(token_url, data=token_data)
-        if token_resp.status_code != 200:
-            return {"msg": "Failed to exchange token", "error": token_resp.json()}, 400
+        # Exchange the code (one round trip) and verify the ID token locally
+        try:
+            tokens, token_info = get_oauth_client(current_app.config).exchange_code(
+                code,
+                current_app.config.get("OAUTH_CLIENT_ID"),
+                current_app.config.get("OAUTH_CLIENT_SECRET"),
+                current_app.config.get("OAUTH_REDIRECT_URI")
+            )
+        except GoogleOAuthError as e:
+            if e.status == 429 or e.status >= 500:
+                logger.error(f"Google token endpoint unavailable: {e}")
+                return {"msg": "Google sign-in temporarily unavailable"}, 503
+            return {"msg": "Failed to exchange token", "error": e.error}, 400
+        except ValueError as e:
+            return {"msg": "Failed to verify id_token", "error": str(e)}, 400
+        except requests.RequestException as e:
+            logger.error(f"Google token endpoint unavailable: {e}")
+            return {"msg": "Google sign-in temporarily unavailable"}, 503
 
-        tokens = token_resp.json()
         access_token_google = tokens.get("access_token")
         refresh_token_google = tokens.get("refresh_token")
-        id_token = tokens.get("id_token")
-
-        # Verify ID token and extract user info
-        token_info_url = f"https://oauth2.googleapis.com/tokeninfo?id_token={id_token}"
-        token_info_resp = requests.get(token_info_url)
-        if token_info_resp.status_code != 200:
-            return {"msg": "Failed to verify id_token", "error": token_info_resp.json()}, 400
-
-        token_info = token_info_resp.json()
         email = token_info.get("email")
         name = token_info.get("name")
 
@@ -203,8 +208,7 @@ class AuthService:
             self.user_repo.save_tokens(user.id, access_token_google, refresh_token_google)  # Update tokens
 
         # Issue JWT tokens
-        app_access_token = create_access_token(identity=user.id)
-        app_refresh_token = create_refresh_token(identity=user.id)
+        app_access_token, app_refresh_token = TokenService().issue_tokens(user.id)
 
         return {
             "msg": "Google authentication successful",
@@ -222,14 +226,17 @@ class AuthService:
             return {"error": "Missing ID token"}, 400
 
         # 2. Verify it came from Google and is intended for our CLIENT_ID
+        #    (locally, against Google's cached signing certificates)
         try:
-            payload = google_id_token.verify_oauth2_token(
+            payload = get_id_token_verifier(current_app.config).verify(
                 id_token_str,
-                google_requests.Request(),
                 current_app.config["OAUTH_CLIENT_ID"]
             )
         except ValueError:
             return {"error": "Invalid ID token"}, 401
+        except requests.RequestException as e:
+            logger.error(f"Google certificates unavailable: {e}")
+            return {"error": "Google sign-in temporarily unavailable"}, 503
 
         # 3. Extract the user info directly from the payload
         user_id   = payload.get("sub")
@@ -249,32 +256,50 @@ class AuthService:
             )
             self.calendar_repo.create_calendar(user.id)
             
-            user.oauth_id       = user_id
-            self.user_repo.save(user)
+            self.user_repo.update_user_profile(user.id, oauth_id=user_id)
 
         # 5. Issue your own JWTs
-        app_access_token  = create_access_token(user.id)
-        app_refresh_token = create_refresh_token(user.id)
+        app_access_token, app_refresh_token = TokenService().issue_tokens(user.id)
 
         # 6. Return session tokens and any other needed data
         return {
             "message":       "Google Sign-In successful",
             "access_token":  app_access_token,
             "refresh_token": app_refresh_token,
-            "calendar":      self.calendar_repo.get_calendar(user.id).to_dict(),
+            "session":       CalendarService().get_session_bootstrap(user.id, data.get("today")),
             "email":         email
         }, 200
     #--------------------------------
     # JWT token
     #--------------------------------
     def refresh_access_token(self) -> tuple:
-        """Generates a new access token for the current user.
+        """Generates a new token pair for the current user; the presented refresh token is revoked (rotation).
 
         Returns:
-            tuple: A dictionary containing the new access token and an HTTP status code.
+            tuple: A dictionary containing the new access and refresh tokens and an HTTP status code,
+                   or 401 if the refresh token had already been used.
         """
-        current_user = get_jwt_identity()
-        new_access_token = create_access_token(identity=current_user)
-        new_refresh_token = create_refresh_token(identity=current_user)
+        tokens = TokenService().rotate(get_jwt())
+        if tokens is None:
+            return {"msg": "Refresh token has been revoked"}, 401
+        new_access_token, new_refresh_token = tokens
         return {"access_token": new_access_token,
                 "refresh_token":new_refresh_token}, 200
+
+    def logout(self) -> tuple:
+        """Revokes the presented refresh token.
+
+        Returns:
+            tuple: A dictionary with a message and an HTTP status code.
+        """
+        TokenService().revoke(get_jwt())
+        return {"msg": "Logged out"}, 200
+
+    def logout_everywhere(self) -> tuple:
+        """Revokes every refresh token of the current user (all devices).
+
+        Returns:
+            tuple: A dictionary with the number of revoked tokens and an HTTP status code.
+        """
+        revoked = TokenService().revoke_all(get_jwt_identity())
+        return {"msg": "Logged out on all devices", "revoked": revoked}, 200
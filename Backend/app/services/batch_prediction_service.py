@@ -0,0 +1,106 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from flask import current_app
+from app.models.mongodb.user_data import MLPredictionSeries
+from app.repositories import CalendarRepository, PredictionCacheRepository
+from app.repositories.ML_dataPipeline import MLDataPipeline
+from app.utils.metrics import metrics
+logger = logging.getLogger(__name__)
+
+class BatchPredictionService:
+    """
+    Nightly batch predictor: computes next-day predictions for every user that has
+    data for the source day, in large feature matrices, and writes them with chunked
+    bulk_write operations instead of one calendar load/save per user.
+    """
+    def __init__(self, batch_size: int = None, write_batch_size: int = None, explain: bool = None):
+        """
+        Args:
+            batch_size (int, optional): Users per inference batch. Defaults to BATCH_PREDICTION_SIZE.
+            write_batch_size (int, optional): Operations per bulk_write. Defaults to BULK_WRITE_BATCH_SIZE.
+            explain (bool, optional): Store per-feature contributions next to MLData.
+                Defaults to BATCH_PREDICTION_EXPLAIN.
+        """
+        self.calendar_repo = CalendarRepository()
+        self.prediction_cache = PredictionCacheRepository()
+        self.pipeline = MLDataPipeline()
+        self.batch_size = batch_size or current_app.config.get("BATCH_PREDICTION_SIZE", 500)
+        self.write_batch_size = write_batch_size or current_app.config.get("BULK_WRITE_BATCH_SIZE", 1000)
+        self.explain = current_app.config.get("BATCH_PREDICTION_EXPLAIN", False) if explain is None else explain
+
+    def run(self, date_str: str = None) -> dict:
+        """
+        Predict the day after `date_str` for all users.
+
+        Args:
+            date_str (str, optional): Source day in 'YYYY-MM-DD' format. Defaults to today.
+
+        Returns:
+            dict: Run report with user counts, elapsed seconds and users per second.
+        """
+        source = date_str or datetime.now().strftime("%Y-%m-%d")
+        target = (datetime.strptime(source, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        started = time.perf_counter()
+        users, predicted, written = 0, 0, 0
+
+        stream = (
+            (user_id, day.UserData)
+            for user_id, day in self.calendar_repo.iter_days(source, batch_size=self.batch_size)
+            if day.UserData and day.UserData.GoogleFitData
+        )
+        while True:
+            batch = list(islice(stream, self.batch_size))
+            if not batch:
+                break
+            users += len(batch)
+            user_ids = [user_id for user_id, _ in batch]
+            days = [user_data for _, user_data in batch]
+
+            if self.explain:
+                results, explanations = self.pipeline.predict_next_day_batch(days, user_ids, explain=True)
+            else:
+                results = self.pipeline.predict_next_day_batch(days, user_ids)
+                explanations = [None] * len(results)
+            if not results:
+                break
+            predicted += len(results)
+
+            day_operations, cache_entries = [], []
+            for user_id, user_data, predictions, explanation in zip(user_ids, days, results, explanations):
+                fields = {
+                    "MLPredictions": MLPredictionSeries.from_predictions(predictions).to_mongo().to_dict(),
+                    "MLData": []
+                }
+                if explanation:
+                    fields["MLExplanation"] = explanation
+                # Without a new explanation, the stored one describes earlier predictions
+                day_operations.append(self.calendar_repo._day_update_ops(
+                    user_id, target, fields, unset_fields=() if explanation else ("MLExplanation",)
+                ))
+                cache_entries.append((
+                    user_id, target,
+                    self.pipeline.input_fingerprint(user_data),
+                    self.pipeline.model_version(user_id),
+                    predictions
+                ))
+            written += self.calendar_repo.bulk_write_days(day_operations, batch_size=self.write_batch_size)
+            # Only predictions that were stored may be reported as cached (a hit skips the write)
+            for entry in cache_entries:
+                self.prediction_cache.set(*entry)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            "source_date": source,
+            "target_date": target,
+            "users": users,
+            "predicted": predicted,
+            "modified_documents": written,
+            "seconds": round(elapsed, 3),
+            "users_per_second": round(users / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        metrics.observe("batch_prediction.run_seconds", elapsed)
+        metrics.set_gauge("batch_prediction.users_per_second", report["users_per_second"])
+        logger.info(f"Batch prediction {source} -> {target}: {users} users at {report['users_per_second']} users/s")
+        return report
@@ -1,7 +1,21 @@
-from datetime import datetime
-from app.models.mongodb.user_data import GoogleFitData, GoogleFitMetaData, HourlyMetric, SleepStageData, TimeFeatures
+import base64
+import logging
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from app.models.mongodb.user_data import (
+    GoogleFitData, GoogleFitMetaData, HourlyMetricSeries, HRVMetrics, SleepStageData
+)
 from app.repositories import CalendarRepository, UserRepository
-from app.models.mongodb.day import Day  # Ensure Day is defined appropriately
+from app.services.ml_service import MLService
+from app.models.mongodb.day import Day, DayTombstone  # Ensure Day is defined appropriately
+from app.utils.content_hash import content_hash
+from app.utils.fit_downsampling import day_start_ms, downsample_hourly, summarize_sleep
+from app.utils.hrv import hrv_metrics
+from app.utils.metrics import metrics
+from app.utils.schedule_conflicts import detect_conflicts
+from app.utils.schedule_optimizer import optimize_schedule
+logger = logging.getLogger(__name__)
 
 class CalendarService:
     """
@@ -43,6 +57,98 @@ class CalendarService:
         """
         return self.repo.get_day(user_id, date_str)
     
+    def get_session_bootstrap(self, user_id: str, today: str = None) -> dict:
+        """
+        Compact calendar state for a new session: today's and tomorrow's days plus a sync cursor.
+
+        Only these two days are read, so the login response does not grow with the
+        account's history; the rest is paged in through sync_days.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            today (str, optional): The client's current date in 'YYYY-MM-DD' format. Defaults to the server's.
+
+        Returns:
+            dict: {"today": day or None, "tomorrow": day or None, "sync_cursor": str}
+        """
+        try:
+            today_date = datetime.strptime(today, "%Y-%m-%d") if today else datetime.now()
+        except ValueError:
+            today_date = datetime.now()
+        dates = [today_date.strftime("%Y-%m-%d"), (today_date + timedelta(days=1)).strftime("%Y-%m-%d")]
+        days = self.repo.get_days(user_id, dates)
+        return {
+            "today": days[dates[0]].to_dict() if dates[0] in days else None,
+            "tomorrow": days[dates[1]].to_dict() if dates[1] in days else None,
+            # Start of the history: the first sync_days call pages in everything
+            "sync_cursor": self.encode_sync_cursor(None, "")
+        }
+
+    def sync_days(self, user_id: str, cursor: str = None, limit: int = None) -> dict:
+        """
+        Page through the days changed or removed after a sync cursor, oldest change first.
+
+        Last_modified is stamped by each writer before its write commits, so a write can
+        become visible after a cursor past its stamp was issued. The cursor returned with
+        the last page therefore never goes beyond SYNC_OVERLAP_SECONDS ago: changes that
+        recent are sent again on the next call, and clients apply them idempotently.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            cursor (str, optional): Cursor from the login bootstrap or a previous call; None starts over.
+            limit (int, optional): Changes per page. Defaults to SYNC_PAGE_SIZE.
+
+        Returns:
+            dict: {"days": [...], "deleted": [{"date", "deleted_at"}], "cursor": str, "has_more": bool};
+            keep the last cursor to fetch only later changes. A day whose Last_modified is
+            later than a deletion of its date was added again.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        limit = max(1, min(limit or current_app.config.get("SYNC_PAGE_SIZE", 50), 500))
+        modified_after, after_date = self.decode_sync_cursor(cursor)
+        changes = sorted(
+            [(day.Last_modified or datetime.min, day.date, day)
+             for day in self.repo.get_days_modified_after(user_id, modified_after, after_date, limit + 1)] +
+            [(tombstone.deleted_at, tombstone.date, tombstone)
+             for tombstone in self.repo.get_deleted_days_after(user_id, modified_after, after_date, limit + 1)],
+            key=lambda change: change[:2]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if changes:
+            stamp, date_str, _ = changes[-1]
+            settled = datetime.now() - timedelta(seconds=current_app.config.get("SYNC_OVERLAP_SECONDS", 10))
+            if has_more or stamp < settled:
+                cursor = self.encode_sync_cursor(stamp, date_str)
+            else:
+                # Caught up: re-read the recent window next time
+                cursor = self.encode_sync_cursor(settled, "")
+        return {
+            "days": [change.to_dict() for _, _, change in changes if isinstance(change, Day)],
+            "deleted": [change.to_dict() for _, _, change in changes if isinstance(change, DayTombstone)],
+            "cursor": cursor or self.encode_sync_cursor(None, ""),
+            "has_more": has_more
+        }
+
+    @staticmethod
+    def encode_sync_cursor(modified: datetime = None, date_str: str = "") -> str:
+        """Opaque cursor for the position (Last_modified, date); Mongo keeps milliseconds."""
+        stamp = modified.isoformat(timespec="milliseconds") if modified else ""
+        return base64.urlsafe_b64encode(f"{stamp}|{date_str or ''}".encode()).decode()
+
+    @staticmethod
+    def decode_sync_cursor(cursor: str = None) -> tuple:
+        """Inverse of encode_sync_cursor: (Last_modified or None, date)."""
+        if not cursor:
+            return None, ""
+        try:
+            stamp, date_str = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+            return (datetime.fromisoformat(stamp) if stamp else None), date_str
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Malformed sync cursor: {cursor}") from e
+
     def get_user_data_for_day(self, user_id: str, date_str: str) -> dict:
         """
         Retrieve user data for a specific day.
@@ -93,6 +199,46 @@ class CalendarService:
             list: A list containing the ML data for the specified day, or None if not found.
         """
         return self.repo.get_ml_data(user_id, date_str)
+
+    def get_ml_explanation_for_day(self, user_id: str, date_str: str, hour: int = None) -> dict:
+        """
+        Retrieve the stored per-feature contributions behind a day's predictions.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            date_str (str): The date in 'YYYY-MM-DD' format of the predicted day.
+            hour (int, optional): Only return the slot starting at this hour (0-23).
+
+        Returns:
+            dict: The compact explanation, a single slot's contributions, or None if not stored.
+        """
+        explanation = self.repo.get_ml_explanation(user_id, date_str)
+        if not explanation:
+            return None
+        if hour is None:
+            return explanation.to_dict()
+        return {"time_slot": f"{hour:02d}:00-{(hour+1):02d}:00", **explanation.for_slot(hour)}
+
+    def optimize_schedule_for_day(self, user_id: str, date_str: str, schedule: dict = None) -> dict:
+        """
+        Arrange a day's tasks around the stored CP/PE predictions for that day.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            date_str (str): The date in 'YYYY-MM-DD' format.
+            schedule (dict, optional): A schedule to arrange instead of the stored one.
+
+        Returns:
+            dict: The arranged schedule, or None if there is no schedule or no MLData.
+        """
+        day = self.repo.get_day_document(user_id, date_str)
+        if not day:
+            return None
+        schedule = schedule or day.schedule
+        ml_data = day.UserData.get_ml_data() if day.UserData else None
+        if not schedule or not ml_data:
+            return None
+        return optimize_schedule(schedule, ml_data)
     
     
     
@@ -100,6 +246,24 @@ class CalendarService:
     # Setter Methods
     #--------------------------------
     
+    def is_duplicate_upload(self, user_id: str, date_str: str, kind: str, digest: str) -> bool:
+        """
+        Whether an upload repeats content already stored for the day (retries, reconnections).
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            date_str (str): The date in 'YYYY-MM-DD' format.
+            kind (str): 'schedule' or 'google_fit'.
+            digest (str): content_hash of the uploaded payload.
+
+        Returns:
+            bool: True if the write can be skipped (counted as uploads.<kind>.skipped).
+        """
+        if not self.repo.has_content_hash(user_id, date_str, f"{kind}_hash", digest):
+            return False
+        metrics.incr(f"uploads.{kind}.skipped")
+        return True
+
     def add_or_update_day_schedule(self, user_id: str, day: Day) -> bool:
         """
         Add or update a specific day in the user's calendar.
@@ -112,31 +276,126 @@ class CalendarService:
             bool: True if the operation is successful; otherwise, False.
         """
         try:
-            self.repo.update_day_schedule(user_id, day)
+            if not self.repo.update_day_schedule(user_id, day):
+                return False
+            metrics.incr("uploads.schedule.written")
             return True
         except Exception as e:
             print(f"Error adding/updating day schedule: {e}")
             return False
 
     def update_google_fit_data(self, user_id, fit_json,date_str) -> bool:
+        """
+        Store a day's Google Fit data and queue the next day's prediction.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            fit_json (dict): Hourly metrics, sleep, hrv and 'last_updated' as sent by the phone;
+                with 'rr_intervals' (ms) or 'beats' (timestamps) hrv is computed on the server.
+            date_str (str): The date in 'YYYY-MM-DD' format the data belongs to.
+
+        Returns:
+            bool: True if the data was stored or is already stored; otherwise, False.
+        """
+        digest = content_hash(fit_json)
+        if self.is_duplicate_upload(user_id, date_str, "google_fit", digest):
+            return True
         fit_doc = GoogleFitData(
             meta_data=GoogleFitMetaData(
                 user_id=user_id,
                 collected_at=datetime.fromisoformat(fit_json['last_updated']),
             ),
-            hourly_metrics=[
-                HourlyMetric(
-                    hour_range=m['hour_range'],
-                    steps=m['steps'],
-                    heart_rate=m['heart_rate'],
-                    time_features=TimeFeatures(**m['time_features'])
-                ) for m in fit_json['hourly_metrics']
-            ],
+            # sin/cos time features are derived from the hour when read, so they are not stored
+            hourly=HourlyMetricSeries.from_metrics(fit_json['hourly_metrics']),
             sleep=SleepStageData(**fit_json['sleep']),
             hrv=fit_json.get('hrv', 0.0),
             last_updated=datetime.fromisoformat(fit_json['last_updated'])
         )
-        return self.repo.update_google_fit_data(user_id, date_str, fit_doc.to_dict())
+        self._apply_hrv(fit_doc, fit_json)
+        return self._store_google_fit_data(user_id, date_str, fit_doc, digest)
+
+    def ingest_raw_google_fit(self, user_id, raw_json, date_str) -> dict:
+        """
+        Downsample a day's raw Google Fit samples on the server and store them.
+
+        Steps are summed and heart rate averaged into the day's 24 hourly buckets,
+        sleep segments are reduced to hours per stage (see app.utils.fit_downsampling)
+        and HRV is computed from the beat stream (see app.utils.hrv).
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            raw_json (dict): 'steps', 'heart_rate' and 'sleep' samples, 'rr_intervals' (ms) or
+                'beats' (timestamps), optional 'tz_offset_minutes' (local UTC offset of the
+                day) and 'last_updated'.
+            date_str (str): The date in 'YYYY-MM-DD' format the data belongs to.
+
+        Returns:
+            dict: Sample counts, the hourly summary, sleep totals and HRV metrics ({"duplicate": True}
+            if the same payload is already stored), or None if storing failed.
+        """
+        digest = content_hash(raw_json)
+        if self.is_duplicate_upload(user_id, date_str, "google_fit", digest):
+            return {"duplicate": True}
+        started = time.perf_counter()
+        start_ms = day_start_ms(date_str, raw_json.get('tz_offset_minutes', 0))
+        hourly = downsample_hourly(raw_json.get('steps'), raw_json.get('heart_rate'), start_ms)
+        sleep = summarize_sleep(raw_json.get('sleep'))
+        metrics.observe("google_fit.downsample_seconds", time.perf_counter() - started)
+
+        last_updated = datetime.fromisoformat(raw_json['last_updated']) if raw_json.get('last_updated') else datetime.now()
+        fit_doc = GoogleFitData(
+            meta_data=GoogleFitMetaData(user_id=user_id, collected_at=last_updated),
+            hourly=HourlyMetricSeries.from_values(hourly),
+            sleep=SleepStageData(**sleep),
+            hrv=raw_json.get('hrv', 0.0),
+            last_updated=last_updated
+        )
+        self._apply_hrv(fit_doc, raw_json)
+        if not self._store_google_fit_data(user_id, date_str, fit_doc, digest):
+            return None
+        return {
+            "samples": {
+                name: len(raw_json.get(name) or []) for name in ("steps", "heart_rate", "sleep", "rr_intervals", "beats")
+            },
+            "hourly": fit_doc.hourly.to_dict(),
+            "sleep": sleep,
+            "hrv": fit_doc.hrv_metrics.to_dict() if fit_doc.hrv_metrics else None
+        }
+
+    @staticmethod
+    def _apply_hrv(fit_doc, payload: dict):
+        """Replace the client-supplied hrv with metrics computed from raw RR intervals / beats, if sent."""
+        if not payload.get('rr_intervals') and not payload.get('beats'):
+            return
+        started = time.perf_counter()
+        result = hrv_metrics(payload.get('rr_intervals'), payload.get('beats'))
+        metrics.observe("google_fit.hrv_seconds", time.perf_counter() - started)
+        if result:
+            fit_doc.hrv = result["rmssd"]
+            fit_doc.hrv_metrics = HRVMetrics(**result)
+
+    def _store_google_fit_data(self, user_id, date_str, fit_doc, digest: str = None) -> bool:
+        if not self.repo.update_google_fit_data(user_id, date_str, fit_doc, digest):
+            return False
+        metrics.incr("uploads.google_fit.written")
+        # Predictions for the next day are prepared in the background
+        MLService().enqueue_next_day_prediction(user_id, date_str)
+        return True
+
+    def update_task(self, user_id: str, date_str: str, old_task: dict = None, new_task: dict = None) -> dict:
+        """
+        Add, edit or remove a single task, updating the day's slot aggregates incrementally.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            date_str (str): The date in 'YYYY-MM-DD' format.
+            old_task (dict, optional): The task as currently stored (None to add a task).
+            new_task (dict, optional): The task after the edit (None to remove the task).
+
+        Returns:
+            dict: The stored task and the slots that changed, or None if the update failed.
+        """
+        return self.repo.update_task(user_id, date_str, old_task, new_task)
 
     def update_ml_data(self, user_id: str, date_str: str, ml_data: list) -> bool:
         """
@@ -173,20 +432,69 @@ class CalendarService:
     #--------------------------------
     # Processes Methods
     #--------------------------------
-    def state_schedule_data_for_all_users(self, date_str: str) -> bool:
+    def materialize_schedule_data(self, date_str: str = None, force: bool = False) -> dict:
+        """
+        Compute ScheduleData and AggregatedTaskData for the pending days of all users in one pass.
+
+        Args:
+            date_str (str, optional): Only this date ('YYYY-MM-DD'); every pending day if None.
+            force (bool, optional): Recompute days that are already materialized.
+
+        Returns:
+            dict: Run report with the number of days, modified days and elapsed seconds.
+        """
+        report = self.repo.materialize_schedule_data(
+            date_str=date_str,
+            force=force,
+            batch_size=current_app.config.get("SCHEDULE_MATERIALIZE_BATCH_SIZE", 500),
+            write_batch_size=current_app.config.get("BULK_WRITE_BATCH_SIZE", 1000)
+        )
+        metrics.incr("schedule_materializer.days", report["days"])
+        metrics.observe("schedule_materializer.run_seconds", report["seconds"])
+        logger.info(f"Materialized schedule data: {report}")
+        return report
+
+    def detect_conflicts_for_all_users(self, date_str: str = None, max_reported: int = 100) -> dict:
+        """
+        Scan stored schedules for overlapping tasks, deadline violations and tasks outside start/end.
+
+        Only each day's schedule is streamed from MongoDB (see CalendarRepository.iter_schedule_days).
+
+        Args:
+            date_str (str, optional): Only scan this date ('YYYY-MM-DD'); every day if None.
+            max_reported (int, optional): Days with conflicts included in full in the report. Defaults to 100.
+
+        Returns:
+            dict: {"days": ..., "days_with_conflicts": ..., "by_type": {...}, "conflicts": [{"user_id", "date", "conflicts"}]}
+        """
+        report = {"days": 0, "days_with_conflicts": 0, "by_type": {}, "conflicts": []}
+        for user_id, day_date, schedule in self.repo.iter_schedule_days(date_str, force=True):
+            report["days"] += 1
+            conflicts = detect_conflicts(schedule)
+            if not conflicts:
+                continue
+            report["days_with_conflicts"] += 1
+            for conflict in conflicts:
+                report["by_type"][conflict["type"]] = report["by_type"].get(conflict["type"], 0) + 1
+            if len(report["conflicts"]) < max_reported:
+                report["conflicts"].append({"user_id": user_id, "date": day_date, "conflicts": conflicts})
+        metrics.incr("schedule_conflicts.days_scanned", report["days"])
+        metrics.incr("schedule_conflicts.days_with_conflicts", report["days_with_conflicts"])
+        return report
+
+    def state_schedule_data_for_all_users(self, date_str: str, force: bool = False) -> bool:
         """
         State the schedule data for all users.
 
         Args:
             date_str (str): The date in 'YYYY-MM-DD' format for which to state the schedule data.
+            force (bool, optional): Recompute days that are already materialized.
 
         Returns:
             bool: True if the operation is successful; otherwise, False.
         """
         try:
-            user_ids = self.user_repo.get_all_users_id()
-            for user_id in user_ids:
-                self.repo.state_schedule_data(user_id, date_str)
+            self.materialize_schedule_data(date_str, force=force)
             return True
         except Exception as e:
             print(f"Error stating schedule data for all users: {e}")
@@ -200,9 +508,7 @@ class CalendarService:
             bool: True if the operation is successful; otherwise, False.
         """
         try:
-            user_ids = self.user_repo.get_all_users_id()
-            for user_id in user_ids:
-                self.repo.state_all_schedule_data(user_id)
+            self.materialize_schedule_data()
             return True
         except Exception as e:
             print(f"Error stating all schedule data: {e}")
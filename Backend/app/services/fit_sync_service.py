@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from itertools import islice
+import requests
+from flask import current_app
+from app.models.mongodb.user_data import GoogleFitData, GoogleFitMetaData, HourlyMetricSeries, SleepStageData
+from app.repositories import CalendarRepository, UserRepository
+from app.utils.fit_downsampling import MS_PER_HOUR, day_start_ms, downsample_hourly, summarize_sleep
+from app.utils.google_auth import GoogleOAuthError, get_oauth_client
+from app.utils.metrics import metrics
+from app.utils.rate_limiter import AsyncRateLimiter
+logger = logging.getLogger(__name__)
+
+# Sleep that belongs to a day is looked for from 18:00 the evening before until noon
+SLEEP_WINDOW_HOURS = (-6, 12)
+_ACTIVITY_TYPES = ("com.google.step_count.delta", "com.google.heart_rate.bpm")
+_SLEEP_TYPE = "com.google.sleep.segment"
+# GoogleFitData fields the sync owns; hrv/hrv_metrics come from the phone or raw RR uploads
+_SYNCED_FIELDS = ("meta_data", "hourly", "sleep", "last_updated")
+
+
+class FitSyncError(Exception):
+    """A user's Fit data could not be fetched; `reason` is reported in the run summary."""
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+
+class FitSyncService:
+    """
+    Pulls Google Fit aggregates for every linked user and stores them.
+
+    Users are fetched concurrently on an asyncio event loop: a semaphore bounds the
+    users in flight, each user's requests go through its own rate limiter, expired
+    access tokens are refreshed once per user, and 429/5xx answers are retried with
+    backoff. The blocking HTTP calls run on a thread pool over the shared pooled
+    Google session. Results are written to MongoDB with chunked bulk_write and the
+    refreshed access tokens to MySQL in one commit.
+    """
+    def __init__(self, concurrency: int = None, user_rate: float = None, batch_size: int = None,
+                 write_batch_size: int = None):
+        """
+        Args:
+            concurrency (int, optional): Users fetched at once. Defaults to FIT_SYNC_CONCURRENCY.
+            user_rate (float, optional): Fit API requests per second per user. Defaults to FIT_SYNC_USER_RATE.
+            batch_size (int, optional): Users read, fetched and written per batch. Defaults to FIT_SYNC_BATCH_SIZE.
+            write_batch_size (int, optional): Operations per bulk_write. Defaults to BULK_WRITE_BATCH_SIZE.
+        """
+        config = current_app.config
+        self.user_repo = UserRepository()
+        self.calendar_repo = CalendarRepository()
+        self.oauth = get_oauth_client(config)
+        self.session = self.oauth.session
+        self.api_url = config.get("GOOGLE_FIT_API_URL").rstrip("/")
+        self.client_id = config.get("OAUTH_CLIENT_ID")
+        self.client_secret = config.get("OAUTH_CLIENT_SECRET")
+        self.timeout = config.get("GOOGLE_HTTP_TIMEOUT", 5.0)
+        self.retries = config.get("GOOGLE_HTTP_RETRIES", 2)
+        self.backoff = config.get("GOOGLE_HTTP_BACKOFF", 0.2)
+        self.concurrency = max(1, concurrency or config.get("FIT_SYNC_CONCURRENCY", 16))
+        self.user_rate = config.get("FIT_SYNC_USER_RATE", 2.0) if user_rate is None else user_rate
+        self.batch_size = batch_size or config.get("FIT_SYNC_BATCH_SIZE", 500)
+        self.write_batch_size = write_batch_size or config.get("BULK_WRITE_BATCH_SIZE", 1000)
+        self.tz_offset_minutes = config.get("FIT_SYNC_TZ_OFFSET_MINUTES", 0)
+
+    def run(self, date_str: str = None, tz_offset_minutes: int = None) -> dict:
+        """
+        Sync Fit data for all users with a linked Google account.
+
+        Without a date, yesterday and today (local days) are synced, so the hours of
+        yesterday after the last hourly run are not lost.
+
+        Args:
+            date_str (str, optional): The day in 'YYYY-MM-DD' format. Defaults to yesterday and today.
+            tz_offset_minutes (int, optional): UTC offset of the day boundaries. Defaults to
+                FIT_SYNC_TZ_OFFSET_MINUTES.
+
+        Returns:
+            dict: Run report with user counts per outcome, written days, refreshed
+                  tokens and elapsed seconds.
+        """
+        if tz_offset_minutes is None:
+            tz_offset_minutes = self.tz_offset_minutes
+        if date_str:
+            dates = [date_str]
+        else:
+            today = datetime.now(timezone(timedelta(minutes=tz_offset_minutes))).date()
+            dates = [(today - timedelta(days=1)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")]
+        started = time.perf_counter()
+        users, written, refreshed_count, outcomes = 0, 0, 0, {}
+        # Users are streamed from MySQL and synced batch by batch, so memory stays flat
+        stream = self.user_repo.iter_google_fit_tokens(batch_size=self.batch_size)
+        while True:
+            batch = list(islice(stream, self.batch_size))
+            if not batch:
+                break
+            users += len(batch)
+            results = asyncio.run(self._sync_all(batch, dates, tz_offset_minutes))
+
+            day_operations, refreshed = [], {}
+            for user_id, fit_docs, access_token, outcome in results:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                if access_token:
+                    refreshed[user_id] = access_token
+                for day, fit_doc in fit_docs.items():
+                    fields = fit_doc.to_mongo().to_dict()
+                    # Only the synced fields are replaced, so the stored HRV survives; the phone's
+                    # next upload of its own payload must not be skipped as a duplicate
+                    day_operations.append(self.calendar_repo._day_update_ops(
+                        user_id, day, {f"GoogleFitData.{field}": fields.get(field) for field in _SYNCED_FIELDS},
+                        {"google_fit_hash": None}, containers=("GoogleFitData",)
+                    ))
+            if day_operations:
+                written += self.calendar_repo.bulk_write_days(day_operations, batch_size=self.write_batch_size)
+            refreshed_count += self.user_repo.save_access_tokens(refreshed)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            "dates": dates,
+            "users": users,
+            "outcomes": outcomes,
+            "modified_days": written,
+            "refreshed_tokens": refreshed_count,
+            "seconds": round(elapsed, 3),
+            "users_per_second": round(users / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        for outcome, count in outcomes.items():
+            metrics.incr(f"fit_sync.{outcome}", count)
+        metrics.observe("fit_sync.run_seconds", elapsed)
+        logger.info(f"Fit sync {', '.join(dates)}: {users} users in {report['seconds']} s, {outcomes}")
+        return report
+
+    async def _sync_all(self, users: list, dates: list, tz_offset_minutes: int) -> list:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="fit-sync") as executor:
+            return await asyncio.gather(*(
+                self._sync_user(semaphore, executor, user, dates, tz_offset_minutes) for user in users
+            ))
+
+    async def _sync_user(self, semaphore, executor, user: tuple, dates: list, tz_offset_minutes: int) -> tuple:
+        """(user_id, {date: GoogleFitData}, refreshed access token or None, outcome)"""
+        user_id, access_token, refresh_token = user
+        state = {"access_token": access_token, "refresh_token": refresh_token, "refreshed": None}
+        limiter = AsyncRateLimiter(self.user_rate)
+        fit_docs = {}
+        async with semaphore:
+            try:
+                for date_str in dates:
+                    start_ms = day_start_ms(date_str, tz_offset_minutes)
+                    activity = await self._aggregate(executor, limiter, state, {
+                        "aggregateBy": [{"dataTypeName": name} for name in _ACTIVITY_TYPES],
+                        "bucketByTime": {"durationMillis": MS_PER_HOUR},
+                        "startTimeMillis": start_ms,
+                        "endTimeMillis": start_ms + 24 * MS_PER_HOUR
+                    })
+                    sleep = await self._aggregate(executor, limiter, state, {
+                        "aggregateBy": [{"dataTypeName": _SLEEP_TYPE}],
+                        "startTimeMillis": start_ms + SLEEP_WINDOW_HOURS[0] * MS_PER_HOUR,
+                        "endTimeMillis": start_ms + SLEEP_WINDOW_HOURS[1] * MS_PER_HOUR
+                    })
+                    fit_docs[date_str] = self._fit_doc(user_id, activity, sleep, start_ms)
+            except FitSyncError as e:
+                logger.warning(f"Fit sync failed for {user_id}: {e}")
+                # Days fetched before the failure are still stored
+                return user_id, fit_docs, state["refreshed"], e.reason
+        return user_id, fit_docs, state["refreshed"], "synced"
+
+    async def _aggregate(self, executor, limiter: AsyncRateLimiter, state: dict, body: dict) -> dict:
+        """POST one dataset:aggregate request, refreshing the access token once on 401."""
+        loop = asyncio.get_running_loop()
+        if not state["access_token"]:
+            await self._refresh(state)
+        attempt = 0
+        while True:
+            await limiter.acquire()
+            try:
+                response = await loop.run_in_executor(executor, partial(
+                    self.session.post, f"{self.api_url}/dataset:aggregate", json=body,
+                    headers={"Authorization": f"Bearer {state['access_token']}"}, timeout=self.timeout
+                ))
+            except requests.RequestException as e:
+                raise FitSyncError("network_error", str(e))
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code == 401 and state["refreshed"] is None and state["refresh_token"]:
+                await self._refresh(state)
+                continue
+            if response.status_code in (429, 500, 502, 503, 504) and attempt < self.retries:
+                # The aggregate read is idempotent, so unlike the token exchange it can be retried
+                retry_after = response.headers.get("Retry-After", "")
+                await asyncio.sleep(float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt)
+                attempt += 1
+                continue
+            raise FitSyncError("unauthorized" if response.status_code in (401, 403) else "api_error",
+                               f"HTTP {response.status_code}")
+
+    async def _refresh(self, state: dict) -> None:
+        if not state["refresh_token"]:
+            raise FitSyncError("unauthorized", "no refresh token")
+        try:
+            tokens = await self.oauth.refresh_async(state["refresh_token"], self.client_id, self.client_secret)
+        except GoogleOAuthError as e:
+            # invalid_grant: the user revoked access; they have to link Google again
+            raise FitSyncError("revoked" if e.error.get("error") == "invalid_grant" else "api_error", str(e))
+        except requests.RequestException as e:
+            raise FitSyncError("network_error", str(e))
+        state["access_token"] = state["refreshed"] = tokens["access_token"]
+
+    @staticmethod
+    def _fit_doc(user_id: str, activity: dict, sleep: dict, start_ms: int) -> GoogleFitData:
+        """Reduce aggregate responses to the stored GoogleFitData (hourly metrics + sleep)."""
+        steps, heart_rate, segments = [], [], []
+        for response in (activity, sleep):
+            for bucket in response.get("bucket", []):
+                for dataset in bucket.get("dataset", []):
+                    for point in dataset.get("point", []):
+                        data_type = point.get("dataTypeName") or dataset.get("dataSourceId", "")
+                        if "step_count" in data_type:
+                            steps.append(point)
+                        elif "heart_rate" in data_type:
+                            heart_rate.append(point)  # summary value[0] is the bucket average
+                        elif "sleep.segment" in data_type:
+                            segments.append(point)
+        now = datetime.now()
+        return GoogleFitData(
+            meta_data=GoogleFitMetaData(user_id=user_id, collected_at=now),
+            hourly=HourlyMetricSeries.from_values(downsample_hourly(steps, heart_rate, start_ms)),
+            sleep=SleepStageData(**summarize_sleep(segments)),
+            last_updated=now
+        )
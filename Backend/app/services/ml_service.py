@@ -1,13 +1,28 @@
 from datetime import datetime, timedelta
 import logging
+import numpy as np
+from apscheduler.jobstores.base import ConflictingIdError
+from flask import current_app
 import app.repositories.ML_dataPipeline as MLDataPipelineModule
-from app.repositories import UserRepository, CalendarRepository
+from app.extensions import scheduler
+from app.models.mongodb.user_data import MLPredictionSeries
+from app.repositories import UserRepository, CalendarRepository, PredictionCacheRepository
+from app.services.batch_prediction_service import BatchPredictionService
+from app.utils.metrics import metrics
 logger = logging.getLogger(__name__)
 
+
+def _run_next_day_prediction(app, user_id, date_str):
+    """Scheduler entry point: predict the day after `date_str` for one user."""
+    with app.app_context():
+        metrics.incr("prediction_jobs.run")
+        MLService().generate_predictions(user_id, date_str)
+
 class MLService:
     def __init__(self):
         self.calendar_repo = CalendarRepository()
         self.user_repo = UserRepository()
+        self.prediction_cache = PredictionCacheRepository()
         # instantiate pipeline module (global + private support)
         self.pipeline = MLDataPipelineModule.MLDataPipeline()
 
@@ -42,30 +57,107 @@ class MLService:
             logger.error(f"Global retraining failed: {e}")
             return False
 
-    def generate_predictions(self, user_id):
-        """Generate and store next day's predictions using global+private models"""
+    def generate_predictions(self, user_id, date_str=None):
+        """Generate and store next day's predictions using global+private models
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            date_str (str, optional): Source day in 'YYYY-MM-DD' format; predictions are
+                stored on the following day. Defaults to yesterday (predicting today).
+        """
         try:
-            yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-            current_day = self.calendar_repo.get_UserData(user_id, yesterday)
+            source = date_str or (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+            target = (datetime.strptime(source, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+            day = self.calendar_repo.get_day_document(user_id, source)
+            current_day = day.UserData if day else None
             if not current_day or not getattr(current_day, 'GoogleFitData', None):
-                logger.error(f"No data for user {user_id} on {yesterday}")
+                logger.error(f"No data for user {user_id} on {source}")
                 return False
 
+            # Same inputs + same models -> the predictions already stored are still valid
+            fingerprint = self.pipeline.input_fingerprint(current_day)
+            model_version = self.pipeline.model_version(user_id)
+            cached = self.prediction_cache.get(user_id, target, fingerprint, model_version)
+            if cached is not None:
+                if self._stored_predictions_match(user_id, target, cached):
+                    logger.info(f"Prediction cache hit for {user_id} on {target}")
+                    return True
+                # The day was re-created or its predictions unset/overwritten: store the cached ones again
+                metrics.incr("prediction_cache.rewritten")
+                return self.calendar_repo.update_ml_predictions(user_id, target, cached)
+
             # predict using both global and private
             predictions = self.pipeline.predict_next_day(current_day, user_id=user_id)
             if not predictions:
                 return False
 
-            today = datetime.now().strftime("%Y-%m-%d")
-            success = self.calendar_repo.update_ml_predictions(user_id, today, predictions)
+            success = self.calendar_repo.update_ml_predictions(user_id, target, predictions)
             if success:
-                logger.info(f"Predictions stored for {user_id} on {today}")
+                self.prediction_cache.set(user_id, target, fingerprint, model_version, predictions)
+                logger.info(f"Predictions stored for {user_id} on {target}")
                 return True
             return False
         except Exception as e:
             logger.error(f"Prediction generation failed for {user_id}: {e}")
             return False
 
+    def _stored_predictions_match(self, user_id, date_str, predictions) -> bool:
+        """True if the stored day `date_str` still holds `predictions` (within float32 storage precision)."""
+        day = self.calendar_repo.get_day_document(user_id, date_str)
+        user_data = day.UserData if day else None
+        if not user_data or not (user_data.MLPredictions or user_data.MLData):
+            return False
+        expected = MLPredictionSeries.from_predictions(predictions, packed=False).values()
+        return bool(np.allclose(user_data.ml_values(), expected, rtol=1e-5, atol=1e-6))
+
+    def enqueue_next_day_prediction(self, user_id, date_str) -> bool:
+        """
+        Schedule a lightweight next-day prediction after new data for `date_str` arrives.
+
+        Jobs are keyed per user and source day. Further uploads for a day that already
+        has a pending job join it (the job reads the day when it runs) and leave its
+        run time alone, so steady uploads cannot postpone it; uploads for other days
+        get their own jobs.
+
+        Web workers run without a scheduler (see SCHEDULER_ENABLED). There the
+        prediction is skipped rather than run inside the upload request; the nightly
+        batch prediction covers the day.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            date_str (str): The day that just received data, in 'YYYY-MM-DD' format.
+
+        Returns:
+            bool: True if the job was scheduled or already pending, False otherwise.
+        """
+        app = current_app._get_current_object()
+        if not scheduler.running:
+            # No background worker in this process; the nightly batch predicts the day
+            metrics.incr("prediction_jobs.skipped")
+            return False
+        try:
+            job_id = f"predict-next-day:{user_id}:{date_str}"
+            if scheduler.get_job(job_id):
+                metrics.incr("prediction_jobs.coalesced")
+                return True
+            delay = app.config.get("PREDICTION_JOB_DELAY_SECONDS", 30)
+            scheduler.add_job(
+                _run_next_day_prediction,
+                trigger="date",
+                run_date=datetime.now() + timedelta(seconds=delay),
+                args=[app, user_id, date_str],
+                id=job_id
+            )
+            metrics.incr("prediction_jobs.enqueued")
+            return True
+        except ConflictingIdError:
+            # Another upload scheduled the same job in the meantime
+            metrics.incr("prediction_jobs.coalesced")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to enqueue prediction for {user_id}: {e}")
+            return False
+
     def full_cycle_for_user(self, user_id):
         """Perform full cycle: global+private retrain then predict for a specific user"""
         # Retrain global model every time
@@ -76,12 +168,12 @@ class MLService:
         return self.generate_predictions(user_id)
 
     def full_cycle_global_and_all(self):
-        """Perform global retrain then private retrain for all users and predictions"""
+        """Perform global retrain then private retrain for all users and batched predictions"""
         results = {}
         if not self.daily_retrain_global():
             return results
-        user_ids = self.user_repo.get_all_users_id()
-        for uid in user_ids:
+        for uid in self.user_repo.iter_user_ids():
             self.pipeline.train_private(uid)
-            results[uid] = self.generate_predictions(uid)
-        return results
+        # Predict today from yesterday's data for everyone in bulk
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        return BatchPredictionService().run(yesterday)
@@ -0,0 +1,134 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from flask import current_app
+from pymongo import UpdateOne
+from app.models.mongodb.schedule import Schedule, Task
+from app.repositories import CalendarRepository, JobCheckpointRepository
+from app.utils.metrics import metrics
+from app.utils.schedule_optimizer import optimize_schedules_chunk
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "schedule-suggestions"
+
+class ScheduleSuggestionService:
+    """
+    Nightly schedule suggestions: runs the schedule optimizer for every user that has
+    tasks and predictions for the target day, across worker processes, and stores the
+    result on the Day as `suggested_schedule` with chunked bulk writes.
+
+    Users are processed in user_id order and a checkpoint is written after every
+    batch, so a crashed run resumes after the last batch that was stored.
+    """
+    def __init__(self, batch_size: int = None, workers: int = None, write_batch_size: int = None):
+        """
+        Args:
+            batch_size (int, optional): Users per checkpointed batch. Defaults to SUGGESTION_BATCH_SIZE.
+            workers (int, optional): Optimizer processes (1 = in-process). Defaults to SUGGESTION_WORKERS.
+            write_batch_size (int, optional): Operations per bulk_write. Defaults to BULK_WRITE_BATCH_SIZE.
+        """
+        self.calendar_repo = CalendarRepository()
+        self.checkpoints = JobCheckpointRepository()
+        self.batch_size = batch_size or current_app.config.get("SUGGESTION_BATCH_SIZE", 200)
+        self.workers = max(1, workers or current_app.config.get("SUGGESTION_WORKERS", 1))
+        self.write_batch_size = write_batch_size or current_app.config.get("BULK_WRITE_BATCH_SIZE", 1000)
+
+    @staticmethod
+    def _work_item(user_id, day):
+        schedule = day.schedule.to_dict() if day.schedule and day.schedule.tasks else None
+        ml_data = [m.to_dict() for m in day.UserData.get_ml_data()] if day.UserData else None
+        return (user_id, schedule, ml_data) if schedule and ml_data else None
+
+    def _optimize(self, pool, items: list) -> list:
+        if pool is None:
+            return optimize_schedules_chunk(items)
+        chunk_size = -(-len(items) // self.workers)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        return [result for chunk in pool.map(optimize_schedules_chunk, chunks) for result in chunk]
+
+    @staticmethod
+    def _update_op(user_id: str, date_str: str, arranged: dict) -> UpdateOne:
+        suggested = Schedule(
+            start=arranged["start"],
+            end=arranged["end"],
+            done=arranged["done"],
+            exhaustion=arranged["exhaustion"],
+            daily_score=arranged["daily_score"],
+            tasks=[Task(**task) for task in arranged["tasks"]]
+        )
+        return UpdateOne(
+            {"user_id": user_id, "days.date": date_str},
+            {"$set": {"days.$.suggested_schedule": suggested.to_mongo().to_dict(), "days.$.Last_modified": datetime.now()}}
+        )
+
+    def run(self, date_str: str = None, resume: bool = True) -> dict:
+        """
+        Store suggested schedules for `date_str` for all users.
+
+        Args:
+            date_str (str, optional): Target day in 'YYYY-MM-DD' format. Defaults to tomorrow.
+            resume (bool, optional): Continue an unfinished run of the same day. Defaults to True.
+
+        Returns:
+            dict: Run report with user counts, per-user timing and elapsed seconds.
+        """
+        target = date_str or (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        checkpoint = self.checkpoints.get(JOB_NAME, target) if resume else None
+        if checkpoint and checkpoint.status == "running":
+            after_user_id, processed = checkpoint.last_user_id, checkpoint.processed or 0
+        else:
+            self.checkpoints.start(JOB_NAME, target)
+            after_user_id, processed = None, 0
+        resumed_from = after_user_id
+
+        started = time.perf_counter()
+        users, written, user_seconds = 0, 0, []
+        stream = self.calendar_repo.iter_days(target, batch_size=self.batch_size, after_user_id=after_user_id)
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                batch = list(islice(stream, self.batch_size))
+                if not batch:
+                    break
+                items = [item for item in (self._work_item(user_id, day) for user_id, day in batch) if item]
+                operations = []
+                for user_id, arranged, seconds in self._optimize(pool, items) if items else []:
+                    operations.append(self._update_op(user_id, target, arranged))
+                    user_seconds.append((seconds, user_id))
+                    metrics.observe("schedule_suggestions.user_seconds", seconds)
+                written += self.calendar_repo.bulk_write(operations, batch_size=self.write_batch_size)
+                users += len(items)
+                processed += len(batch)
+                # Everything up to the last streamed user is stored: a restart continues after it
+                self.checkpoints.advance(JOB_NAME, target, batch[-1][0], processed)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.checkpoints.finish(JOB_NAME, target)
+
+        elapsed = time.perf_counter() - started
+        timings = sorted(seconds for seconds, _ in user_seconds)
+        report = {
+            "target_date": target,
+            "resumed_after": resumed_from,
+            "users": users,
+            "modified_documents": written,
+            "seconds": round(elapsed, 3),
+            "user_seconds": {
+                "mean": round(sum(timings) / len(timings), 6) if timings else 0.0,
+                "p95": round(timings[int(0.95 * (len(timings) - 1))], 6) if timings else 0.0,
+                "max": round(timings[-1], 6) if timings else 0.0
+            },
+            "slowest_users": [
+                {"user_id": user_id, "seconds": round(seconds, 6)}
+                for seconds, user_id in sorted(user_seconds, reverse=True)[:5]
+            ]
+        }
+        metrics.observe("schedule_suggestions.run_seconds", elapsed)
+        metrics.incr("schedule_suggestions.users", users)
+        logger.info(f"Schedule suggestions for {target}: {users} users in {report['seconds']}s")
+        return report
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from app.config import Config
+from app.repositories import RefreshTokenRepository
+from app.utils.bloom_filter import BloomFilter
+from app.utils.metrics import metrics
+logger = logging.getLogger(__name__)
+
+# Revocations committed by other processes are picked up within this window of overlap
+_SYNC_OVERLAP = timedelta(seconds=10)
+
+
+class RevokedTokenSet:
+    """
+    In-memory view of the revoked refresh-token JTIs.
+
+    A Bloom filter answers the common case (token not revoked) with a few bit
+    lookups; only its positives are confirmed against the exact set. Revocations
+    made by other processes are pulled from the refresh_tokens table at most every
+    `sync_seconds`, and the structure is rebuilt from the table once the filter
+    holds more entries than it was sized for.
+    """
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._exact = {}  # jti -> expires_at
+        self._synced_at = None  # monotonic time of the last sync
+        self._revoked_until = None  # latest revoked_at seen in the table
+
+    def add(self, jti: str, expires_at: datetime, revoked_at: datetime = None) -> None:
+        with self._lock:
+            self._add(jti, expires_at, revoked_at)
+
+    def _add(self, jti, expires_at, revoked_at):
+        if jti not in self._exact:
+            self._bloom.add(jti)
+        self._exact[jti] = expires_at
+        if revoked_at and (self._revoked_until is None or revoked_at > self._revoked_until):
+            self._revoked_until = revoked_at
+
+    def _sync(self, repo: RefreshTokenRepository) -> None:
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < self.sync_seconds:
+            return
+        if self._bloom.count > self.capacity:
+            self._reset()
+            metrics.incr("token_revocations.rebuilds")
+        since = self._revoked_until - _SYNC_OVERLAP if self._revoked_until else None
+        for jti, expires_at, revoked_at in repo.revoked_since(since):
+            self._add(jti, expires_at, revoked_at)
+        self._synced_at = now
+        metrics.set_gauge("token_revocations.size", len(self._exact))
+
+    def contains(self, jti: str, repo: RefreshTokenRepository) -> bool:
+        with self._lock:
+            try:
+                self._sync(repo)
+            except Exception as e:
+                # Keep answering from the last known state; the next check retries
+                logger.error(f"Revoked token sync failed: {e}")
+            if jti not in self._bloom:
+                return False
+            metrics.incr("token_revocations.bloom_positives")
+            return jti in self._exact
+
+
+# Shared by every request in this process
+_revoked = RevokedTokenSet(
+    Config.TOKEN_REVOCATION_CAPACITY, Config.TOKEN_REVOCATION_ERROR_RATE, Config.TOKEN_REVOCATION_SYNC_SECONDS
+)
+
+
+class TokenService:
+    """
+    Issues the app's JWTs and tracks refresh tokens for rotation, logout and revoke-all.
+    """
+    def __init__(self):
+        self.repo = RefreshTokenRepository()
+        self.revoked = _revoked
+
+    @staticmethod
+    def _claims(token: str) -> tuple:
+        claims = decode_token(token)
+        return claims["jti"], claims["sub"], datetime.fromtimestamp(claims["exp"])
+
+    def issue_tokens(self, user_id: str) -> tuple:
+        """
+        Create an access/refresh token pair and record the refresh token.
+
+        Returns:
+            tuple: (access_token, refresh_token)
+        """
+        access_token = create_access_token(identity=user_id)
+        refresh_token = create_refresh_token(identity=user_id)
+        jti, _, expires_at = self._claims(refresh_token)
+        self.repo.add(jti, user_id, expires_at)
+        return access_token, refresh_token
+
+    def rotate(self, refresh_claims: dict) -> tuple:
+        """
+        Exchange a valid refresh token for a new pair; the presented token is revoked.
+
+        A replayed token is normally rejected before this runs, by the blocklist
+        check (see revoked_use). The in-memory set only knows about the rotation once
+        it has synced, though; until then the database claim in
+        RefreshTokenRepository.rotate decides. Either way a token that was already
+        rotated is being replayed, so every token of the user is revoked (the
+        legitimate client has to log in again).
+
+        Args:
+            refresh_claims (dict): Claims of the presented refresh token (get_jwt()).
+
+        Returns:
+            tuple: (access_token, refresh_token), or None if the token was reused.
+        """
+        user_id = refresh_claims["sub"]
+        refresh_token = create_refresh_token(identity=user_id)
+        jti, _, expires_at = self._claims(refresh_token)
+        old_expires_at = datetime.fromtimestamp(refresh_claims["exp"])
+        revoked_at = self.repo.rotate(refresh_claims["jti"], jti, user_id, expires_at, old_expires_at)
+        self.revoked.add(refresh_claims["jti"], old_expires_at, revoked_at)
+        if revoked_at is None:
+            logger.warning(f"Refresh token reuse for user {user_id}; revoking all of their tokens")
+            metrics.incr("token_revocations.reuse_detected")
+            self.revoke_all(user_id)
+            return None
+        metrics.incr("token_revocations.rotations")
+        return create_access_token(identity=user_id), refresh_token
+
+    def revoke(self, refresh_claims: dict) -> None:
+        """
+        Revoke one refresh token (logout).
+
+        Args:
+            refresh_claims (dict): Claims of the refresh token to revoke (get_jwt()).
+        """
+        expires_at = datetime.fromtimestamp(refresh_claims["exp"])
+        revoked_at = self.repo.revoke(refresh_claims["jti"], refresh_claims["sub"], expires_at)
+        self.revoked.add(refresh_claims["jti"], expires_at, revoked_at)
+        metrics.incr("token_revocations.logouts")
+
+    def revoke_all(self, user_id: str) -> int:
+        """
+        Revoke every refresh token of a user (log out everywhere).
+
+        Returns:
+            int: Number of tokens revoked.
+        """
+        revoked = self.repo.revoke_all(user_id)
+        for jti, expires_at in revoked:
+            self.revoked.add(jti, expires_at)
+        metrics.incr("token_revocations.revoke_all")
+        return len(revoked)
+
+    def revoked_use(self, refresh_claims: dict) -> None:
+        """
+        React to a revoked refresh token being presented.
+
+        A logged-out token is simply rejected. A token that was rotated has been
+        copied by someone other than its holder (either side may be the attacker),
+        so every token of the user is revoked.
+
+        Args:
+            refresh_claims (dict): Claims of the rejected refresh token.
+        """
+        if not self.repo.was_rotated(refresh_claims["jti"]):
+            return
+        user_id = refresh_claims["sub"]
+        logger.warning(f"Refresh token reuse for user {user_id}; revoking all of their tokens")
+        metrics.incr("token_revocations.reuse_detected")
+        self.revoke_all(user_id)
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Whether a refresh token has been revoked, answered from memory.
+        """
+        return self.revoked.contains(jti, self.repo)
@@ -1,5 +1,7 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import current_app
 from app.repositories import UserRepository, CalendarRepository
+from app.services.token_service import TokenService
+from app.utils.password_hasher import PasswordHasherBusy, get_password_hasher
 
 class UserService:
     """_summary_
@@ -38,9 +40,10 @@ class UserService:
         if "age" in data:
             user.age = data["age"]
         if "gender" in data:
-            user.gender = ["gender"]
+            user.gender = data["gender"]
 
         self.user_repo.session.commit()
+        self.user_repo.invalidate(user_id)
         return {"message": "User updated successfully", "user": user.to_dict()}, 200
 
     #--------------------------------
@@ -58,15 +61,21 @@ class UserService:
         Returns:
             A tuple (response_dict, status_code).
         """
-        user = self.user_repo.get_user_by_id(user_id)
+        user = self.user_repo.get_user_by_id(user_id, fresh=True)
         if not user:
             return {"message": "User not found"}, 404
 
-        if not check_password_hash(user.password_hash, old_password):
-            return {"message": "Incorrect old password"}, 401
-
-        user.password_hash = generate_password_hash(new_password)
+        hasher = get_password_hasher(current_app.config)
+        try:
+            if not hasher.verify(user.password_hash, old_password):
+                return {"message": "Incorrect old password"}, 401
+            user.password_hash = hasher.hash(new_password)
+        except PasswordHasherBusy:
+            return {"message": "Server busy, please retry shortly"}, 503
         self.user_repo.session.commit()
+        self.user_repo.invalidate(user_id)
+        # Sessions on other devices must log in again with the new password
+        TokenService().revoke_all(user_id)
         return {"message": "Password updated successfully"}, 200
 
     #--------------------------------
@@ -79,12 +88,15 @@ class UserService:
         if not password:
             return {"message": "Password is required"}, 400
 
-        user = self.user_repo.get_user_by_id(user_id)
+        user = self.user_repo.get_user_by_id(user_id, fresh=True)
         if not user:
             return {"message": "User not found"}, 404
 
-        if not check_password_hash(user.password_hash, password):
-            return {"message": "Incorrect password"}, 401
+        try:
+            if not get_password_hasher(current_app.config).verify(user.password_hash, password):
+                return {"message": "Incorrect password"}, 401
+        except PasswordHasherBusy:
+            return {"message": "Server busy, please retry shortly"}, 503
 
         user_deleted = self.user_repo.delete_user(user_id)
         if not user_deleted:
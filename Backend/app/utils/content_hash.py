@@ -0,0 +1,13 @@
+import hashlib
+import json
+
+
+def content_hash(payload) -> str:
+    """
+    Canonical SHA-256 of a JSON payload.
+
+    Keys are sorted and whitespace is dropped, so the same content re-sent with a
+    different key order or formatting hashes the same.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
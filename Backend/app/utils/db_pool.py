@@ -0,0 +1,70 @@
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.utils.metrics import metrics
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that reports its usage to the process metrics registry.
+
+    Timings: "mysql_pool.checkout_wait_seconds" (time to get a connection, including
+    opening a new one). Gauges: "mysql_pool.in_use", "mysql_pool.idle" and
+    "mysql_pool.overflow" (connections open beyond pool_size). Counters:
+    "mysql_pool.exhausted" (checkouts that found every connection, overflow included,
+    in use), "mysql_pool.timeouts", "mysql_pool.connects" and "mysql_pool.invalidated"
+    (e.g. dead connections found by pre-ping).
+    """
+
+    def _report(self):
+        metrics.set_gauge("mysql_pool.in_use", self.checkedout())
+        metrics.set_gauge("mysql_pool.idle", self.checkedin())
+        metrics.set_gauge("mysql_pool.overflow", max(0, self.overflow()))
+
+    def _do_get(self):
+        if self._max_overflow > -1 and self._overflow >= self._max_overflow and self.checkedin() == 0:
+            metrics.incr("mysql_pool.exhausted")
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.incr("mysql_pool.timeouts")
+            raise
+        finally:
+            metrics.observe("mysql_pool.checkout_wait_seconds", time.perf_counter() - started)
+            self._report()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report()
+
+
+@event.listens_for(InstrumentedQueuePool, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    metrics.incr("mysql_pool.connects")
+
+
+@event.listens_for(InstrumentedQueuePool, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    metrics.incr("mysql_pool.invalidated")
+
+
+def engine_options(config) -> dict:
+    """
+    SQLAlchemy engine options for the configured database: an InstrumentedQueuePool
+    sized by the SQLALCHEMY_POOL_* settings. In-memory SQLite (tests) keeps
+    Flask-SQLAlchemy's single shared connection.
+    """
+    url = make_url(config.get("SQLALCHEMY_DATABASE_URI"))
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.get("SQLALCHEMY_POOL_SIZE", 10),
+        "max_overflow": config.get("SQLALCHEMY_MAX_OVERFLOW", 20),
+        "pool_timeout": config.get("SQLALCHEMY_POOL_TIMEOUT", 10),
+        "pool_recycle": config.get("SQLALCHEMY_POOL_RECYCLE", 280),
+        "pool_pre_ping": config.get("SQLALCHEMY_POOL_PRE_PING", True)
+    }
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from app.utils.hourly_encoding import HOURS
+
+MS_PER_HOUR = 3_600_000
+# Google Fit sleep segment types (com.google.sleep.segment)
+SLEEP_STAGES = {"awake": 1, "sleep": 2, "out_of_bed": 3, "light": 4, "deep": 5, "rem": 6}
+_ASLEEP = np.array([2, 4, 5, 6])
+
+
+def day_start_ms(date_str: str, tz_offset_minutes: int = 0) -> int:
+    """Epoch milliseconds of local midnight of `date_str` for a UTC offset in minutes."""
+    tz = timezone(timedelta(minutes=tz_offset_minutes or 0))
+    return int(datetime.fromisoformat(date_str).replace(tzinfo=tz).timestamp() * 1000)
+
+
+def _iso_to_ms(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        stamp = datetime.fromisoformat(value)
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+        return stamp.timestamp() * 1000
+
+
+def to_epoch_ms(values) -> np.ndarray:
+    """
+    Convert timestamps to epoch milliseconds.
+
+    Accepts numbers in seconds, milliseconds or nanoseconds (told apart by magnitude,
+    Google Fit sends *Nanos/*Millis as strings) and ISO-8601 strings without offset
+    taken as UTC.
+    """
+    values = values if isinstance(values, np.ndarray) else list(values)
+    try:
+        stamps = np.asarray(values, dtype=float)
+    except ValueError:
+        stamps = np.array([_iso_to_ms(v) if isinstance(v, str) else float(v) for v in values], dtype=float)
+    stamps = np.where(stamps > 1e15, stamps / 1e6, stamps)  # nanoseconds
+    stamps = np.where(stamps < 1e11, stamps * 1000, stamps)  # seconds
+    return stamps.astype(np.int64)
+
+
+def _point_value(point):
+    value = point.get("value")
+    if isinstance(value, list):  # Google Fit dataPoint: [{"intVal": 12}] / [{"fpVal": 71.5}]
+        value = value[0] if value else {}
+        return value.get("intVal", value.get("fpVal", 0))
+    return value
+
+
+def sample_arrays(samples) -> tuple:
+    """
+    Timestamps and values of raw samples as parallel arrays.
+
+    Samples may be [time, value] pairs, {"time": ..., "value": ...} dicts, or Google
+    Fit dataPoints ({"startTimeNanos": ..., "value": [{"intVal"|"fpVal": ...}]}).
+
+    Returns:
+        tuple: (epoch_ms int64 array, values float array)
+    """
+    samples = samples or []
+    if not samples:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+    if isinstance(samples[0], (list, tuple)):
+        try:
+            pairs = np.asarray(samples, dtype=float).reshape(-1, 2)
+            return to_epoch_ms(pairs[:, 0]), pairs[:, 1]
+        except ValueError:  # ISO timestamps
+            times, values = [s[0] for s in samples], [s[1] for s in samples]
+    else:
+        times = [s.get("time", s.get("startTimeNanos", s.get("startTimeMillis"))) for s in samples]
+        values = [_point_value(s) for s in samples]
+    return to_epoch_ms(times), np.asarray(values, dtype=float)
+
+
+def _hour_index(times: np.ndarray, start_ms: int) -> tuple:
+    hours = (times - start_ms) // MS_PER_HOUR
+    inside = (hours >= 0) & (hours < HOURS)
+    return hours[inside], inside
+
+
+def downsample_hourly(steps, heart_rate, start_ms: int) -> np.ndarray:
+    """
+    Bin raw step and heart-rate samples of one day into hourly buckets.
+
+    Steps are summed and heart rate is averaged per hour (0 for hours without
+    samples); samples outside [start_ms, start_ms + 24h) are dropped.
+
+    Args:
+        steps (list): Raw step samples (see sample_arrays).
+        heart_rate (list): Raw heart-rate samples (see sample_arrays).
+        start_ms (int): Epoch milliseconds of the day's local midnight.
+
+    Returns:
+        np.ndarray: (24, 2) matrix of [steps, heart_rate], index = hour of day.
+    """
+    hourly = np.zeros((HOURS, 2), dtype=float)
+
+    times, values = sample_arrays(steps)
+    hours, inside = _hour_index(times, start_ms)
+    hourly[:, 0] = np.bincount(hours, weights=values[inside], minlength=HOURS)
+
+    times, values = sample_arrays(heart_rate)
+    valid = values > 0
+    hours, inside = _hour_index(times[valid], start_ms)
+    sums = np.bincount(hours, weights=values[valid][inside], minlength=HOURS)
+    counts = np.bincount(hours, minlength=HOURS)
+    np.divide(sums, counts, out=hourly[:, 1], where=counts > 0)
+    hourly[:, 1] = np.round(hourly[:, 1], 1)
+    return hourly
+
+
+def _stage_code(stage) -> int:
+    if isinstance(stage, str) and not stage.isdigit():
+        return SLEEP_STAGES.get(stage.lower(), 0)
+    stage = int(stage)
+    return stage if 0 < stage <= 6 else 0
+
+
+def summarize_sleep(segments) -> dict:
+    """
+    Total hours per sleep stage and awake episodes from raw sleep segments.
+
+    Segments are {"start": ..., "end": ..., "stage": "deep" | 5} dicts or Google Fit
+    dataPoints (startTimeNanos / endTimeNanos / value[0].intVal). Overlapping
+    segments are clipped so no time is counted twice; awake episodes are awake
+    segments that lie between the start of the first and the end of the last
+    asleep segment.
+
+    Returns:
+        dict: Keyword arguments for SleepStageData.
+    """
+    if not segments:
+        return {"total_hours": 0.0, "deep_hours": 0.0, "rem_hours": 0.0, "light_hours": 0.0, "awake_episodes": 0}
+    starts = to_epoch_ms([s.get("start", s.get("startTimeNanos", s.get("startTimeMillis"))) for s in segments])
+    ends = to_epoch_ms([s.get("end", s.get("endTimeNanos", s.get("endTimeMillis"))) for s in segments])
+    stages = np.array([
+        _stage_code(s["stage"] if "stage" in s else _point_value(s)) for s in segments
+    ], dtype=np.int64)
+
+    order = np.argsort(starts, kind="stable")
+    starts, ends, stages = starts[order], ends[order], stages[order]
+    # A segment only counts from where the previous segments ended
+    covered = np.maximum.accumulate(np.concatenate(([starts[0]], ends[:-1])))
+    durations = np.clip(ends - np.maximum(starts, covered), 0, None)
+    hours = np.bincount(stages, weights=durations, minlength=7) / MS_PER_HOUR
+
+    asleep = np.isin(stages, _ASLEEP)
+    awake_episodes = 0
+    if asleep.any():
+        awake = (stages == SLEEP_STAGES["awake"]) & (starts >= starts[asleep].min()) & (ends <= ends[asleep].max())
+        awake_episodes = int(np.count_nonzero(awake))
+    return {
+        "total_hours": round(float(hours[_ASLEEP].sum()), 2),
+        "deep_hours": round(float(hours[SLEEP_STAGES["deep"]]), 2),
+        "rem_hours": round(float(hours[SLEEP_STAGES["rem"]]), 2),
+        "light_hours": round(float(hours[SLEEP_STAGES["light"]]), 2),
+        "awake_episodes": awake_episodes
+    }
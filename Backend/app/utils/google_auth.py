@@ -0,0 +1,269 @@
+import asyncio
+import re
+import threading
+import time
+import requests
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt as google_jwt
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.utils.metrics import metrics
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleIdTokenVerifier:
+    """
+    Verifies Google ID tokens locally against Google's signing certificates.
+
+    The certificates are fetched once over a pooled keep-alive session and cached for
+    as long as the response's Cache-Control max-age (minus Age) allows, so a sign-in
+    normally needs no outbound request. A token signed with an unknown key id triggers
+    one early refresh (key rotation), at most every `min_refresh_seconds`.
+    """
+    def __init__(self, certs_url: str, session: requests.Session = None, timeout: float = 5.0,
+                 default_ttl: int = 3600, min_refresh_seconds: int = 60, clock_skew: int = 10):
+        """
+        Args:
+            certs_url (str): JSON {kid: PEM certificate} endpoint (Google's oauth2/v1/certs).
+            session (requests.Session, optional): Shared HTTP session. Defaults to a new pooled session.
+            timeout (float, optional): Seconds per certificate request. Defaults to 5.
+            default_ttl (int, optional): Cache lifetime when the response has no max-age. Defaults to 3600.
+            min_refresh_seconds (int, optional): Minimum spacing of unknown-kid refreshes. Defaults to 60.
+            clock_skew (int, optional): Seconds of tolerance for iat/exp. Defaults to 10.
+        """
+        self.certs_url = certs_url
+        self.session = session or _pooled_session()
+        self.timeout = timeout
+        self.default_ttl = default_ttl
+        self.min_refresh_seconds = min_refresh_seconds
+        self.clock_skew = clock_skew
+        self._certs = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _ttl(self, headers) -> int:
+        match = _MAX_AGE.search(headers.get("Cache-Control", ""))
+        if not match:
+            return self.default_ttl
+        return max(0, int(match.group(1)) - int(headers.get("Age", 0) or 0))
+
+    def _fetch(self) -> None:
+        started = time.perf_counter()
+        response = self.session.get(self.certs_url, timeout=self.timeout)
+        response.raise_for_status()
+        metrics.observe("google_certs.fetch_seconds", time.perf_counter() - started)
+        metrics.incr("google_certs.fetches")
+        now = time.monotonic()
+        self._certs = response.json()
+        self._fetched_at = now
+        self._expires_at = now + self._ttl(response.headers)
+
+    def get_certs(self, kid: str = None) -> dict:
+        """
+        Current {kid: PEM certificate} map, refreshed when expired or when `kid` is unknown.
+        """
+        with self._lock:
+            now = time.monotonic()
+            expired = now >= self._expires_at
+            rotated = kid is not None and kid not in self._certs and now - self._fetched_at >= self.min_refresh_seconds
+            if expired or rotated:
+                self._fetch()
+            else:
+                metrics.incr("google_certs.cache_hits")
+            return self._certs
+
+    def verify(self, token: str, audience: str) -> dict:
+        """
+        Verify an ID token's signature, expiry, audience and issuer.
+
+        Args:
+            token (str): The encoded ID token.
+            audience (str): The OAuth client id the token must be issued for.
+
+        Returns:
+            dict: The token claims.
+
+        Raises:
+            ValueError: If the token is malformed, expired, for another audience or not issued by Google.
+            requests.RequestException: If the certificates had to be fetched and could not be.
+        """
+        try:
+            header = google_jwt.decode_header(token)
+            certs = self.get_certs(header.get("kid"))
+            claims = google_jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=self.clock_skew)
+        except google_exceptions.GoogleAuthError as e:
+            raise ValueError(f"ID token verification failed: {e}") from e
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+
+class GoogleOAuthError(Exception):
+    """Google answered an OAuth request with an error (e.g. invalid_grant)."""
+    def __init__(self, status: int, error: dict):
+        super().__init__(f"Google OAuth error {status}: {error}")
+        self.status = status
+        self.error = error
+
+
+class GoogleOAuthClient:
+    """
+    Client for Google's OAuth token endpoint over a pooled keep-alive session.
+
+    The authorization-code exchange is the only network round trip of a web sign-in:
+    the ID token in the response is verified locally by a GoogleIdTokenVerifier (whose
+    certificates are normally cached) instead of a call to the tokeninfo endpoint.
+    The session retries connection failures with exponential backoff; rate-limit and
+    server errors are retried for idempotent requests only, since an authorization
+    code can be redeemed once.
+    """
+    def __init__(self, token_url: str, verifier: GoogleIdTokenVerifier, session: requests.Session = None,
+                 timeout: float = 5.0):
+        """
+        Args:
+            token_url (str): OAuth token endpoint (Google's oauth2.googleapis.com/token).
+            verifier (GoogleIdTokenVerifier): Verifier for the ID tokens in token responses.
+            session (requests.Session, optional): Shared HTTP session. Defaults to a new pooled session.
+            timeout (float, optional): Seconds per request. Defaults to 5.
+        """
+        self.token_url = token_url
+        self.verifier = verifier
+        self.session = session or _pooled_session()
+        self.timeout = timeout
+
+    def _post_token(self, name: str, data: dict) -> dict:
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.token_url, data=data, timeout=self.timeout)
+        finally:
+            metrics.observe(f"google_oauth.{name}_seconds", time.perf_counter() - started)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {"error": response.text[:200]}
+        if response.status_code != 200:
+            metrics.incr(f"google_oauth.{name}_errors")
+            raise GoogleOAuthError(response.status_code, payload)
+        return payload
+
+    def exchange_code(self, code: str, client_id: str, client_secret: str, redirect_uri: str) -> tuple:
+        """
+        Redeem an authorization code and verify the returned ID token.
+
+        Returns:
+            tuple: (tokens, claims) - the token response (access_token, refresh_token,
+                   id_token, expires_in, ...) and the verified ID-token claims.
+
+        Raises:
+            GoogleOAuthError: If Google rejects the code.
+            ValueError: If the ID token is missing or fails verification.
+            requests.RequestException: On network failure after the retries.
+        """
+        tokens = self._post_token("exchange", {
+            "code": code,
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "redirect_uri": redirect_uri,
+            "grant_type": "authorization_code"
+        })
+        if not tokens.get("id_token"):
+            raise ValueError("Token response has no id_token")
+        return tokens, self.verifier.verify(tokens["id_token"], client_id)
+
+    def refresh(self, refresh_token: str, client_id: str, client_secret: str) -> dict:
+        """
+        Get a new Google access token from a stored refresh token.
+
+        Returns:
+            dict: The token response (access_token, expires_in, ...).
+
+        Raises:
+            GoogleOAuthError: If Google rejects the refresh token (e.g. revoked).
+            requests.RequestException: On network failure after the retries.
+        """
+        return self._post_token("refresh", {
+            "refresh_token": refresh_token,
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "refresh_token"
+        })
+
+    async def exchange_code_async(self, *args, **kwargs) -> tuple:
+        """exchange_code for asyncio callers; runs on a worker thread over the same pool."""
+        return await asyncio.to_thread(self.exchange_code, *args, **kwargs)
+
+    async def refresh_async(self, *args, **kwargs) -> dict:
+        """refresh for asyncio callers; runs on a worker thread over the same pool."""
+        return await asyncio.to_thread(self.refresh, *args, **kwargs)
+
+
+def _pooled_session(pool_size: int = 10, retries: int = 2, backoff: float = 0.2) -> requests.Session:
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),  # connection errors are retried for every method
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = None
+_verifiers = {}
+_clients = {}
+_google_lock = threading.Lock()
+
+
+def _shared_session(config) -> requests.Session:
+    # One connection pool per process for every call to Google; called under _google_lock
+    global _session
+    if _session is None:
+        _session = _pooled_session(
+            pool_size=config.get("GOOGLE_HTTP_POOL_SIZE", 10),
+            retries=config.get("GOOGLE_HTTP_RETRIES", 2),
+            backoff=config.get("GOOGLE_HTTP_BACKOFF", 0.2)
+        )
+    return _session
+
+
+def _verifier(config) -> GoogleIdTokenVerifier:
+    certs_url = config.get("GOOGLE_CERTS_URL")
+    verifier = _verifiers.get(certs_url)
+    if verifier is None:
+        verifier = _verifiers[certs_url] = GoogleIdTokenVerifier(
+            certs_url, session=_shared_session(config), timeout=config.get("GOOGLE_HTTP_TIMEOUT", 5.0)
+        )
+    return verifier
+
+
+def get_id_token_verifier(config) -> GoogleIdTokenVerifier:
+    """
+    Process-wide verifier for the configured GOOGLE_CERTS_URL, so the certificate cache
+    and the HTTP connection pool are shared by all requests.
+    """
+    with _google_lock:
+        return _verifier(config)
+
+
+def get_oauth_client(config) -> GoogleOAuthClient:
+    """
+    Process-wide OAuth client for the configured GOOGLE_TOKEN_URL, sharing the connection
+    pool and certificate cache with get_id_token_verifier.
+    """
+    token_url = config.get("GOOGLE_TOKEN_URL")
+    with _google_lock:
+        client = _clients.get(token_url)
+        if client is None:
+            client = _clients[token_url] = GoogleOAuthClient(
+                token_url, _verifier(config), session=_shared_session(config),
+                timeout=config.get("GOOGLE_HTTP_TIMEOUT", 5.0)
+            )
+        return client
@@ -0,0 +1,34 @@
+import numpy as np
+
+HOURS = 24
+# Slot labels in the format the ML pipeline produces ("23:00-24:00" for the last hour)
+SLOT_LABELS = [f"{hour:02d}:00-{hour + 1:02d}:00" for hour in range(HOURS)]
+# Cyclical time features are a pure function of the hour, so they are never stored
+_ANGLES = 2 * np.pi * np.arange(HOURS) / HOURS
+SIN_TIME = np.sin(_ANGLES)
+COS_TIME = np.cos(_ANGLES)
+
+
+def slot_hour(label) -> int:
+    """Starting hour of an "HH:MM-HH:MM" slot label, or -1 if it cannot be parsed."""
+    try:
+        hour = int(label[:2])
+    except (TypeError, ValueError):
+        return -1
+    return hour if 0 <= hour < HOURS else -1
+
+
+def pack(values) -> bytes:
+    """Pack a (channels, 24) matrix as little-endian float32 bytes (channel-major)."""
+    return np.ascontiguousarray(values, dtype="<f4").tobytes()
+
+
+def unpack(blob: bytes, channels: int) -> np.ndarray:
+    """Inverse of pack: a (channels, 24) float64 matrix."""
+    return np.frombuffer(blob, dtype="<f4").reshape(channels, HOURS).astype(float)
+
+
+def as_number(value):
+    """Return whole floats as int (steps), other values unchanged."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
@@ -0,0 +1,76 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from app.utils.fit_downsampling import to_epoch_ms
+
+# Physiologically plausible RR range in ms (200 bpm .. 30 bpm)
+MIN_RR_MS = 300
+MAX_RR_MS = 2000
+# An interval deviating more than this from its local median is an artifact (missed / extra beat)
+MAX_RELATIVE_DEVIATION = 0.2
+MEDIAN_WINDOW = 11
+
+
+def rr_from_beats(beat_times) -> np.ndarray:
+    """
+    RR intervals in ms from beat timestamps (s, ms or ns epoch, or ISO-8601; see to_epoch_ms).
+
+    Gaps in the stream (sensor off) turn into long intervals that the artifact
+    filter removes.
+    """
+    times = np.sort(to_epoch_ms(beat_times))
+    return np.diff(times).astype(float)
+
+
+def artifact_mask(rr: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of the RR intervals that are kept.
+
+    An interval is rejected if it is outside [MIN_RR_MS, MAX_RR_MS] or deviates
+    more than MAX_RELATIVE_DEVIATION from the median of the MEDIAN_WINDOW
+    intervals around it (ectopic, missed or doubled beats).
+    """
+    rr = np.asarray(rr, dtype=float)
+    in_range = (rr >= MIN_RR_MS) & (rr <= MAX_RR_MS)
+    if len(rr) < 3 or not in_range.any():
+        return in_range
+    window = min(MEDIAN_WINDOW, len(rr) - 1 + len(rr) % 2)  # odd, and no longer than the stream
+    # Out-of-range values would drag the local median: they count as the overall median instead
+    filled = np.where(in_range, rr, np.median(rr[in_range]))
+    local = np.median(sliding_window_view(np.pad(filled, window // 2, mode="edge"), window), axis=1)
+    return in_range & (np.abs(rr - local) <= MAX_RELATIVE_DEVIATION * local)
+
+
+def hrv_metrics(rr_intervals=None, beat_times=None) -> dict:
+    """
+    Time-domain HRV metrics of a day's beat stream.
+
+    Successive differences are only taken between two kept, adjacent intervals, so a
+    removed artifact never produces a difference across the gap.
+
+    Args:
+        rr_intervals (list, optional): RR intervals in milliseconds.
+        beat_times (list, optional): Beat timestamps, used when rr_intervals is not given.
+
+    Returns:
+        dict: rmssd, sdnn, pnn50 (%), mean_hr (bpm), beats (intervals kept) and
+        artifact_ratio, or None if fewer than 2 usable intervals remain.
+    """
+    if rr_intervals is not None and len(rr_intervals):
+        rr = np.asarray(rr_intervals, dtype=float)
+    elif beat_times is not None and len(beat_times):
+        rr = rr_from_beats(beat_times)
+    else:
+        return None
+    keep = artifact_mask(rr)
+    successive = np.diff(rr)[keep[1:] & keep[:-1]]
+    clean = rr[keep]
+    if len(clean) < 2 or not len(successive):
+        return None
+    return {
+        "rmssd": round(float(np.sqrt(np.mean(successive ** 2))), 2),
+        "sdnn": round(float(np.std(clean, ddof=1)), 2),
+        "pnn50": round(float(100.0 * np.count_nonzero(np.abs(successive) > 50) / len(successive)), 2),
+        "mean_hr": round(float(60000.0 / clean.mean()), 1),
+        "beats": int(len(clean)),
+        "artifact_ratio": round(1.0 - len(clean) / len(rr), 4)
+    }
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from app.utils.metrics import metrics
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with an optional per-entry TTL.
+
+    Hits and misses are reported to the process metrics registry under
+    "<name>.hits" / "<name>.misses", and "<name>.hit_rate" is kept as a gauge.
+    """
+
+    def __init__(self, name: str, capacity: int = 1024, ttl: float = None):
+        """
+        Args:
+            name (str): Metric prefix for this cache (e.g., "prediction_cache").
+            capacity (int, optional): Maximum number of entries. Defaults to 1024.
+            ttl (float, optional): Entry lifetime in seconds. None keeps entries until evicted.
+        """
+        self.name = name
+        self.capacity = max(1, int(capacity))
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for `key`, or `default` on a miss or expired entry.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._data.move_to_end(key)
+                self._record(hit=True)
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self._record(hit=False)
+            return default
+
+    def set(self, key, value) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used entry if full.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key) -> bool:
+        """
+        Drop `key` from the cache.
+
+        Returns:
+            bool: True if an entry was removed, False otherwise.
+        """
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def _record(self, hit: bool) -> None:
+        metrics.incr(f"{self.name}.hits" if hit else f"{self.name}.misses")
+        metrics.set_gauge(
+            f"{self.name}.hit_rate",
+            metrics.ratio(f"{self.name}.hits", [f"{self.name}.hits", f"{self.name}.misses"])
+        )
@@ -0,0 +1,99 @@
+import threading
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry.
+
+    Keeps named counters, gauges and timing summaries for the current worker
+    process so caches, batch jobs and pools can report how they behave.
+    Everything is exposed as a plain dict through `snapshot()`.
+    --------------------
+    Structure example: {
+        "counters": {"prediction_cache.hits": 12, "prediction_cache.misses": 3},
+        "gauges": {"prediction_cache.hit_rate": 0.8},
+        "timings": {"batch_prediction.run_seconds": {"count": 1, "total": 4.2, "max": 4.2}}
+    }
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+
+    #--------------------------------
+    # Writers
+    #--------------------------------
+    def incr(self, name: str, value: int = 1) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): The metric name (e.g., "prediction_cache.hits").
+            value (int, optional): The amount to add. Defaults to 1.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge to an absolute value.
+
+        Args:
+            name (str): The metric name.
+            value (float): The current value.
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record one observation (e.g., a duration in seconds) in a timing summary.
+
+        Args:
+            name (str): The metric name.
+            value (float): The observed value.
+        """
+        with self._lock:
+            summary = self._timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["total"] += value
+            summary["max"] = max(summary["max"], value)
+
+    #--------------------------------
+    # Readers
+    #--------------------------------
+    def get_counter(self, name: str) -> int:
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def ratio(self, numerator: str, denominator_parts: list) -> float:
+        """
+        Compute counter[numerator] / sum(counter[part] for part in denominator_parts).
+
+        Returns:
+            float: The ratio, or 0.0 when the denominator is zero.
+        """
+        with self._lock:
+            total = sum(self._counters.get(part, 0) for part in denominator_parts)
+            return self._counters.get(numerator, 0) / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Return a copy of every metric currently recorded.
+
+        Returns:
+            dict: A dictionary with "counters", "gauges" and "timings" sections.
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {name: dict(summary) for name, summary in self._timings.items()}
+            }
+
+
+# Process-wide registry shared by every component
+metrics = MetricsRegistry()
@@ -0,0 +1,55 @@
+import importlib.util
+from functools import lru_cache
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
+# Python package each wire compressor needs (zlib is in the standard library)
+_COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+
+def available_compressors(names) -> list:
+    """
+    The wire compressors out of `names` (in order of preference) whose library is
+    installed. pymongo offers them to the server, which picks the first it supports.
+    """
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(",")]
+    available = []
+    for name in names:
+        if name not in _COMPRESSOR_PACKAGES:
+            continue
+        package = _COMPRESSOR_PACKAGES[name]
+        if package is None or importlib.util.find_spec(package) is not None:
+            available.append(name)
+    return available
+
+
+def mongo_settings(config) -> dict:
+    """
+    MONGODB_SETTINGS for flask-mongoengine: the MONGO_URI connection with the pool,
+    timeout and compression options from the MONGO_* settings (these override the
+    same options in the URI).
+    """
+    compressors = available_compressors(config.get("MONGO_COMPRESSORS", ""))
+    return {
+        "host": config.get("MONGO_URI"),
+        "maxPoolSize": config.get("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": config.get("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": config.get("MONGO_MAX_IDLE_TIME_MS") or None,
+        "serverSelectionTimeoutMS": config.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": config.get("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": config.get("MONGO_SOCKET_TIMEOUT_MS") or None,
+        "compressors": ",".join(compressors) or None,
+        "zlibCompressionLevel": config.get("MONGO_ZLIB_LEVEL", 6) if "zlib" in compressors else None
+    }
+
+
+@lru_cache(maxsize=None)
+def read_preference(name: str = "primary", max_staleness_seconds: int = -1):
+    """
+    pymongo read preference for a mode name ("primary", "primaryPreferred",
+    "secondary", "secondaryPreferred", "nearest"); -1 means no staleness bound.
+    """
+    mode = read_pref_mode_from_name(name)
+    if name == "primary":
+        return make_read_preference(mode, None)
+    return make_read_preference(mode, None, max_staleness_seconds)
@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.utils.metrics import metrics
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the hashing queue is full; the request should be retried later."""
+
+
+class PasswordHasher:
+    """
+    Runs the password KDF (scrypt / pbkdf2) in a dedicated process pool.
+
+    Hashing is deliberately CPU-expensive; run inline it holds the web worker (and the
+    GIL) for its whole duration, so a burst of logins starves every other endpoint.
+    Here at most `max_pending` hash operations are queued or running per process
+    (a slot is held until its hash finishes, even after the request stopped
+    waiting); beyond that PasswordHasherBusy is raised instead of growing the queue.
+    A pool broken by a dead worker is replaced on the next call.
+    """
+    def __init__(self, method: str = "scrypt", workers: int = 2, max_pending: int = 64, timeout: float = 10.0):
+        """
+        Args:
+            method (str, optional): werkzeug hash method with cost parameters, e.g.
+                "scrypt:32768:8:1" or "pbkdf2:sha256:600000". Defaults to "scrypt".
+            workers (int, optional): Hashing processes; 0 hashes inline. Defaults to 2.
+            max_pending (int, optional): Hash operations queued or running at once. Defaults to 64.
+            timeout (float, optional): Seconds to wait for one result. Defaults to 10.
+        """
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._method_prefix = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next call starts a new one."""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+                metrics.incr("password_hasher.pool_restarts")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, name: str, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            metrics.incr("password_hasher.rejected")
+            raise PasswordHasherBusy("Password hashing queue is full")
+        started = time.perf_counter()
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+                metrics.observe(f"password_hasher.{name}_seconds", time.perf_counter() - started)
+
+        pool = self._executor()
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._discard(pool)
+            raise PasswordHasherBusy("Password hashing pool restarted")
+        # The slot stays taken until the hash is done, not just until this request gives up
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            metrics.incr("password_hasher.timeouts")
+            raise PasswordHasherBusy("Password hashing timed out")
+        except BrokenProcessPool:
+            self._discard(pool)
+            raise PasswordHasherBusy("Password hashing pool restarted")
+        finally:
+            metrics.observe(f"password_hasher.{name}_seconds", time.perf_counter() - started)
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured method and cost."""
+        return self._run("hash", generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check a password against a stored hash (False for users without a password)."""
+        if not password_hash or password is None:
+            return False
+        return self._run("verify", check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a stored hash was made with a different method or cost than configured."""
+        if self._method_prefix is None:
+            # werkzeug fills in default costs ("scrypt" -> "scrypt:32768:8:1"): read the full
+            # method string off one hash, once per process
+            self._method_prefix = generate_password_hash("", self.method, salt_length=1).split("$", 1)[0]
+        return bool(password_hash) and password_hash.split("$", 1)[0] != self._method_prefix
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher(config) -> PasswordHasher:
+    """Process-wide PasswordHasher built from the PASSWORD_HASH_* settings."""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            _hasher = PasswordHasher(
+                method=config.get("PASSWORD_HASH_METHOD", "scrypt"),
+                workers=config.get("PASSWORD_HASH_WORKERS", 2),
+                max_pending=config.get("PASSWORD_HASH_MAX_PENDING", 64),
+                timeout=config.get("PASSWORD_HASH_TIMEOUT", 10.0)
+            )
+        return _hasher
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket for asyncio code: at most `burst` acquisitions at once, refilled at
+    `rate` per second. `acquire` waits (without blocking the event loop) until a
+    token is available.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate (float): Tokens added per second; 0 or less disables limiting.
+            burst (int, optional): Bucket size. Defaults to 1.
+        """
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting for it if necessary.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
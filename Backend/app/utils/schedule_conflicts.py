@@ -0,0 +1,67 @@
+import heapq
+from app.utils.slot_aggregation import MINUTES_PER_DAY, time_to_minutes
+
+
+def _field(task, name):
+    return task.get(name) if isinstance(task, dict) else getattr(task, name, None)
+
+
+def detect_conflicts(schedule) -> list:
+    """
+    Find overlapping tasks, deadline violations and tasks outside the schedule window.
+
+    Tasks are sorted by start once and swept left to right with a min-heap of the
+    tasks still running (keyed by end time): everything left on the heap when a task
+    starts overlaps it. Cost is O(n log n + k) for n tasks and k overlapping pairs.
+
+    Args:
+        schedule (Schedule or dict): A schedule with start, end and tasks.
+
+    Returns:
+        list[dict]: One entry per conflict, e.g.
+        {"type": "overlap", "tasks": ["Gym", "Study"], "start": "09:30", "end": "10:00"}
+        {"type": "deadline", "task": "Report", "end": "18:00", "deadline": "17:00"}
+        {"type": "outside_window", "task": "Run", "start": "06:30", "end": "07:15", "window": ["08:00", "20:00"]}
+        {"type": "invalid_time", "task": "Call", "start": "10:00", "end": "09:00"}
+    """
+    if not schedule:
+        return []
+    window_start = _field(schedule, "start")
+    window_end = _field(schedule, "end")
+    lo = time_to_minutes(window_start, default=0)
+    hi = time_to_minutes(window_end, default=MINUTES_PER_DAY)
+
+    conflicts = []
+    intervals = []
+    for index, task in enumerate(_field(schedule, "tasks") or []):
+        name, start_str, end_str = _field(task, "name"), _field(task, "start"), _field(task, "end")
+        start = time_to_minutes(start_str, default=-1)
+        end = time_to_minutes(end_str, default=-1)
+        if start < 0 or end <= start:
+            conflicts.append({"type": "invalid_time", "task": name, "start": start_str, "end": end_str})
+            continue
+        if start < lo or end > hi:
+            conflicts.append({
+                "type": "outside_window", "task": name,
+                "start": start_str, "end": end_str, "window": [window_start, window_end]
+            })
+        deadline_str = _field(task, "deadline")
+        deadline = time_to_minutes(deadline_str, default=MINUTES_PER_DAY)
+        if end > deadline:
+            conflicts.append({"type": "deadline", "task": name, "end": end_str, "deadline": deadline_str})
+        intervals.append((start, end, index, name))
+
+    intervals.sort()
+    running = []  # (end, index, name) of tasks that have started but not ended
+    for start, end, index, name in intervals:
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        for other_end, _, other_name in running:
+            overlap_end = min(end, other_end)
+            conflicts.append({
+                "type": "overlap", "tasks": [other_name, name],
+                "start": "{:02d}:{:02d}".format(start // 60, start % 60),
+                "end": "{:02d}:{:02d}".format(overlap_end // 60, overlap_end % 60)
+            })
+        heapq.heappush(running, (end, index, name))
+    return conflicts
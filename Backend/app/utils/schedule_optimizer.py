@@ -0,0 +1,374 @@
+import time
+import numpy as np
+from app.utils.slot_aggregation import MINUTES_PER_DAY, time_to_minutes
+
+# Candidate start times are scored every ANCHOR_STEP minutes
+ANCHOR_STEP = 15
+
+
+def _minutes_to_time(minutes: int) -> str:
+    return "{:02d}:{:02d}".format(minutes // 60, minutes % 60)
+
+
+def _field(obj, name, default=None):
+    value = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    return default if value is None else value
+
+
+class FreeMinuteTree:
+    """
+    Segment tree over the minutes of a day that tracks free (unoccupied) runs.
+
+    Every node stores the longest free run inside its range plus the free runs
+    touching its left and right edges, so "is [lo, hi) free?", "where is the
+    leftmost free run of at least d minutes after p?" and "where does the free run
+    at p end?" are answered in O(log n), and occupying an interval is an O(log n)
+    lazy range assignment.
+    """
+
+    def __init__(self, size: int):
+        """
+        Args:
+            size (int): Number of minutes in the day window (all initially free).
+        """
+        self.size = max(int(size), 1)
+        n = 4 * self.size
+        self._best = [0] * n
+        self._prefix = [0] * n
+        self._suffix = [0] * n
+        self._full = [False] * n  # pending "occupy whole range" tag
+        self._build(1, 0, self.size)
+
+    def _build(self, node, lo, hi):
+        length = hi - lo
+        self._best[node] = self._prefix[node] = self._suffix[node] = length
+        if length > 1:
+            mid = (lo + hi) // 2
+            self._build(2 * node, lo, mid)
+            self._build(2 * node + 1, mid, hi)
+
+    def _mark_full(self, node):
+        self._best[node] = self._prefix[node] = self._suffix[node] = 0
+        self._full[node] = True
+
+    def _push(self, node):
+        if self._full[node]:
+            self._mark_full(2 * node)
+            self._mark_full(2 * node + 1)
+            self._full[node] = False
+
+    def _pull(self, node, lo, mid, hi):
+        left, right = 2 * node, 2 * node + 1
+        self._prefix[node] = self._prefix[left] + (self._prefix[right] if self._prefix[left] == mid - lo else 0)
+        self._suffix[node] = self._suffix[right] + (self._suffix[left] if self._suffix[right] == hi - mid else 0)
+        self._best[node] = max(self._best[left], self._best[right], self._suffix[left] + self._prefix[right])
+
+    #--------------------------------
+    # Updates
+    #--------------------------------
+    def occupy(self, start: int, end: int) -> None:
+        """Mark minutes [start, end) as occupied (clipped to the window)."""
+        start, end = max(start, 0), min(end, self.size)
+        if start < end:
+            self._occupy(1, 0, self.size, start, end)
+
+    def _occupy(self, node, lo, hi, start, end):
+        if start <= lo and hi <= end:
+            self._mark_full(node)
+            return
+        self._push(node)
+        mid = (lo + hi) // 2
+        if start < mid:
+            self._occupy(2 * node, lo, mid, start, end)
+        if end > mid:
+            self._occupy(2 * node + 1, mid, hi, start, end)
+        self._pull(node, lo, mid, hi)
+
+    #--------------------------------
+    # Queries
+    #--------------------------------
+    def is_free(self, start: int, end: int) -> bool:
+        """Return True if every minute in [start, end) is free and inside the window."""
+        if start < 0 or end > self.size or start >= end:
+            return False
+        return self._longest(1, 0, self.size, start, end)[0] == end - start
+
+    def _longest(self, node, lo, hi, start, end):
+        """(best, prefix, suffix, length) of the free runs within [start, end) ∩ [lo, hi)."""
+        if start <= lo and hi <= end:
+            return self._best[node], self._prefix[node], self._suffix[node], hi - lo
+        self._push(node)
+        mid = (lo + hi) // 2
+        if end <= mid:
+            return self._longest(2 * node, lo, mid, start, end)
+        if start >= mid:
+            return self._longest(2 * node + 1, mid, hi, start, end)
+        lb, lp, ls, ll = self._longest(2 * node, lo, mid, start, end)
+        rb, rp, rs, rl = self._longest(2 * node + 1, mid, hi, start, end)
+        return (
+            max(lb, rb, ls + rp),
+            lp + (rp if lp == ll else 0),
+            rs + (ls if rs == rl else 0),
+            ll + rl
+        )
+
+    def first_fit(self, duration: int, start: int = 0) -> int:
+        """
+        Leftmost start at or after `start` of a free run of at least `duration` minutes.
+
+        Returns:
+            int: The start offset, or -1 if no free run is long enough.
+        """
+        if duration <= 0 or self._best[1] < duration:
+            return -1
+        return self._fit(1, 0, self.size, max(int(start), 0), duration, 0)[0]
+
+    def _fit(self, node, lo, hi, start, duration, run):
+        """
+        (leftmost fit in [lo, hi) or -1, free run ending at hi), where `run` free minutes
+        (at or after `start`) end at lo. Only nodes holding the answer are descended.
+        """
+        if hi <= start:
+            return -1, 0
+        if start <= lo:
+            if run + self._prefix[node] >= duration:
+                return lo - run, 0
+            if self._best[node] < duration:
+                length = hi - lo
+                return -1, run + length if self._prefix[node] == length else self._suffix[node]
+        self._push(node)
+        mid = (lo + hi) // 2
+        found, run = self._fit(2 * node, lo, mid, start, duration, run)
+        if found >= 0:
+            return found, 0
+        return self._fit(2 * node + 1, mid, hi, start, duration, run)
+
+    def run_end(self, start: int) -> int:
+        """End (exclusive) of the free run at `start`: the first occupied minute at or after it."""
+        found = self._next_occupied(1, 0, self.size, max(int(start), 0))
+        return self.size if found < 0 else found
+
+    def _next_occupied(self, node, lo, hi, start):
+        if hi <= start or (start <= lo and self._prefix[node] == hi - lo):
+            return -1
+        if hi - lo == 1:
+            return lo
+        self._push(node)
+        mid = (lo + hi) // 2
+        found = self._next_occupied(2 * node, lo, mid, start)
+        return found if found >= 0 else self._next_occupied(2 * node + 1, mid, hi, start)
+
+
+class MaxScoreTree:
+    """
+    Static segment tree over anchor scores answering "best anchor in [i, j]" in
+    O(log n); ties go to the leftmost anchor. Built level by level with numpy.
+    """
+
+    def __init__(self, scores):
+        """
+        Args:
+            scores (np.ndarray): Score of every anchor.
+        """
+        self.scores = np.asarray(scores, dtype=float)
+        self.leaves = 1 << max(len(self.scores) - 1, 0).bit_length()
+        values = np.full(self.leaves, -np.inf)
+        values[:len(self.scores)] = self.scores
+        self._index = np.zeros(2 * self.leaves, dtype=np.int64)
+        self._value = np.full(2 * self.leaves, -np.inf)
+        self._index[self.leaves:] = np.arange(self.leaves)
+        self._value[self.leaves:] = values
+        width = self.leaves
+        while width > 1:
+            parents = np.arange(width // 2, width)
+            left, right = 2 * parents, 2 * parents + 1
+            take_right = self._value[right] > self._value[left]
+            self._index[parents] = np.where(take_right, self._index[right], self._index[left])
+            self._value[parents] = np.where(take_right, self._value[right], self._value[left])
+            width //= 2
+
+    def argmax(self, first: int, last: int) -> int:
+        """Index of the best score among anchors first..last (inclusive), or -1 if the range is empty."""
+        first, last = max(int(first), 0), min(int(last), len(self.scores) - 1)
+        if first > last:
+            return -1
+        lo, hi = first + self.leaves, last + self.leaves + 1
+        left_nodes, right_nodes = [], []
+        while lo < hi:
+            if lo & 1:
+                left_nodes.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right_nodes.append(hi)
+            lo //= 2
+            hi //= 2
+        best = -1
+        for node in left_nodes + right_nodes[::-1]:  # left to right, so ties keep the leftmost
+            if best < 0 or self._value[node] > self._value[best]:
+                best = node
+        return int(self._index[best])
+
+
+def best_free_anchor(tree: FreeMinuteTree, scores: MaxScoreTree, starts, duration: int, step: int, limit: int) -> int:
+    """
+    Best-scoring anchor start whose window [start, start + duration) is free and ends by `limit`.
+
+    The free runs long enough for the task are found one after another with
+    FreeMinuteTree.first_fit/run_end, and the anchors inside each run with a range
+    query on the score tree, so the cost is O((runs + 1) log n) instead of testing
+    anchors one by one.
+
+    Returns:
+        int: The start offset, or -1 if no anchor fits.
+    """
+    best, position = -1, 0
+    while True:
+        start = tree.first_fit(duration, position)
+        if start < 0 or start + duration > limit:
+            return best if best < 0 else int(starts[best])
+        end = tree.run_end(start)
+        # Anchors are multiples of `step`; those in [start, min(end, limit) - duration] fit
+        candidate = scores.argmax(-(-start // step), (min(end, limit) - duration) // step)
+        if candidate >= 0 and (best < 0 or scores.scores[candidate] > scores.scores[best]):
+            best = candidate
+        position = end
+
+
+def _minute_profile(ml_data, day_start: int, size: int) -> tuple:
+    """Per-minute CP/PE prefix sums over the day window from hourly MLData predictions."""
+    cp = np.zeros(size, dtype=float)
+    pe = np.zeros(size, dtype=float)
+    for entry in ml_data or []:
+        slot = _field(entry, "time_slot", "")
+        try:
+            start, end = (time_to_minutes(part) for part in slot.split("-"))
+        except ValueError:
+            continue
+        if end <= start:
+            end += MINUTES_PER_DAY
+        lo, hi = max(start - day_start, 0), min(end - day_start, size)
+        if lo < hi:
+            cp[lo:hi] = _field(entry, "predicted_CP", 0.0)
+            pe[lo:hi] = _field(entry, "predicted_PE", 0.0)
+    return np.concatenate([[0.0], np.cumsum(cp)]), np.concatenate([[0.0], np.cumsum(pe)])
+
+
+def optimize_schedule(schedule, ml_data, anchor_step: int = ANCHOR_STEP) -> dict:
+    """
+    Arrange a day's tasks into the hours where predicted capacity best matches their load.
+
+    Done tasks keep their times. The remaining tasks are placed by earliest deadline,
+    then priority, then load. For each task every anchor start (every `anchor_step`
+    minutes) is scored as mental * ΣCP + physical * ΣPE over the task's window using
+    prefix sums; the best anchor whose window is free and meets the deadline is found
+    with best_free_anchor (free-minute tree + score tree), then slid left onto the
+    previous task when the gap before it is shorter than one step. When none fits, the
+    leftmost free gap is used, and a task that fits nowhere keeps its original times
+    and is reported as unscheduled.
+
+    Args:
+        schedule (Schedule or dict): The day's schedule (start, end, tasks, ...).
+        ml_data (list): MLData documents or dicts with time_slot, predicted_CP, predicted_PE.
+        anchor_step (int, optional): Minutes between candidate start times. Defaults to 15.
+
+    Returns:
+        dict: The arranged schedule in Schedule.to_dict() form plus "unscheduled" (task names).
+    """
+    day_start = time_to_minutes(_field(schedule, "start", ""), default=0)
+    day_end = time_to_minutes(_field(schedule, "end", ""), default=MINUTES_PER_DAY)
+    if day_end <= day_start:
+        day_start, day_end = 0, MINUTES_PER_DAY
+    size = day_end - day_start
+    tree = FreeMinuteTree(size)
+    cp_prefix, pe_prefix = _minute_profile(ml_data, day_start, size)
+    anchors = np.arange(0, size, max(int(anchor_step), 1))
+
+    tasks = []
+    for task in _field(schedule, "tasks", []):
+        item = task.to_dict() if hasattr(task, "to_dict") else dict(task)
+        start = time_to_minutes(item.get("start"), default=day_start)
+        end = time_to_minutes(item.get("end"), default=start)
+        item["_duration"] = max(end - start, 0)
+        item["_start"] = start - day_start
+        tasks.append(item)
+
+    for item in tasks:
+        if item.get("done"):
+            tree.occupy(item["_start"], item["_start"] + item["_duration"])
+
+    pending = sorted(
+        (item for item in tasks if not item.get("done")),
+        key=lambda t: (
+            time_to_minutes(t.get("deadline"), default=MINUTES_PER_DAY),
+            -(t.get("priority") or 0),
+            -((t.get("mental") or 0) + (t.get("physical") or 0))
+        )
+    )
+    unscheduled = []
+    for item in pending:
+        duration = item["_duration"]
+        if duration <= 0:
+            continue
+        starts = anchors[anchors + duration <= size]
+        scores = (
+            (item.get("mental") or 0) * (cp_prefix[starts + duration] - cp_prefix[starts])
+            + (item.get("physical") or 0) * (pe_prefix[starts + duration] - pe_prefix[starts])
+        )
+        deadline = time_to_minutes(item.get("deadline"), default=day_end) - day_start
+        score_tree = MaxScoreTree(scores)
+        step = max(int(anchor_step), 1)
+        best = best_free_anchor(tree, score_tree, starts, duration, step, min(deadline, size))
+        if best < 0:
+            best = best_free_anchor(tree, score_tree, starts, duration, step, size)
+        if best >= 0:
+            # Slide left onto the previous task (within one anchor step) so no sliver gaps remain
+            lo, hi = 0, min(int(anchor_step) - 1, best)
+            while lo < hi:
+                shift = (lo + hi + 1) // 2
+                if tree.is_free(best - shift, best):
+                    lo = shift
+                else:
+                    hi = shift - 1
+            if best - lo == 0 or not tree.is_free(best - lo - 1, best - lo):
+                best -= lo
+        else:
+            best = tree.first_fit(duration)
+        if best < 0:
+            unscheduled.append(item["name"])
+            continue
+        tree.occupy(best, best + duration)
+        item["start"] = _minutes_to_time(day_start + best)
+        item["end"] = _minutes_to_time(day_start + best + duration)
+
+    arranged = sorted(tasks, key=lambda t: time_to_minutes(t.get("start"), default=0))
+    for item in arranged:
+        item.pop("_duration", None)
+        item.pop("_start", None)
+    return {
+        "start": _field(schedule, "start"),
+        "end": _field(schedule, "end"),
+        "done": _field(schedule, "done"),
+        "exhaustion": _field(schedule, "exhaustion"),
+        "daily_score": _field(schedule, "daily_score"),
+        "tasks": arranged,
+        "unscheduled": unscheduled
+    }
+
+
+def optimize_schedules_chunk(items: list) -> list:
+    """
+    Optimize many users' schedules; the unit of work sent to batch worker processes.
+
+    Args:
+        items (list): (user_id, schedule dict, ml_data list) tuples.
+
+    Returns:
+        list: (user_id, arranged schedule dict, seconds spent) tuples.
+    """
+    results = []
+    for user_id, schedule, ml_data in items:
+        started = time.perf_counter()
+        arranged = optimize_schedule(schedule, ml_data)
+        results.append((user_id, arranged, time.perf_counter() - started))
+    return results
@@ -0,0 +1,219 @@
+import numpy as np
+
+# Channels accumulated per minute: mental, physical, exhaustion, duration
+_CHANNELS = ("mental", "physical", "exhaustion")
+MINUTES_PER_DAY = 24 * 60
+# Days per difference-array block (~46 KB of float64 per day)
+_BATCH_CHUNK = 256
+
+
+def time_to_minutes(t_str, default: int = None) -> int:
+    """
+    Converts a time string in "HH:MM" format to the total number of minutes since midnight.
+
+    Args:
+        t_str (str): Time string in "HH:MM" format.
+        default (int, optional): Returned when t_str is empty or malformed; raises if None.
+
+    Returns:
+        int: Total minutes since midnight.
+    """
+    try:
+        h, m = map(int, t_str.split(":"))
+        return h * 60 + m
+    except (AttributeError, ValueError):
+        if default is None:
+            raise
+        return default
+
+
+def format_slot_key(slot_start: int, slot_end: int) -> str:
+    """Format a slot as "HH:MM-HH:MM" (minutes since midnight in, key out)."""
+    return "{:02d}:{:02d}-{:02d}:{:02d}".format(slot_start // 60, slot_start % 60,
+                                                slot_end // 60, slot_end % 60)
+
+
+def slot_bounds(start_of_day: str, end_of_day: str, slot_minutes: int = 60) -> np.ndarray:
+    """
+    Slot boundaries in minutes: [start, start+slot, ..., last_slot_end].
+
+    The last slot may run past `end_of_day`, matching the slots the day is split into.
+    An empty/malformed start or end falls back to the whole day.
+    """
+    start_min = time_to_minutes(start_of_day, default=0)
+    end_min = time_to_minutes(end_of_day, default=MINUTES_PER_DAY)
+    if end_min <= start_min:
+        return np.array([start_min], dtype=np.int64)
+    n_slots = -(-(end_min - start_min) // slot_minutes)
+    return start_min + slot_minutes * np.arange(n_slots + 1, dtype=np.int64)
+
+
+def _field(task, name):
+    return task.get(name) if isinstance(task, dict) else getattr(task, name, None)
+
+
+def task_arrays(tasks) -> tuple:
+    """
+    Convert tasks (Task documents or dicts) to interval and weight arrays.
+
+    Returns:
+        tuple: (starts, ends, weights) where weights has shape (n_tasks, 3) for
+        mental, physical and exhaustion. Tasks with a non-positive duration are dropped.
+    """
+    tasks = list(tasks or [])
+    starts = np.fromiter((time_to_minutes(_field(t, "start"), default=0) for t in tasks), dtype=np.int64, count=len(tasks))
+    ends = np.fromiter((time_to_minutes(_field(t, "end"), default=0) for t in tasks), dtype=np.int64, count=len(tasks))
+    weights = np.array([[_field(t, c) or 0 for c in _CHANNELS] for t in tasks], dtype=float).reshape(len(tasks), 3)
+    valid = ends > starts
+    return starts[valid], ends[valid], weights[valid]
+
+
+def _as_number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _slots_dict(bounds: np.ndarray, totals: np.ndarray) -> dict:
+    """Build the AggregatedTaskData.slots dict from slot bounds and (n_slots, 4) totals."""
+    slots = {}
+    for i in range(len(bounds) - 1):
+        mental, physical, exhaustion, duration = totals[i]
+        data = {
+            "total_mental": _as_number(mental),
+            "total_physical": _as_number(physical),
+            "total_exhaustion": _as_number(exhaustion),
+            "total_duration": _as_number(duration)
+        }
+        if duration > 0:
+            data["avg_mental"] = data["total_mental"] / data["total_duration"]
+            data["avg_physical"] = data["total_physical"] / data["total_duration"]
+            data["avg_exhaustion"] = data["total_exhaustion"] / data["total_duration"]
+        else:
+            data["avg_mental"] = 0
+            data["avg_physical"] = 0
+            data["avg_exhaustion"] = 0
+        slots[format_slot_key(int(bounds[i]), int(bounds[i + 1]))] = data
+    return slots
+
+
+def aggregate_slots_batch(days, slot_minutes: int = 60) -> list:
+    """
+    Aggregate task load into time slots for many days in one vectorized pass.
+
+    Every task interval is written into a per-day, minute-resolution difference array
+    (+weight at start, -weight at end). One cumulative sum gives the per-minute load,
+    a second gives its prefix sum, and each slot total is a difference of two prefix
+    values — no task x slot comparisons.
+
+    Args:
+        days (iterable): (tasks, start_of_day, end_of_day) per day; tasks are Task documents or dicts.
+        slot_minutes (int, optional): Duration of each time slot in minutes. Defaults to 60.
+
+    Returns:
+        list[dict]: One AggregatedTaskData.slots dict per day, e.g.
+        {"08:00-09:00": {"total_mental": 300, ..., "total_duration": 60, "avg_mental": 5.0, ...}}
+    """
+    days = list(days)
+    if not days:
+        return []
+    if len(days) > _BATCH_CHUNK:
+        return [
+            slots
+            for i in range(0, len(days), _BATCH_CHUNK)
+            for slots in aggregate_slots_batch(days[i:i + _BATCH_CHUNK], slot_minutes)
+        ]
+    bounds = [slot_bounds(start, end, slot_minutes) for _, start, end in days]
+    intervals = [task_arrays(tasks) for tasks, _, _ in days]
+
+    width = max(
+        [MINUTES_PER_DAY] + [int(b[-1]) for b in bounds] + [int(e.max()) for _, e, _ in intervals if len(e)]
+    ) + 1
+    diff = np.zeros((len(days), width + 1, 4), dtype=float)
+
+    rows = np.concatenate([np.full(len(s), d, dtype=np.int64) for d, (s, _, _) in enumerate(intervals)])
+    starts = np.clip(np.concatenate([s for s, _, _ in intervals]), 0, width)
+    ends = np.clip(np.concatenate([e for _, e, _ in intervals]), 0, width)
+    weights = np.concatenate([w for _, _, w in intervals])
+    weights = np.hstack([weights, np.ones((len(weights), 1))])  # duration channel
+
+    np.add.at(diff, (rows, starts), weights)
+    np.add.at(diff, (rows, ends), -weights)
+    per_minute = np.cumsum(diff, axis=1)[:, :width]
+    prefix = np.concatenate([np.zeros((len(days), 1, 4)), np.cumsum(per_minute, axis=1)], axis=1)
+
+    results = []
+    for d, b in enumerate(bounds):
+        b_clipped = np.clip(b, 0, width)
+        totals = prefix[d, b_clipped[1:]] - prefix[d, b_clipped[:-1]]
+        results.append(_slots_dict(b, np.rint(totals * 1e6) / 1e6))
+    return results
+
+
+def aggregate_slots(tasks, start_of_day: str, end_of_day: str, slot_minutes: int = 60) -> dict:
+    """
+    Aggregate one day's tasks into time slots (see aggregate_slots_batch).
+
+    Returns:
+        dict: The AggregatedTaskData.slots dict for that day.
+    """
+    return aggregate_slots_batch([(tasks, start_of_day, end_of_day)], slot_minutes)[0]
+
+
+def _recompute_averages(data: dict) -> None:
+    for channel in _CHANNELS:
+        total_key = f"total_{channel}"
+        data[total_key] = _as_number(round(data[total_key], 6))
+    data["total_duration"] = _as_number(round(data["total_duration"], 6))
+    for channel in _CHANNELS:
+        data[f"avg_{channel}"] = data[f"total_{channel}"] / data["total_duration"] if data["total_duration"] > 0 else 0
+
+
+def apply_task_delta(slots: dict, old_task=None, new_task=None, slot_minutes: int = None) -> list:
+    """
+    Update stored slot totals/averages in place for a single task edit.
+
+    The old interval's load is subtracted and the new interval's load added, touching
+    only the slots each interval overlaps, so the cost depends on the task's length,
+    not on how many tasks the day has.
+
+    Args:
+        slots (dict): An AggregatedTaskData.slots dict (modified in place).
+        old_task (Task or dict, optional): The task as it was stored (None for an added task).
+        new_task (Task or dict, optional): The task as it is now (None for a deleted task).
+        slot_minutes (int, optional): Slot length; derived from the slot keys if omitted.
+
+    Returns:
+        list[str]: The keys of the slots that changed.
+    """
+    if not slots:
+        return []
+    bounds = sorted((time_to_minutes(k[:5]), time_to_minutes(k[6:])) for k in slots)
+    day_start = bounds[0][0]
+    slot_minutes = slot_minutes or (bounds[0][1] - bounds[0][0])
+    last_end = bounds[-1][1]
+
+    changed = {}
+    for task, sign in ((old_task, -1), (new_task, 1)):
+        if task is None:
+            continue
+        starts, ends, weights = task_arrays([task])
+        if not len(starts):
+            continue
+        start, end = max(int(starts[0]), day_start), min(int(ends[0]), last_end)
+        if end <= start:
+            continue
+        for i in range((start - day_start) // slot_minutes, (end - 1 - day_start) // slot_minutes + 1):
+            slot_start = day_start + i * slot_minutes
+            key = format_slot_key(slot_start, slot_start + slot_minutes)
+            data = slots.get(key)
+            if data is None:
+                continue
+            overlap = min(end, slot_start + slot_minutes) - max(start, slot_start)
+            for channel, weight in zip(_CHANNELS, weights[0]):
+                data[f"total_{channel}"] = data.get(f"total_{channel}", 0) + sign * float(weight) * overlap
+            data["total_duration"] = data.get("total_duration", 0) + sign * overlap
+            changed[key] = data
+
+    for data in changed.values():
+        _recompute_averages(data)
+    return list(changed)
@@ -0,0 +1,21 @@
+"""This script runs the background jobs (APScheduler) in their own process.
+
+Web workers start with SCHEDULER_ENABLED off; run exactly one of these next to them.
+"""
+import os
+import time
+
+# Config reads the environment on import
+os.environ["SCHEDULER_ENABLED"] = "true"
+
+from app import create_app
+from app.extensions import scheduler
+
+app = create_app()
+
+if __name__ == "__main__":
+    try:
+        while scheduler.running:
+            time.sleep(60)
+    except (KeyboardInterrupt, SystemExit):
+        scheduler.shutdown()
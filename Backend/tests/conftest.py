@@ -0,0 +1,57 @@
+import os
+from types import SimpleNamespace
+
+# Config reads the environment on import: in-memory SQLite and no background jobs
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
+import pytest
+from app import create_app
+from app.extensions import mysql
+from app.repositories.user_repository import _email_index, _user_cache
+
+
+@pytest.fixture
+def app():
+    """Application with a fresh in-memory MySQL schema, inside an app context."""
+    app = create_app()
+    app.config.update(TESTING=True)
+    # Ids restart with every schema, so users cached by an earlier test must not be served
+    _user_cache.clear()
+    _email_index.clear()
+    with app.app_context():
+        mysql.create_all()
+        yield app
+        mysql.session.remove()
+        mysql.drop_all()
+
+
+def _bulk_write(collection, operations, ordered=True, **kwargs):
+    """
+    Stand-in for Collection.bulk_write on mongomock, which rejects current pymongo
+    UpdateOne objects and misapplies several positional ("days.$.x") fields in one
+    update: every field is applied with its own update_one.
+    """
+    matched, modified = 0, 0
+    for operation in operations:
+        op_matched, op_modified = False, False
+        for operator, fields in operation._doc.items():
+            for field, value in fields.items():
+                result = collection.update_one(operation._filter, {operator: {field: value}})
+                op_matched |= bool(result.matched_count)
+                op_modified |= bool(result.modified_count)
+        matched += op_matched
+        modified += op_modified
+    return SimpleNamespace(matched_count=matched, modified_count=modified)
+
+
+@pytest.fixture
+def mongo(app, monkeypatch):
+    """Point mongoengine at an in-memory mongomock database (skipped if mongomock is missing)."""
+    mongomock = pytest.importorskip("mongomock")
+    import mongoengine
+    monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", _bulk_write)
+    mongoengine.disconnect_all()
+    mongoengine.connect("owler_test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    yield
+    mongoengine.disconnect_all()
@@ -0,0 +1,56 @@
+import pytest
+from app.models.mongodb import Calendar, Day
+from app.repositories import CalendarRepository, PredictionCacheRepository
+from app.repositories.prediction_cache_repository import _memory_tier
+from app.scripts.benchmark_day_encoding import make_user_data
+from app.services.batch_prediction_service import BatchPredictionService
+from app.utils.hourly_encoding import SLOT_LABELS
+
+SOURCE, TARGET = "2025-03-01", "2025-03-02"
+USERS = ("user-1", "user-2")
+
+
+def predictions(value):
+    return [{"time_slot": SLOT_LABELS[h], "CP": value, "PE": value / 2} for h in range(24)]
+
+
+@pytest.fixture
+def service(mongo, monkeypatch):
+    _memory_tier.clear()
+    for i, user_id in enumerate(USERS):
+        Calendar(user_id=user_id, days=[Day(date=SOURCE, UserData=make_user_data("arrays", seed=i))]).save()
+    service = BatchPredictionService(batch_size=10, explain=False)
+    monkeypatch.setattr(service.pipeline, "predict_next_day_batch",
+                        lambda days, user_ids: [predictions(0.5) for _ in user_ids])
+    return service
+
+
+def cached(service, user_id):
+    day = CalendarRepository().get_day_document(user_id, SOURCE)
+    return PredictionCacheRepository().get(
+        user_id, TARGET, service.pipeline.input_fingerprint(day.UserData), service.pipeline.model_version(user_id)
+    )
+
+
+def test_predictions_are_written_and_counted_once_per_user(service):
+    report = service.run(SOURCE)
+
+    assert report["users"] == 2
+    assert report["predicted"] == 2
+    # The day is pushed and initialised before the final $set, but counts once
+    assert report["modified_documents"] == 2
+    for user_id in USERS:
+        day = CalendarRepository().get_day_document(user_id, TARGET)
+        assert day.UserData.MLPredictions.values()[0].tolist() == [0.5, 0.25]
+        assert cached(service, user_id) == predictions(0.5)
+
+
+def test_failed_write_leaves_the_cache_empty(service, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("write failed")
+    monkeypatch.setattr(service.calendar_repo, "bulk_write_days", fail)
+
+    with pytest.raises(RuntimeError):
+        service.run(SOURCE)
+
+    assert all(cached(service, user_id) is None for user_id in USERS)
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+import pytest
+from app.models.mongodb import Calendar, Day
+from app.services.calendar_service import CalendarService
+
+BASE = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def calendar(mongo):
+    """A calendar of 120 days, each last modified an hour after midnight of its date."""
+    days = [
+        Day(date=(BASE + timedelta(days=i)).strftime("%Y-%m-%d"), Last_modified=BASE + timedelta(days=i, hours=1))
+        for i in range(120)
+    ]
+    Calendar(user_id="user-1", days=days).save()
+    return [day.date for day in days]
+
+
+def sync_all(service, cursor=None, limit=50):
+    """Follow has_more to the end: (dates, deleted dates, pages, last cursor)."""
+    dates, deleted, pages = [], [], 0
+    while True:
+        page = service.sync_days("user-1", cursor, limit)
+        pages += 1
+        dates += [day["date"] for day in page["days"]]
+        deleted += [tombstone["date"] for tombstone in page["deleted"]]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return dates, deleted, pages, cursor
+
+
+def test_cursor_round_trip():
+    stamp = datetime(2024, 5, 6, 7, 8, 9, 123000)
+
+    cursor = CalendarService.encode_sync_cursor(stamp, "2024-05-06")
+
+    assert CalendarService.decode_sync_cursor(cursor) == (stamp, "2024-05-06")
+    assert CalendarService.decode_sync_cursor(None) == (None, "")
+    assert CalendarService.decode_sync_cursor(CalendarService.encode_sync_cursor()) == (None, "")
+
+
+def test_malformed_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        CalendarService.decode_sync_cursor("not a cursor")
+
+
+def test_pages_return_every_day_once_in_change_order(calendar):
+    dates, deleted, pages, _ = sync_all(CalendarService())
+
+    assert dates == calendar
+    assert deleted == []
+    assert pages == 3
+
+
+def test_caught_up_cursor_only_returns_later_changes(app, calendar):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    service = CalendarService()
+    *_, cursor = sync_all(service)
+    assert sync_all(service, cursor)[0] == []
+
+    Calendar._get_collection().update_one(
+        {"user_id": "user-1", "days.date": calendar[10]},
+        {"$set": {"days.$.Last_modified": datetime.now() + timedelta(seconds=1)}}
+    )
+
+    assert sync_all(service, cursor)[0] == [calendar[10]]
+
+
+def test_recent_changes_are_sent_again_within_the_overlap_window(app, calendar):
+    app.config["SYNC_OVERLAP_SECONDS"] = 60
+    service = CalendarService()
+    *_, cursor = sync_all(service)
+    # Stamped before the caught-up cursor was issued, but committed after it
+    Calendar._get_collection().update_one(
+        {"user_id": "user-1", "days.date": calendar[5]},
+        {"$set": {"days.$.Last_modified": datetime.now() - timedelta(seconds=5)}}
+    )
+
+    assert sync_all(service, cursor)[0] == [calendar[5]]
+
+
+def test_removed_days_are_reported(app, calendar):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    service = CalendarService()
+    *_, cursor = sync_all(service)
+
+    assert service.remove_day("user-1", calendar[3])
+
+    dates, deleted, _, _ = sync_all(service, cursor)
+    assert dates == []
+    assert deleted == [calendar[3]]
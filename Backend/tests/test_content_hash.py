@@ -0,0 +1,67 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app.extensions import mysql
+from app.models.mongodb import Calendar
+from app.models.mysql import User
+from app.repositories import CalendarRepository
+from app.services import CalendarService
+from app.utils.content_hash import content_hash
+from app.utils.hourly_encoding import SLOT_LABELS
+
+
+def test_hash_ignores_key_order_and_formatting():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def fit_payload(steps):
+    return {
+        "last_updated": "2025-03-01T22:00:00",
+        "hourly_metrics": [{"hour_range": SLOT_LABELS[h], "steps": steps, "heart_rate": 70.0} for h in range(24)],
+        "sleep": {"total_hours": 7.0, "deep_hours": 1.0, "rem_hours": 1.5, "light_hours": 4.5},
+        "hrv": 40.0
+    }
+
+
+@pytest.fixture
+def writes(mongo, monkeypatch):
+    """Google Fit writes that reach the repository."""
+    Calendar(user_id="user-1", days=[]).save()
+    calls = []
+    store = CalendarRepository.update_google_fit_data
+
+    def spy(self, *args):
+        calls.append(args)
+        return store(self, *args)
+    monkeypatch.setattr(CalendarRepository, "update_google_fit_data", spy)
+    return calls
+
+
+def test_resent_google_fit_payload_is_not_written_again(writes):
+    service = CalendarService()
+
+    assert service.update_google_fit_data("user-1", fit_payload(10), "2025-03-01")
+    assert service.update_google_fit_data("user-1", dict(reversed(fit_payload(10).items())), "2025-03-01")
+    assert len(writes) == 1
+
+    # Changed content, or the same content for another day, is written
+    assert service.update_google_fit_data("user-1", fit_payload(11), "2025-03-01")
+    assert service.update_google_fit_data("user-1", fit_payload(11), "2025-03-02")
+    assert len(writes) == 3
+
+
+def test_resent_schedule_upload_is_acknowledged_as_duplicate(app, mongo):
+    user = User(email="user@example.com", name="User", oauth_id="sub-1")
+    mysql.session.add(user)
+    mysql.session.commit()
+    Calendar(user_id=str(user.id), days=[]).save()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+    days = {"date": "2025-03-01", "schedule": {"start": "08:00", "end": "20:00", "tasks": []}}
+    client = app.test_client()
+
+    first = client.post("/calendar/upload-days", json={"days": days}, headers=headers)
+    second = client.post("/calendar/upload-days", json={"days": days}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert "duplicate" not in first.get_json()
+    assert second.get_json()["duplicate"] is True
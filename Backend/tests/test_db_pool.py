@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.utils.db_pool import InstrumentedQueuePool, engine_options
+from app.utils.metrics import metrics
+
+
+def test_in_memory_sqlite_keeps_the_default_pool():
+    assert engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite://"}) == {}
+
+
+def test_mysql_gets_a_sized_instrumented_pool():
+    options = engine_options({"SQLALCHEMY_DATABASE_URI": "mysql+pymysql://app:pw@db/owler",
+                              "SQLALCHEMY_POOL_SIZE": 5, "SQLALCHEMY_MAX_OVERFLOW": 2})
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (5, 2)
+    assert options["pool_pre_ping"] is True
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=1, pool_timeout=0.05)
+    yield engine
+    engine.dispose()
+
+
+def gauges():
+    return metrics.snapshot()["gauges"]
+
+
+def test_pool_reports_usage_and_exhaustion(engine):
+    counters = {name: metrics.get_counter(f"mysql_pool.{name}") for name in ("exhausted", "timeouts", "connects")}
+
+    first, second = engine.connect(), engine.connect()
+    first.execute(text("SELECT 1"))
+    assert gauges()["mysql_pool.in_use"] == 2
+    assert gauges()["mysql_pool.overflow"] == 1
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert metrics.get_counter("mysql_pool.exhausted") == counters["exhausted"] + 1
+    assert metrics.get_counter("mysql_pool.timeouts") == counters["timeouts"] + 1
+    assert metrics.get_counter("mysql_pool.connects") == counters["connects"] + 2
+
+    first.close()
+    second.close()
+    assert gauges()["mysql_pool.in_use"] == 0
+    assert gauges()["mysql_pool.idle"] == 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from app.models.mongodb import Calendar, Day
+from app.repositories import CalendarRepository
+from app.repositories.ML_dataPipeline import MLDataPipeline
+from app.repositories.prediction_cache_repository import _memory_tier
+from app.scripts.benchmark_day_encoding import make_user_data
+from app.services.batch_prediction_service import BatchPredictionService
+from app.utils.hourly_encoding import SLOT_LABELS
+
+SOURCE, TARGET = "2025-03-01", "2025-03-02"
+
+
+@pytest.fixture
+def pipeline(app, monkeypatch):
+    pipeline = MLDataPipeline()
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((200, len(pipeline.feature_columns))), columns=pipeline.feature_columns)
+    model = clone(pipeline.global_pipeline).set_params(regressor__estimator__n_estimators=5)
+    model.fit(X, rng.random((200, 2)))
+    monkeypatch.setattr(pipeline, "_load_model", lambda path: model if path == pipeline.model_path else None)
+    pipeline.fitted_global = model
+    return pipeline
+
+
+def test_contributions_sum_to_the_raw_prediction(pipeline):
+    days = [make_user_data("arrays", seed=i) for i in range(2)]
+
+    predictions, explanations = pipeline.predict_next_day_batch(days, ["user-1", "user-2"], explain=True)
+
+    for day, explanation in zip(days, explanations):
+        raw = pipeline.fitted_global.predict(pipeline._extract_feature_matrix(day))
+        assert explanation["features"] == list(pipeline.feature_columns)
+        assert np.sum(explanation["cp"], axis=1) == pytest.approx(raw[:, 0], abs=1e-3)
+        assert np.sum(explanation["pe"], axis=1) == pytest.approx(raw[:, 1], abs=1e-3)
+    assert len(predictions) == 2
+
+
+@pytest.fixture
+def explained_day(mongo, pipeline):
+    _memory_tier.clear()
+    Calendar(user_id="user-1", days=[Day(date=SOURCE, UserData=make_user_data("arrays"))]).save()
+    service = BatchPredictionService(explain=True)
+    service.pipeline = pipeline
+    service.run(SOURCE)
+
+
+def stored_day():
+    return CalendarRepository().get_day_document("user-1", TARGET).UserData
+
+
+def test_batch_run_stores_one_explanation_per_prediction(explained_day):
+    explanation = stored_day().MLExplanation
+
+    assert len(explanation.cp) == len(explanation.pe) == 24
+    assert set(explanation.for_slot(0)["CP"]) == set(explanation.features) | {"bias"}
+
+
+def test_rewriting_predictions_drops_the_old_explanation(explained_day):
+    predictions = [{"time_slot": SLOT_LABELS[h], "CP": 0.5, "PE": 0.5} for h in range(24)]
+
+    assert CalendarRepository().update_ml_predictions("user-1", TARGET, predictions)
+
+    assert stored_day().MLExplanation is None
+    assert stored_day().ml_values()[0].tolist() == [0.5, 0.5]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from app.utils.fit_downsampling import (
+    MS_PER_HOUR, day_start_ms, downsample_hourly, sample_arrays, summarize_sleep, to_epoch_ms
+)
+
+START = day_start_ms("2025-03-01")
+
+
+def test_timestamps_in_any_unit_become_epoch_ms():
+    ms = START + 90_000
+    stamps = to_epoch_ms([ms / 1000, ms, ms * 1_000_000])
+
+    assert stamps.tolist() == [ms] * 3
+    assert to_epoch_ms(["2025-03-01T00:01:30"]).tolist() == [ms]
+
+
+def test_local_midnight_follows_the_offset():
+    assert day_start_ms("2025-03-01", tz_offset_minutes=60) == START - MS_PER_HOUR
+
+
+def test_sample_formats_are_read_alike():
+    pairs = [[START, 10], [START + 1000, 20]]
+    dicts = [{"time": t, "value": v} for t, v in pairs]
+    points = [{"startTimeNanos": str(t * 1_000_000), "value": [{"intVal": v}]} for t, v in pairs]
+
+    for samples in (pairs, dicts, points):
+        times, values = sample_arrays(samples)
+        assert times.tolist() == [START, START + 1000]
+        assert values.tolist() == [10, 20]
+
+
+def test_hourly_buckets_match_a_loop():
+    rng = np.random.default_rng(0)
+    times = START + rng.integers(-MS_PER_HOUR, 25 * MS_PER_HOUR, 5000)
+    steps = [[t, s] for t, s in zip(times, rng.integers(0, 50, len(times)))]
+    heart_rate = [[t, h] for t, h in zip(times, rng.choice([0, 60, 75, 90], len(times)))]
+
+    hourly = downsample_hourly(steps, heart_rate, START)
+
+    for hour in range(24):
+        lo, hi = START + hour * MS_PER_HOUR, START + (hour + 1) * MS_PER_HOUR
+        assert hourly[hour, 0] == sum(s for t, s in steps if lo <= t < hi)
+        # Zero readings are gaps, not measurements
+        readings = [h for t, h in heart_rate if lo <= t < hi and h > 0]
+        assert hourly[hour, 1] == pytest.approx(round(np.mean(readings), 1) if readings else 0)
+
+
+def test_sleep_segments_are_clipped_and_awake_episodes_counted():
+    hour = MS_PER_HOUR
+    segments = [
+        {"start": START, "end": START + 2 * hour, "stage": "light"},
+        {"start": START + hour, "end": START + 3 * hour, "stage": "deep"},  # overlaps the light hour
+        {"start": START + 3 * hour, "end": START + 3 * hour + hour // 4, "stage": "awake"},
+        {"start": START + 3 * hour + hour // 4, "end": START + 4 * hour, "stage": 6},
+        {"start": START + 4 * hour, "end": START + 5 * hour, "stage": "awake"},  # after waking up
+    ]
+
+    sleep = summarize_sleep(segments)
+
+    assert sleep == {"total_hours": 3.75, "deep_hours": 1.0, "rem_hours": 0.75, "light_hours": 2.0,
+                     "awake_episodes": 1}
+    assert summarize_sleep([])["total_hours"] == 0.0
+
+
+def test_raw_upload_stores_the_hourly_buckets(mongo):
+    from app.models.mongodb import Calendar
+    from app.repositories import CalendarRepository
+    from app.services import CalendarService
+    Calendar(user_id="user-1", days=[]).save()
+    raw = {"steps": [[START + 30 * 60_000, 120], [START + 14 * MS_PER_HOUR, 80]],
+           "heart_rate": [[START + 14 * MS_PER_HOUR, 72]], "sleep": []}
+
+    summary = CalendarService().ingest_raw_google_fit("user-1", raw, "2025-03-01")
+
+    assert summary["samples"]["steps"] == 2
+    stored = CalendarRepository().get_day_document("user-1", "2025-03-01").UserData.GoogleFitData.hourly.to_dict()
+    assert stored["steps"][0] == 120 and stored["steps"][14] == 80
+    assert stored["heart_rate"][14] == 72
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import pytest
+from app.extensions import mysql
+from app.models.mongodb import Calendar
+from app.models.mysql import User
+from app.repositories import CalendarRepository, UserRepository
+from app.services.fit_sync_service import FitSyncService
+from app.utils.rate_limiter import AsyncRateLimiter
+
+mock_google_server = pytest.importorskip("app.scripts.mock_google_server")
+
+CLIENT_ID = "test-client-id"
+DATE = "2025-03-01"
+AGGREGATE = "/fitness/v1/users/me/dataset:aggregate"
+
+
+def acquire_times(limiter, count):
+    async def run():
+        started = time.monotonic()
+        for _ in range(count):
+            await limiter.acquire()
+        return time.monotonic() - started
+    return asyncio.run(run())
+
+
+def test_rate_limiter_spaces_acquisitions():
+    assert acquire_times(AsyncRateLimiter(rate=50), 6) >= 5 / 50 * 0.9
+    assert acquire_times(AsyncRateLimiter(rate=50, burst=6), 6) < 0.05
+    assert acquire_times(AsyncRateLimiter(rate=0), 100) < 0.05
+
+
+@pytest.fixture(scope="module")
+def google():
+    mock = mock_google_server.MockGoogle(port=0, client_id=CLIENT_ID).start()
+    yield mock
+    mock.stop()
+
+
+@pytest.fixture
+def linked(app, mongo, google):
+    """Three linked users: a valid token, an expired one, and a revoked account."""
+    app.config.update(OAUTH_CLIENT_ID=CLIENT_ID, GOOGLE_TOKEN_URL=f"{google.base_url}/token",
+                      GOOGLE_FIT_API_URL=f"{google.base_url}/fitness/v1/users/me", GOOGLE_HTTP_BACKOFF=0)
+    tokens = {"valid": google.grant("sub-valid"), "expired": google.grant("sub-expired"),
+              "revoked": ("ya29.revoked", "1//revoked")}
+    google.access_tokens[tokens["expired"][0]] = ("sub-expired", 0)
+    ids = {}
+    for name, (access_token, refresh_token) in tokens.items():
+        user = User(email=f"{name}@example.com", name=name, oauth_id=f"sub-{name}",
+                    access_token=access_token, refresh_token=refresh_token)
+        mysql.session.add(user)
+        mysql.session.commit()
+        ids[name] = user.id
+        Calendar(user_id=str(user.id), days=[]).save()
+    return ids, tokens
+
+
+def test_sync_stores_fit_days_and_refreshes_expired_tokens(linked, google):
+    ids, tokens = linked
+
+    report = FitSyncService(concurrency=2, user_rate=0).run(DATE)
+
+    assert report["outcomes"] == {"synced": 2, "revoked": 1}
+    assert report["refreshed_tokens"] == 1
+    for name in ("valid", "expired"):
+        hourly = CalendarRepository().get_day_document(str(ids[name]), DATE).UserData.GoogleFitData.hourly
+        assert sum(hourly.to_dict()["steps"]) > 0
+    assert CalendarRepository().get_day_document(str(ids["revoked"]), DATE) is None
+    assert UserRepository().get_tokens(ids["expired"])["access_token"] != tokens["expired"][0]
+
+
+def test_server_errors_are_retried(linked, google):
+    google.fail(AGGREGATE, times=2)
+    before = google.requests[AGGREGATE]
+
+    report = FitSyncService(concurrency=1, user_rate=0).run(DATE)
+
+    assert report["outcomes"]["synced"] == 2
+    # The two 503s, activity + sleep per synced user, and the 401 answered once to each
+    # of the expired and revoked tokens
+    assert google.requests[AGGREGATE] - before == 2 + 2 * 2 + 2
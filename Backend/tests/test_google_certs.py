@@ -0,0 +1,89 @@
+import pytest
+import requests
+from app.utils.google_auth import GoogleIdTokenVerifier
+
+mock_google_server = pytest.importorskip("app.scripts.mock_google_server")
+
+CLIENT_ID = "test-client-id"
+
+
+class CertsSession:
+    """Serves the current signing certificates and counts the fetches."""
+    def __init__(self, certs, max_age=3600):
+        self.certs, self.max_age, self.fetches = certs, max_age, 0
+
+    def get(self, url, timeout=None):
+        self.fetches += 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = requests.compat.json.dumps(self.certs).encode()
+        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
+
+
+@pytest.fixture(scope="module")
+def google():
+    return mock_google_server.MockGoogle(client_id=CLIENT_ID, kid="key-1")
+
+
+def verifier(session, **kwargs):
+    return GoogleIdTokenVerifier("https://certs.example", session=session, **kwargs)
+
+
+def test_certificates_are_fetched_once_while_fresh(google):
+    session = CertsSession(google.certs)
+    certs = verifier(session)
+
+    for sub in ("a", "b", "c"):
+        assert certs.verify(google.mint_id_token(sub=sub), CLIENT_ID)["sub"] == sub
+    assert session.fetches == 1
+
+
+def test_expired_certificates_are_fetched_again(google):
+    session = CertsSession(google.certs, max_age=0)
+    certs = verifier(session)
+
+    certs.verify(google.mint_id_token(), CLIENT_ID)
+    certs.verify(google.mint_id_token(), CLIENT_ID)
+
+    assert session.fetches == 2
+
+
+def test_unknown_key_id_refreshes_once_per_interval(google):
+    rotated = mock_google_server.MockGoogle(client_id=CLIENT_ID, kid="key-2")
+    session = CertsSession(google.certs)
+    certs = verifier(session, min_refresh_seconds=0)
+    certs.verify(google.mint_id_token(), CLIENT_ID)
+
+    # Google rotated its keys: the first token signed with the new key refreshes the cache
+    session.certs = {**google.certs, **rotated.certs}
+    assert certs.verify(rotated.mint_id_token(sub="new"), CLIENT_ID)["sub"] == "new"
+    assert session.fetches == 2
+
+    # Forged key ids cannot force a fetch per request
+    certs.min_refresh_seconds = 3600
+    forged = mock_google_server.MockGoogle(client_id=CLIENT_ID, kid="key-3")
+    with pytest.raises(ValueError):
+        certs.verify(forged.mint_id_token(), CLIENT_ID)
+    assert session.fetches == 2
+
+
+def test_tokens_for_another_audience_are_rejected(google):
+    with pytest.raises(ValueError):
+        verifier(CertsSession(google.certs)).verify(google.mint_id_token(aud="other-client"), CLIENT_ID)
+
+
+class Unreachable:
+    def get(self, url, timeout=None):
+        raise requests.ConnectionError("no route to host")
+
+
+@pytest.mark.parametrize("session, status", [(Unreachable(), 503), (None, 401)])
+def test_google_signin_status(app, google, monkeypatch, session, status):
+    from app.services import auth_service
+    certs = verifier(session or CertsSession(google.certs))
+    monkeypatch.setattr(auth_service, "get_id_token_verifier", lambda config: certs)
+
+    response = app.test_client().post("/auth/google-signin", json={"id_token": google.mint_id_token(aud="other")})
+
+    assert response.status_code == status
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.utils.google_auth import GoogleIdTokenVerifier, GoogleOAuthClient, GoogleOAuthError, _pooled_session
+
+mock_google_server = pytest.importorskip("app.scripts.mock_google_server")
+
+CLIENT_ID = "test-client-id"
+CLAIMS = {"sub": "google-1", "email": "user@example.com", "name": "User"}
+
+
+@pytest.fixture(scope="module")
+def google():
+    mock = mock_google_server.MockGoogle(port=0, client_id=CLIENT_ID).start()
+    yield mock
+    mock.stop()
+
+
+@pytest.fixture
+def client(google):
+    session = _pooled_session(retries=2, backoff=0)
+    verifier = GoogleIdTokenVerifier(f"{google.base_url}/oauth2/v1/certs", session=session)
+    return GoogleOAuthClient(f"{google.base_url}/token", verifier, session=session)
+
+
+def exchange(client, code):
+    return client.exchange_code(code, CLIENT_ID, "secret", "https://app.example/callback")
+
+
+def test_code_exchange_returns_tokens_and_verified_claims(google, client):
+    tokens, claims = exchange(client, google.issue_code(**CLAIMS))
+
+    assert tokens["refresh_token"] and tokens["access_token"]
+    assert claims["email"] == "user@example.com" and claims["sub"] == "google-1"
+    assert client.refresh(tokens["refresh_token"], CLIENT_ID, "secret")["access_token"]
+
+
+def test_redeemed_code_is_rejected(google, client):
+    code = google.issue_code(**CLAIMS)
+    exchange(client, code)
+
+    with pytest.raises(GoogleOAuthError) as error:
+        exchange(client, code)
+    assert error.value.status == 400 and error.value.error["error"] == "invalid_grant"
+
+
+def test_code_exchange_is_not_retried_but_certificate_fetches_are(google, client):
+    google.fail("/token")
+    before = google.requests["/token"]
+    with pytest.raises(GoogleOAuthError) as error:
+        exchange(client, google.issue_code(**CLAIMS))
+    # A code can only be redeemed once, so a 503 is not retried
+    assert error.value.status == 503
+    assert google.requests["/token"] == before + 1
+
+    google.fail("/oauth2/v1/certs")
+    _, claims = exchange(client, google.issue_code(**CLAIMS))
+    assert claims["sub"] == "google-1"
+
+
+def test_async_exchanges_share_the_client(google, client):
+    codes = [google.issue_code(sub=f"google-{i}", email=f"user{i}@example.com", name="User") for i in range(4)]
+
+    async def exchange_all():
+        return await asyncio.gather(*(
+            client.exchange_code_async(code, CLIENT_ID, "secret", "https://app.example/callback") for code in codes
+        ))
+
+    results = asyncio.run(exchange_all())
+
+    assert [claims["sub"] for _, claims in results] == [f"google-{i}" for i in range(4)]
+
+
+def test_google_callback_signs_in_a_linked_user(app, google):
+    from app.extensions import mysql
+    from app.models.mysql import User
+    from app.repositories import UserRepository
+    app.config.update(OAUTH_CLIENT_ID=CLIENT_ID, GOOGLE_TOKEN_URL=f"{google.base_url}/token",
+                      GOOGLE_CERTS_URL=f"{google.base_url}/oauth2/v1/certs")
+    mysql.session.add(User(email="user@example.com", name="User", oauth_id="google-1"))
+    mysql.session.commit()
+    client = app.test_client()
+
+    response = client.get("/auth/google/callback", query_string={"code": google.issue_code(**CLAIMS)})
+
+    assert response.status_code == 200
+    assert response.get_json()["access_token"]
+    assert UserRepository().get_tokens(mysql.session.query(User).one().id)["refresh_token"]
+    assert client.get("/auth/google/callback", query_string={"code": "code-unknown"}).status_code == 400
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from app.models.mongodb.user_data import HourlyMetricSeries, MLPredictionSeries
+from app.utils.hourly_encoding import HOURS, SLOT_LABELS, pack, unpack
+
+
+def metrics(seed=0):
+    rng = np.random.default_rng(seed)
+    return [{"hour_range": SLOT_LABELS[h], "steps": int(rng.integers(0, 2000)),
+             "heart_rate": float(rng.uniform(50, 120))} for h in range(HOURS)]
+
+
+def test_pack_is_little_endian_float32_channel_major():
+    values = np.arange(2 * HOURS, dtype=float).reshape(2, HOURS) / 7
+
+    blob = pack(values)
+
+    assert len(blob) == 2 * HOURS * 4
+    assert np.frombuffer(blob[:4], dtype="<f4")[0] == np.float32(values[0, 0])
+    assert np.allclose(unpack(blob, 2), values, rtol=1e-6)
+
+
+def test_packed_and_array_encodings_store_the_same_metrics():
+    packed = HourlyMetricSeries.from_metrics(metrics(), packed=True)
+    arrays = HourlyMetricSeries.from_metrics(metrics(), packed=False)
+    # Round trip through BSON
+    stored = HourlyMetricSeries._from_son(packed.to_mongo())
+
+    assert not stored.steps and stored.packed
+    assert stored.to_dict()["steps"] == arrays.to_dict()["steps"]
+    assert np.allclose(stored.values(), arrays.values(), rtol=1e-6)
+    assert [m.hour_range for m in stored.to_metrics()] == SLOT_LABELS
+
+
+def test_packed_predictions_round_trip_to_ml_data():
+    predictions = [{"time_slot": SLOT_LABELS[h], "CP": h / 24, "PE": 1 - h / 24} for h in range(HOURS)]
+
+    series = MLPredictionSeries._from_son(MLPredictionSeries.from_predictions(predictions, packed=True).to_mongo())
+
+    ml_data = series.to_ml_data()
+    assert [d.time_slot for d in ml_data] == SLOT_LABELS
+    assert [d.predicted_CP for d in ml_data] == pytest.approx([p["CP"] for p in predictions], rel=1e-6)
+    assert [d.predicted_PE for d in ml_data] == pytest.approx([p["PE"] for p in predictions], rel=1e-6)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from app.utils.hrv import artifact_mask, hrv_metrics, rr_from_beats
+
+
+def test_metrics_of_a_clean_stream():
+    rr = [800, 810, 790, 805, 795, 800]
+
+    result = hrv_metrics(rr)
+
+    successive = np.diff(rr)
+    assert result["rmssd"] == pytest.approx(np.sqrt(np.mean(successive ** 2)), abs=0.01)
+    assert result["sdnn"] == pytest.approx(np.std(rr, ddof=1), abs=0.01)
+    assert result["pnn50"] == 0.0
+    assert result["mean_hr"] == pytest.approx(60000 / np.mean(rr), abs=0.1)
+    assert result["beats"] == 6
+    assert result["artifact_ratio"] == 0.0
+
+
+def test_artifacts_are_dropped_without_bridging_the_gap():
+    rr = [800, 810, 1600, 790, 805, 250, 800]
+
+    keep = artifact_mask(np.asarray(rr, dtype=float))
+    result = hrv_metrics(rr)
+
+    assert keep.tolist() == [True, True, False, True, True, False, True]
+    # Only 800->810 and 790->805 are adjacent kept pairs
+    assert result["rmssd"] == pytest.approx(np.sqrt((10 ** 2 + 15 ** 2) / 2), abs=0.01)
+    assert result["beats"] == 5
+    assert result["artifact_ratio"] == pytest.approx(2 / 7, abs=1e-4)
+
+
+def test_beat_timestamps_give_the_same_metrics():
+    rr = [800, 810, 790, 805]
+    beats = np.concatenate([[1_700_000_000_000], 1_700_000_000_000 + np.cumsum(rr)]).tolist()
+
+    assert rr_from_beats(beats).tolist() == rr
+    assert hrv_metrics(beat_times=beats) == hrv_metrics(rr)
+
+
+def test_too_little_data():
+    assert hrv_metrics() is None
+    assert hrv_metrics([800]) is None
+    assert hrv_metrics([100, 5000, 100]) is None
+
+
+def test_malformed_intervals_raise_value_error():
+    with pytest.raises(ValueError):
+        hrv_metrics(["x", "y"])
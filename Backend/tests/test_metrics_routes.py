@@ -0,0 +1,19 @@
+from flask_jwt_extended import create_access_token
+from app.extensions import mysql
+from app.models.mysql import User
+
+
+def test_metrics_require_a_token(app):
+    assert app.test_client().get("/metrics").status_code == 401
+
+
+def test_metrics_snapshot_for_signed_in_user(app):
+    user = User(email="ops@example.com", name="Ops", oauth_id="sub-ops")
+    mysql.session.add(user)
+    mysql.session.commit()
+    token = create_access_token(identity=str(user.id))
+
+    response = app.test_client().get("/metrics", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert isinstance(response.get_json(), dict)
@@ -0,0 +1,56 @@
+import pytest
+from pymongo import MongoClient
+from pymongo.read_preferences import Primary, PrimaryPreferred, SecondaryPreferred
+from app.utils import mongo_client
+from app.utils.mongo_client import available_compressors, mongo_settings, read_preference
+
+
+def installed(monkeypatch, *packages):
+    monkeypatch.setattr(mongo_client.importlib.util, "find_spec",
+                        lambda name: object() if name in packages else None)
+
+
+def test_only_installed_compressors_are_offered_in_order(monkeypatch):
+    installed(monkeypatch, "snappy")
+
+    assert available_compressors("zstd, snappy ,zlib,lz4") == ["snappy", "zlib"]
+    assert available_compressors(["zlib", "zstd"]) == ["zlib"]
+    assert available_compressors("") == []
+
+
+def test_settings_override_the_uri_options(monkeypatch):
+    installed(monkeypatch)
+    config = {"MONGO_URI": "mongodb://db/owler", "MONGO_MAX_POOL_SIZE": 50, "MONGO_COMPRESSORS": "zstd,zlib",
+              "MONGO_ZLIB_LEVEL": 3, "MONGO_MAX_IDLE_TIME_MS": 0, "MONGO_SOCKET_TIMEOUT_MS": 30000}
+
+    settings = mongo_settings(config)
+
+    assert settings["host"] == "mongodb://db/owler"
+    assert settings["maxPoolSize"] == 50
+    assert (settings["compressors"], settings["zlibCompressionLevel"]) == ("zlib", 3)
+    # 0 means "never": the option is left out rather than passed as 0
+    assert settings["maxIdleTimeMS"] is None
+    assert settings["socketTimeoutMS"] == 30000
+
+
+def test_settings_are_accepted_by_pymongo(monkeypatch):
+    installed(monkeypatch)
+    settings = mongo_settings({"MONGO_URI": "mongodb://localhost:1/owler", "MONGO_COMPRESSORS": "zlib"})
+
+    # pymongo validates every option (and the compressor names) when the client is built
+    client = MongoClient(connect=False, **{k: v for k, v in settings.items() if v is not None})
+    try:
+        assert client.options.pool_options.max_pool_size == 100
+    finally:
+        client.close()
+
+
+def test_read_preferences():
+    assert isinstance(read_preference("primary"), Primary)
+    assert isinstance(read_preference("primaryPreferred"), PrimaryPreferred)
+    assert read_preference("secondaryPreferred", 120).max_staleness == 120
+    assert isinstance(read_preference("secondaryPreferred", 120), SecondaryPreferred)
+    # Built once per mode and bound
+    assert read_preference("nearest", 90) is read_preference("nearest", 90)
+    with pytest.raises(ValueError):
+        read_preference("fastest")
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+import pytest
+from app.utils.metrics import metrics
+from app.utils.password_hasher import PasswordHasher, PasswordHasherBusy
+
+CHEAP = "pbkdf2:sha256:1000"
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_hash_and_verify_round_trip(workers):
+    hasher = PasswordHasher(method=CHEAP, workers=workers)
+
+    password_hash = hasher.hash("secret")
+
+    assert password_hash.startswith("pbkdf2:sha256:1000$")
+    assert hasher.verify(password_hash, "secret")
+    assert not hasher.verify(password_hash, "wrong")
+    assert not hasher.verify(None, "secret")
+
+
+def test_full_queue_is_rejected_not_waited_on():
+    hasher = PasswordHasher(method=CHEAP, workers=0, max_pending=1)
+    release = threading.Event()
+    worker = threading.Thread(target=hasher._run, args=("hash", release.wait))
+    worker.start()
+    time.sleep(0.05)
+
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("secret")
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.hash("secret")
+
+
+def test_slot_is_held_until_a_timed_out_hash_finishes():
+    hasher = PasswordHasher(method=CHEAP, workers=1, max_pending=1, timeout=0.05)
+    hasher.hash("warm up the worker")
+
+    with pytest.raises(PasswordHasherBusy, match="timed out"):
+        hasher._run("hash", time.sleep, 0.5)
+    with pytest.raises(PasswordHasherBusy, match="full"):
+        hasher.hash("secret")
+    time.sleep(0.6)
+    hasher.timeout = 10
+    assert hasher.hash("secret")
+
+
+def test_broken_pool_is_replaced():
+    hasher = PasswordHasher(method=CHEAP, workers=1)
+    restarts = metrics.get_counter("password_hasher.pool_restarts")
+
+    with pytest.raises(PasswordHasherBusy, match="restarted"):
+        hasher._run("hash", os._exit, 1)
+
+    assert metrics.get_counter("password_hasher.pool_restarts") == restarts + 1
+    assert hasher.verify(hasher.hash("secret"), "secret")
+
+
+def test_needs_rehash_compares_method_and_cost():
+    hasher = PasswordHasher(method=CHEAP, workers=0)
+
+    assert not hasher.needs_rehash(hasher.hash("secret"))
+    assert PasswordHasher(method="pbkdf2:sha256:2000", workers=0).needs_rehash(hasher.hash("secret"))
+
+
+def test_login_answers_503_while_the_hasher_is_busy(app, monkeypatch):
+    from app.extensions import mysql
+    from app.models.mysql import User
+    from app.services import auth_service
+    hasher = PasswordHasher(method=CHEAP, workers=0)
+    mysql.session.add(User(email="user@example.com", name="User", oauth_id="sub-1", password_hash=hasher.hash("secret")))
+    mysql.session.commit()
+    monkeypatch.setattr(auth_service, "get_password_hasher", lambda config: PasswordHasher(workers=0, max_pending=0))
+
+    response = app.test_client().post("/auth/login", json={"email": "user@example.com", "password": "secret"})
+
+    assert response.status_code == 503
@@ -0,0 +1,87 @@
+import pytest
+from app.models.mongodb import Calendar, Day
+from app.repositories import CalendarRepository, PredictionCacheRepository
+from app.repositories.prediction_cache_repository import _memory_tier
+from app.scripts.benchmark_day_encoding import make_user_data
+from app.services.ml_service import MLService
+from app.utils.hourly_encoding import SLOT_LABELS
+
+SOURCE, TARGET = "2025-03-01", "2025-03-02"
+
+
+def predictions(value):
+    return [{"time_slot": SLOT_LABELS[h], "CP": value, "PE": value / 2} for h in range(24)]
+
+
+@pytest.fixture
+def cache(mongo):
+    _memory_tier.clear()
+    return PredictionCacheRepository()
+
+
+def test_cache_is_keyed_by_inputs_and_model_version(cache):
+    cache.set("user-1", TARGET, "inputs-a", "model-1", predictions(0.3))
+
+    assert cache.get("user-1", TARGET, "inputs-a", "model-1") == predictions(0.3)
+    assert cache.get("user-1", TARGET, "inputs-b", "model-1") is None
+    assert cache.get("user-1", TARGET, "inputs-a", "model-2") is None
+    assert cache.get("user-2", TARGET, "inputs-a", "model-1") is None
+
+
+def test_persistent_tier_answers_after_the_memory_tier_is_lost(cache):
+    cache.set("user-1", TARGET, "inputs", "model", predictions(0.3))
+    _memory_tier.clear()
+
+    assert cache.get("user-1", TARGET, "inputs", "model") == predictions(0.3)
+    # Promoted back into memory
+    assert len(_memory_tier) == 1
+
+
+@pytest.fixture
+def service(cache, monkeypatch):
+    Calendar(user_id="user-1", days=[Day(date=SOURCE, UserData=make_user_data("arrays"))]).save()
+    service = MLService()
+    calls = []
+
+    def predict(current_day, user_id=None):
+        calls.append(user_id)
+        return predictions(0.75)
+
+    monkeypatch.setattr(service.pipeline, "predict_next_day", predict)
+    service.predict_calls = calls
+    return service
+
+
+def stored_cp():
+    day = CalendarRepository().get_day_document("user-1", TARGET)
+    return day.UserData.ml_values()[0][0] if day and day.UserData and day.UserData.MLPredictions else None
+
+
+def test_unchanged_inputs_skip_inference(service):
+    assert service.generate_predictions("user-1", SOURCE)
+    assert service.generate_predictions("user-1", SOURCE)
+
+    assert service.predict_calls == ["user-1"]
+    assert stored_cp() == pytest.approx(0.75)
+
+
+def test_hit_restores_predictions_missing_from_the_day(service):
+    service.generate_predictions("user-1", SOURCE)
+    Calendar._get_collection().update_one(
+        {"user_id": "user-1", "days.date": TARGET}, {"$unset": {"days.$.UserData.MLPredictions": ""}}
+    )
+
+    assert service.generate_predictions("user-1", SOURCE)
+
+    assert service.predict_calls == ["user-1"]
+    assert stored_cp() == pytest.approx(0.75)
+
+
+def test_hit_rewrites_overwritten_predictions(service):
+    service.generate_predictions("user-1", SOURCE)
+    CalendarRepository().update_ml_predictions("user-1", TARGET, predictions(0.1))
+
+    assert service.generate_predictions("user-1", SOURCE)
+
+    assert service.predict_calls == ["user-1"]
+    assert stored_cp() == pytest.approx(0.75)
@@ -0,0 +1,36 @@
+import pytest
+from app.extensions import scheduler
+from app.services.ml_service import MLService
+
+
+@pytest.fixture
+def service(app, monkeypatch):
+    service = MLService()
+    monkeypatch.setattr(service, "generate_predictions",
+                        lambda *args: pytest.fail("predicted inside the request"))
+    return service
+
+
+def test_without_a_scheduler_the_prediction_is_left_to_the_nightly_batch(service):
+    assert not scheduler.running
+
+    assert service.enqueue_next_day_prediction("user-1", "2025-03-01") is False
+
+
+@pytest.fixture
+def running_scheduler():
+    scheduler.start(paused=True)
+    yield scheduler
+    scheduler.remove_all_jobs()
+    scheduler.shutdown(wait=False)
+
+
+def test_uploads_for_one_day_share_a_job(service, running_scheduler):
+    for _ in range(3):
+        assert service.enqueue_next_day_prediction("user-1", "2025-03-01")
+    assert service.enqueue_next_day_prediction("user-1", "2025-03-02")
+
+    assert sorted(job.id for job in running_scheduler.get_jobs()) == [
+        "predict-next-day:user-1:2025-03-01", "predict-next-day:user-1:2025-03-02"
+    ]
+
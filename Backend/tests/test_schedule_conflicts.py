@@ -0,0 +1,57 @@
+import itertools
+import random
+from app.utils.schedule_conflicts import detect_conflicts
+from app.utils.slot_aggregation import time_to_minutes
+
+
+def schedule(*tasks, start="08:00", end="20:00"):
+    return {"start": start, "end": end, "tasks": [
+        {"name": name, "start": task_start, "end": task_end, "deadline": deadline}
+        for name, task_start, task_end, deadline in tasks
+    ]}
+
+
+def of_type(conflicts, conflict_type):
+    return [c for c in conflicts if c["type"] == conflict_type]
+
+
+def test_no_conflicts():
+    assert detect_conflicts(schedule(("A", "08:00", "09:00", None), ("B", "09:00", "10:00", "10:00"))) == []
+    assert detect_conflicts(None) == []
+
+
+def test_overlap_reports_the_shared_interval():
+    conflicts = detect_conflicts(schedule(("Gym", "09:00", "10:00", None), ("Study", "09:30", "11:00", None)))
+
+    assert conflicts == [{"type": "overlap", "tasks": ["Gym", "Study"], "start": "09:30", "end": "10:00"}]
+
+
+def test_deadline_window_and_invalid_time():
+    conflicts = detect_conflicts(schedule(
+        ("Report", "16:00", "18:00", "17:00"),
+        ("Run", "06:30", "07:15", None),
+        ("Call", "10:00", "09:00", None),
+    ))
+
+    assert of_type(conflicts, "deadline") == [{"type": "deadline", "task": "Report", "end": "18:00", "deadline": "17:00"}]
+    assert of_type(conflicts, "outside_window")[0]["task"] == "Run"
+    assert of_type(conflicts, "invalid_time")[0]["task"] == "Call"
+    assert not of_type(conflicts, "overlap")
+
+
+def test_overlaps_match_pairwise_check():
+    rnd = random.Random(7)
+    tasks = []
+    for i in range(60):
+        start = rnd.randrange(8 * 60, 19 * 60)
+        end = start + rnd.randrange(5, 120)
+        tasks.append((f"T{i}", f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}", None))
+
+    found = {frozenset(c["tasks"]) for c in of_type(detect_conflicts(schedule(*tasks)), "overlap")}
+
+    expected = {
+        frozenset((a[0], b[0]))
+        for a, b in itertools.combinations(tasks, 2)
+        if time_to_minutes(a[1]) < time_to_minutes(b[2]) and time_to_minutes(b[1]) < time_to_minutes(a[2])
+    }
+    assert found == expected
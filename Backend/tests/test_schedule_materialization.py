@@ -0,0 +1,58 @@
+import pytest
+from app.models.mongodb import Calendar, Day
+from app.models.mongodb.schedule import Schedule, Task
+from app.repositories import CalendarRepository
+from app.utils.slot_aggregation import aggregate_slots
+
+DATES = ("2025-03-01", "2025-03-02")
+
+
+def tasks(offset):
+    return [{"name": f"task-{offset}", "start": f"{8 + offset:02d}:00", "end": f"{9 + offset:02d}:30",
+             "deadline": "20:00", "priority": 1, "mental": 4, "physical": 2, "exhaustion": 1}]
+
+
+@pytest.fixture
+def repo(mongo):
+    for u, user_id in enumerate(("user-1", "user-2")):
+        Calendar(user_id=user_id, days=[
+            Day(date=date, schedule=Schedule(start="08:00", end="12:00", daily_score=7,
+                                             tasks=[Task(**t) for t in tasks(u + d)]))
+            for d, date in enumerate(DATES)
+        ]).save()
+    return CalendarRepository()
+
+
+def user_data(user_id, date):
+    return CalendarRepository().get_day_document(user_id, date).UserData
+
+
+def test_pending_days_of_all_users_are_materialized_in_one_pass(repo):
+    report = repo.materialize_schedule_data(batch_size=3, write_batch_size=2)
+
+    assert report["days"] == 4
+    for u, user_id in enumerate(("user-1", "user-2")):
+        for d, date in enumerate(DATES):
+            stored = user_data(user_id, date)
+            assert stored.ScheduleData.daily_score == 7
+            assert stored.AggregatedTaskData.slots == aggregate_slots(tasks(u + d), "08:00", "12:00")
+
+
+def test_materialized_days_are_skipped_unless_forced(repo):
+    repo.materialize_schedule_data()
+
+    assert repo.materialize_schedule_data()["days"] == 0
+    assert repo.materialize_schedule_data(force=True)["days"] == 4
+
+
+def test_single_day_materialization(repo):
+    assert repo.state_schedule_data("user-1", DATES[0])
+
+    assert user_data("user-1", DATES[0]).AggregatedTaskData.slots
+    # Other days and users are left alone
+    assert user_data("user-1", DATES[1]) is None
+    assert user_data("user-2", DATES[0]) is None
+    # Already materialized: nothing to do, but the day exists
+    assert repo.materialize_schedule_data(DATES[0], ["user-1"])["days"] == 0
+    assert repo.state_schedule_data("user-1", DATES[0])
+    assert not repo.state_schedule_data("user-1", "2025-04-01")
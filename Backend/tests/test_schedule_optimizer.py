@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from app.utils.hourly_encoding import SLOT_LABELS
+from app.utils.schedule_optimizer import FreeMinuteTree, MaxScoreTree, best_free_anchor, optimize_schedule
+from app.utils.slot_aggregation import time_to_minutes
+
+
+def occupied_tree(seed, size=600, intervals=25):
+    rng = np.random.default_rng(seed)
+    tree, free = FreeMinuteTree(size), np.ones(size, dtype=bool)
+    for start in rng.integers(0, size, intervals):
+        end = start + int(rng.integers(1, 40))
+        tree.occupy(start, end)
+        free[start:end] = False
+    return tree, free
+
+
+def brute_first_fit(free, duration, start):
+    for s in range(start, len(free) - duration + 1):
+        if free[s:s + duration].all():
+            return s
+    return -1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_free_minute_tree_matches_a_minute_array(seed):
+    tree, free = occupied_tree(seed)
+    rng = np.random.default_rng(100 + seed)
+
+    for _ in range(200):
+        start, duration = int(rng.integers(0, 600)), int(rng.integers(1, 90))
+        assert tree.first_fit(duration, start) == brute_first_fit(free, duration, start)
+        assert tree.is_free(start, start + duration) == (start + duration <= 600 and free[start:start + duration].all())
+        occupied = np.flatnonzero(~free[start:])
+        assert tree.run_end(start) == (start + occupied[0] if len(occupied) else 600)
+
+
+def test_max_score_tree_returns_the_leftmost_best():
+    scores = np.random.default_rng(0).integers(0, 5, 37).astype(float)
+    tree = MaxScoreTree(scores)
+
+    for first in range(37):
+        for last in range(first, 37):
+            assert tree.argmax(first, last) == first + int(np.argmax(scores[first:last + 1]))
+    assert tree.argmax(5, 4) == -1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_best_free_anchor_matches_testing_every_anchor(seed):
+    tree, free = occupied_tree(seed)
+    step, duration, limit = 15, 45, 540
+    starts = np.arange(0, 600, step)
+    starts = starts[starts + duration <= 600]
+    scores = np.random.default_rng(seed).random(len(starts))
+
+    found = best_free_anchor(tree, MaxScoreTree(scores), starts, duration, step, limit)
+
+    fitting = [i for i, s in enumerate(starts) if s + duration <= limit and free[s:s + duration].all()]
+    assert found == (int(starts[max(fitting, key=lambda i: (scores[i], -i))]) if fitting else -1)
+
+
+def task(name, start, end, mental=1, physical=1, deadline="20:00", done=False):
+    return {"name": name, "start": start, "end": end, "deadline": deadline, "priority": 1,
+            "mental": mental, "physical": physical, "done": done}
+
+
+def ml_data(peak_hour):
+    return [{"time_slot": SLOT_LABELS[h], "predicted_CP": 1.0 if h == peak_hour else 0.1, "predicted_PE": 0.1}
+            for h in range(24)]
+
+
+def spans(arranged):
+    return {t["name"]: (time_to_minutes(t["start"]), time_to_minutes(t["end"])) for t in arranged["tasks"]}
+
+
+def test_mental_task_moves_to_the_predicted_peak():
+    schedule = {"start": "08:00", "end": "20:00", "tasks": [task("focus", "08:00", "09:00", mental=9, physical=0)]}
+
+    arranged = optimize_schedule(schedule, ml_data(peak_hour=14))
+
+    assert spans(arranged)["focus"] == (14 * 60, 15 * 60)
+    assert arranged["unscheduled"] == []
+
+
+def test_done_tasks_keep_their_time_and_deadlines_hold():
+    schedule = {"start": "08:00", "end": "20:00", "tasks": [
+        task("meeting", "14:00", "15:00", done=True),
+        task("focus", "08:00", "09:00", mental=9, physical=0),
+        task("report", "08:00", "10:00", mental=5, deadline="12:00"),
+    ]}
+
+    placed = spans(optimize_schedule(schedule, ml_data(peak_hour=14)))
+
+    assert placed["meeting"] == (14 * 60, 15 * 60)
+    assert placed["report"][1] <= 12 * 60
+    intervals = sorted(placed.values())
+    assert all(a[1] <= b[0] for a, b in zip(intervals, intervals[1:]))
+
+
+def test_task_that_fits_nowhere_is_unscheduled():
+    schedule = {"start": "08:00", "end": "10:00", "tasks": [
+        task("long", "08:00", "09:30"), task("too-long", "08:00", "09:00")
+    ]}
+
+    assert optimize_schedule(schedule, ml_data(peak_hour=8))["unscheduled"] == ["too-long"]
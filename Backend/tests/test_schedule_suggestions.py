@@ -0,0 +1,56 @@
+import pytest
+from app.jobs import _claim_run
+from app.models.mongodb import Calendar, Day
+from app.models.mongodb.schedule import Schedule, Task
+from app.repositories import CalendarRepository, JobCheckpointRepository
+from app.scripts.benchmark_day_encoding import make_user_data
+from app.services.schedule_suggestion_service import JOB_NAME, ScheduleSuggestionService
+
+TARGET = "2025-03-02"
+USERS = ("user-1", "user-2", "user-3")
+
+
+def test_a_run_is_claimed_once(mongo):
+    repo = JobCheckpointRepository()
+
+    assert repo.claim("nightly-predictions", "2025-03-01")
+    assert not repo.claim("nightly-predictions", "2025-03-01")
+    assert repo.claim("nightly-predictions", "2025-03-02")
+    assert _claim_run("fit-sync", "1") and not _claim_run("fit-sync", "1")
+
+
+@pytest.fixture
+def calendars(mongo):
+    for i, user_id in enumerate(USERS):
+        schedule = Schedule(start="08:00", end="20:00", tasks=[Task(
+            name="focus", start="08:00", end="09:00", deadline="20:00", priority=1, mental=8, physical=1
+        )])
+        Calendar(user_id=user_id, days=[Day(date=TARGET, schedule=schedule, UserData=make_user_data("arrays", i))]).save()
+    # A day without predictions gets no suggestion
+    Calendar(user_id="user-4", days=[Day(date=TARGET, schedule=schedule)]).save()
+
+
+def suggested(user_id):
+    return CalendarRepository().get_day_document(user_id, TARGET).suggested_schedule
+
+
+def test_suggestions_are_stored_for_every_user_with_predictions(calendars):
+    report = ScheduleSuggestionService(batch_size=2, workers=1).run(TARGET)
+
+    assert report["users"] == 3
+    assert all(len(suggested(user_id).tasks) == 1 for user_id in USERS)
+    assert suggested("user-4") is None
+    assert JobCheckpointRepository().get(JOB_NAME, TARGET).status == "done"
+
+
+def test_unfinished_run_resumes_after_the_checkpoint(calendars):
+    checkpoints = JobCheckpointRepository()
+    checkpoints.start(JOB_NAME, TARGET)
+    checkpoints.advance(JOB_NAME, TARGET, "user-1", 1)
+
+    report = ScheduleSuggestionService(batch_size=2, workers=1).run(TARGET)
+
+    assert report["resumed_after"] == "user-1"
+    assert suggested("user-1") is None
+    assert suggested("user-2") and suggested("user-3")
+    assert checkpoints.get(JOB_NAME, TARGET).processed == 4
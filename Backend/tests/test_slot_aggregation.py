@@ -0,0 +1,75 @@
+import pytest
+from app.utils.slot_aggregation import aggregate_slots, aggregate_slots_batch, apply_task_delta, slot_bounds
+
+
+def task(start, end, mental=0, physical=0, exhaustion=0):
+    return {"start": start, "end": end, "mental": mental, "physical": physical, "exhaustion": exhaustion}
+
+
+def test_slot_bounds_cover_the_window():
+    assert slot_bounds("08:00", "10:30").tolist() == [480, 540, 600, 660]
+    assert slot_bounds("", "").tolist()[0] == 0
+    assert slot_bounds("20:00", "08:00").tolist() == [1200]
+
+
+def test_task_load_is_split_by_minutes_per_slot():
+    slots = aggregate_slots([task("08:30", "09:30", mental=4, physical=2, exhaustion=1)], "08:00", "10:00")
+
+    assert list(slots) == ["08:00-09:00", "09:00-10:00"]
+    first = slots["08:00-09:00"]
+    assert first["total_duration"] == 30
+    assert first["total_mental"] == 120
+    assert first["total_physical"] == 60
+    assert first["avg_mental"] == pytest.approx(4.0)
+    assert slots["09:00-10:00"]["total_exhaustion"] == 30
+
+
+def test_overlapping_tasks_add_up_and_empty_slots_average_zero():
+    slots = aggregate_slots(
+        [task("08:00", "09:00", mental=2), task("08:30", "09:00", mental=6)], "08:00", "10:00"
+    )
+
+    assert slots["08:00-09:00"]["total_duration"] == 90
+    assert slots["08:00-09:00"]["avg_mental"] == pytest.approx((2 * 60 + 6 * 30) / 90)
+    assert slots["09:00-10:00"] == {
+        "total_mental": 0, "total_physical": 0, "total_exhaustion": 0, "total_duration": 0,
+        "avg_mental": 0, "avg_physical": 0, "avg_exhaustion": 0
+    }
+
+
+def test_invalid_tasks_are_ignored():
+    slots = aggregate_slots([task("10:00", "09:00", mental=5), task(None, "bad", mental=5)], "08:00", "10:00")
+
+    assert all(data["total_duration"] == 0 for data in slots.values())
+
+
+def test_batch_matches_single_day_aggregation():
+    days = [
+        ([task("08:15", "11:45", mental=3, physical=1)], "08:00", "12:00"),
+        ([], "09:00", "17:00"),
+        ([task("22:30", "23:59", exhaustion=7)], "20:00", "24:00"),
+    ]
+
+    assert aggregate_slots_batch(days) == [aggregate_slots(*day) for day in days]
+
+
+def test_apply_task_delta_matches_full_recompute():
+    tasks = [task("08:00", "09:30", mental=2, physical=3), task("10:00", "11:00", mental=5)]
+    slots = aggregate_slots(tasks, "08:00", "12:00")
+    moved = task("08:45", "10:15", mental=4, physical=1, exhaustion=2)
+
+    changed = apply_task_delta(slots, old_task=tasks[0], new_task=moved)
+
+    assert slots == aggregate_slots([moved, tasks[1]], "08:00", "12:00")
+    assert sorted(changed) == ["08:00-09:00", "09:00-10:00", "10:00-11:00"]
+
+
+def test_apply_task_delta_add_and_delete():
+    slots = aggregate_slots([], "08:00", "10:00")
+    added = task("08:30", "09:00", mental=8)
+
+    apply_task_delta(slots, new_task=added)
+    assert slots == aggregate_slots([added], "08:00", "10:00")
+
+    apply_task_delta(slots, old_task=added)
+    assert slots == aggregate_slots([], "08:00", "10:00")
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+import pytest
+from app.models.mongodb import Calendar
+from app.repositories import CalendarRepository
+from app.utils.slot_aggregation import aggregate_slots
+
+DATE = "2025-03-01"
+
+
+def task(name, start, end, mental=5, physical=3, exhaustion=2):
+    return {"name": name, "start": start, "end": end, "deadline": end, "priority": 1,
+            "mental": mental, "physical": physical, "exhaustion": exhaustion}
+
+
+TASKS = [task("write", "08:00", "09:30"), task("gym", "10:00", "11:00", mental=1, physical=9)]
+
+
+class StoredDay:
+    """
+    Stand-in for the calendars collection (mongomock lacks $indexOfArray): answers the
+    task lookup for one stored day and records the update.
+    """
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.updates = []
+
+    def aggregate(self, pipeline):
+        old_key = pipeline[2]["$project"]["old_index"]["$indexOfArray"][1] \
+            if "$indexOfArray" in pipeline[2]["$project"]["old_index"] else None
+        keys = [{k: t[k] for k in ("name", "start", "end")} for t in self.tasks]
+        index = keys.index(old_key) if old_key in keys else -1
+        return [{"day_found": True, "has_schedule": True, "old_index": index,
+                 "slots": aggregate_slots(self.tasks, "08:00", "12:00"),
+                 "old_task": self.tasks[index] if old_key and index >= 0 else None}]
+
+    def update_one(self, query, update):
+        self.updates.append((query, update))
+        return SimpleNamespace(matched_count=1)
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    collection = StoredDay(TASKS)
+    monkeypatch.setattr(Calendar, "_get_collection", classmethod(lambda cls: collection))
+    return collection
+
+
+def test_moving_a_task_patches_only_its_slots(app, stored):
+    moved = task("write", "09:00", "10:00")
+
+    result = CalendarRepository().update_task("user-1", DATE, TASKS[0], moved)
+
+    expected = aggregate_slots([moved, TASKS[1]], "08:00", "12:00")
+    assert sorted(result["changed_slots"]) == ["08:00-09:00", "09:00-10:00"]
+    assert result["changed_slots"] == {key: expected[key] for key in result["changed_slots"]}
+    query, update = stored.updates[0]
+    # Matched on the stored copy of the old task, replaced in place
+    assert query["days"]["$elemMatch"]["schedule.tasks.0.name"] == "write"
+    assert update["$set"]["days.$.schedule.tasks.0"]["start"] == "09:00"
+
+
+def test_removing_a_task_pulls_it(app, stored):
+    result = CalendarRepository().update_task("user-1", DATE, TASKS[1], None)
+
+    update = stored.updates[0][1]
+    assert update["$pull"] == {"days.$.schedule.tasks": {"name": "gym", "start": "10:00", "end": "11:00"}}
+    assert sorted(result["changed_slots"]) == ["10:00-11:00"]
+    assert result["changed_slots"]["10:00-11:00"]["total_duration"] == 0
+
+
+def test_every_edit_clears_the_upload_hash(app, stored):
+    repo = CalendarRepository()
+    repo.update_task("user-1", DATE, None, task("read", "11:00", "12:00"))
+    repo.update_task("user-1", DATE, TASKS[1], task("gym", "10:00", "10:30"))
+
+    # Re-uploading the original payload must be applied again
+    assert all(update["$unset"] == {"days.$.schedule_hash": ""} for _, update in stored.updates)
+
+
+def test_unknown_task_is_not_updated(app, stored):
+    assert CalendarRepository().update_task("user-1", DATE, task("missing", "08:00", "09:00"), None) is None
+    assert stored.updates == []
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+from app.repositories.ML_dataPipeline import MLDataPipeline
+from app.repositories.ML_timeSeriesCV import TimeSeriesCV
+
+
+def dated_rows(first_day, last_day, rows_per_day=3):
+    return np.array([f"2025-01-{d:02d}" for d in range(first_day, last_day + 1) for _ in range(rows_per_day)],
+                    dtype=object)
+
+
+def test_folds_never_train_on_later_days_of_any_user():
+    # User A has days 1-8 and user B days 5-12, rows in per-user order
+    dates = np.concatenate([dated_rows(1, 8), dated_rows(5, 12), np.array([None], dtype=object)])
+
+    folds = TimeSeriesCV(n_splits=3).split(len(dates), dates)
+
+    assert len(folds) == 3
+    for train, test in folds:
+        assert max(dates[train]) < min(dates[test])
+        assert not set(dates[train]) & set(dates[test])
+        # Rows without a date are in no fold
+        assert len(dates) - 1 not in np.concatenate([train, test])
+
+
+def test_too_few_days_give_no_folds():
+    assert TimeSeriesCV(n_splits=3).split(9, dated_rows(1, 3)) == []
+
+
+def test_folds_are_built_once_per_dataset():
+    cv = TimeSeriesCV(n_splits=2, n_jobs=1)
+    dates = dated_rows(1, 6)
+    X, y = np.random.default_rng(0).random((len(dates), 3)), np.random.default_rng(1).random((len(dates), 2))
+
+    assert cv.build_folds(X, y, StandardScaler(), dates=dates) is cv.build_folds(X, y, StandardScaler(), dates=dates)
+
+
+def test_select_picks_the_lowest_mae():
+    cv = TimeSeriesCV(n_splits=2, n_jobs=1)
+    dates = dated_rows(1, 10)
+    X = np.random.default_rng(0).random((len(dates), 3))
+    y = X @ np.array([[1.0, 2.0], [3.0, 0.5], [0.0, 1.0]])
+    folds = cv.build_folds(X, y, StandardScaler(), dates=dates)
+
+    search = cv.select(Ridge(), {"alpha": [0.001, 100.0]}, folds, n_iter=2)
+
+    assert search["best_params"] == {"alpha": 0.001}
+    assert search["best_mae"] == min(r["mae"] for r in search["results"])
+
+
+def test_select_without_folds_keeps_defaults():
+    search = TimeSeriesCV(n_splits=3).select(Ridge(), {"alpha": [0.1, 1.0]}, [], n_iter=2)
+
+    assert search == {"best_params": {}, "best_mae": None, "results": []}
+
+
+def test_tuning_a_short_history_keeps_the_default_parameters(app):
+    pipeline = MLDataPipeline(cv_splits=3)
+    before = pipeline.pipeline.get_params()["regressor__estimator__n_estimators"]
+    dates = dated_rows(1, 2)
+    X = np.random.default_rng(0).random((len(dates), len(pipeline.feature_columns)))
+
+    search = pipeline.tune_hyperparameters(X, np.zeros((len(dates), 2)), n_iter=2, dates=dates)
+
+    assert search["best_mae"] is None
+    assert pipeline.pipeline.get_params()["regressor__estimator__n_estimators"] == before
+
+
+def test_private_cv_refits_the_global_model_per_fold(app, monkeypatch):
+    pipeline = MLDataPipeline(cv_splits=2)
+    pipeline.global_pipeline.set_params(regressor__estimator__n_estimators=5)
+    pipeline.private_pipeline.set_params(regressor__estimator__n_estimators=5)
+    dates = np.concatenate([dated_rows(1, 8), dated_rows(1, 8)])
+    rng = np.random.default_rng(0)
+    X = rng.random((len(dates), len(pipeline.feature_columns)))
+    y = rng.random((len(dates), 2))
+    monkeypatch.setattr(pipeline, "load_data_all_users", lambda return_dates=False: (X, y, dates))
+
+    folds = pipeline._global_fold_models()
+    scores = pipeline.evaluate_private_cv(X[:24], y[:24], dates[:24])
+
+    assert len(folds) == 2
+    for train_dates, test_dates, _ in folds:
+        assert max(train_dates) < min(test_dates)
+    assert len(scores["fold_mae"]) == 2
+    assert scores["mae"] == pytest.approx(np.mean(scores["mae_per_target"]))
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from app.repositories import RefreshTokenRepository
+from app.services.token_service import RevokedTokenSet
+from app.utils.bloom_filter import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate_is_near_target():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    false_positives = sum(bloom.might_contain(f"other-{i}") for i in range(20000))
+
+    assert false_positives / 20000 < 0.02
+
+
+def test_revoked_set_reads_revocations_from_the_table(app):
+    repo = RefreshTokenRepository()
+    expires = datetime.now() + timedelta(days=1)
+    repo.add("kept", "user-1", expires)
+    repo.add("logged-out", "user-1", expires)
+    repo.revoke("logged-out", "user-1", expires)
+
+    revoked = RevokedTokenSet(capacity=100, error_rate=0.01, sync_seconds=0)
+
+    assert revoked.contains("logged-out", repo)
+    assert not revoked.contains("kept", repo)
+    assert not revoked.contains("never-issued", repo)
+
+
+def test_revoked_set_picks_up_other_processes_after_sync_interval(app):
+    repo = RefreshTokenRepository()
+    expires = datetime.now() + timedelta(days=1)
+    repo.add("jti", "user-1", expires)
+    revoked = RevokedTokenSet(capacity=100, error_rate=0.01, sync_seconds=3600)
+    assert not revoked.contains("jti", repo)
+
+    # Revoked elsewhere: not seen until the next sync
+    repo.revoke("jti", "user-1", expires)
+    assert not revoked.contains("jti", repo)
+
+    revoked.sync_seconds = 0
+    assert revoked.contains("jti", repo)
+
+
+def test_revoked_set_local_add_is_seen_immediately(app):
+    revoked = RevokedTokenSet(capacity=100, error_rate=0.01, sync_seconds=3600)
+
+    revoked.add("local", datetime.now() + timedelta(days=1), datetime.now())
+
+    assert revoked.contains("local", RefreshTokenRepository())
+
+
+def test_revoked_set_rebuilds_when_over_capacity(app):
+    repo = RefreshTokenRepository()
+    expires = datetime.now() + timedelta(days=1)
+    repo.add("in-table", "user-1", expires)
+    repo.revoke("in-table", "user-1", expires)
+    revoked = RevokedTokenSet(capacity=2, error_rate=0.01, sync_seconds=0)
+    for i in range(3):
+        revoked.add(f"local-{i}", expires)
+
+    assert revoked.contains("in-table", repo)
+    # The rebuild starts over from the table, so entries only added locally are gone
+    assert not revoked.contains("local-0", repo)
@@ -0,0 +1,52 @@
+from sqlalchemy import inspect
+from app.extensions import mysql
+from app.models.mysql import RefreshToken, User
+from app.services.token_service import TokenService
+
+
+def refresh(client, token):
+    return client.post("/auth/refresh", headers={"Authorization": f"Bearer {token}"})
+
+
+def login(app):
+    user = User(email="user@example.com", name="User", oauth_id="sub-1")
+    mysql.session.add(user)
+    mysql.session.commit()
+    return TokenService().issue_tokens(user.id)[1]
+
+
+def test_replayed_refresh_token_revokes_the_rotated_one(app):
+    client = app.test_client()
+    first = login(app)
+    response = refresh(client, first)
+    assert response.status_code == 200
+    second = response.get_json()["refresh_token"]
+
+    assert refresh(client, first).status_code == 401
+    # The token handed out by the rotation is gone too
+    assert refresh(client, second).status_code == 401
+
+
+def test_logged_out_token_is_rejected_without_revoking_the_others(app):
+    client = app.test_client()
+    kept = login(app)
+    logged_out = TokenService().issue_tokens(mysql.session.query(User).one().id)[1]
+    assert client.post("/auth/logout", headers={"Authorization": f"Bearer {logged_out}"}).status_code == 200
+
+    assert refresh(client, logged_out).status_code == 401
+    assert refresh(client, kept).status_code == 200
+
+
+def test_create_token_table_command(app):
+    RefreshToken.__table__.drop(mysql.engine)
+    runner = app.test_cli_runner()
+
+    ddl = runner.invoke(args=["auth", "create-token-table", "--sql"]).output
+    assert "CREATE TABLE refresh_tokens" in ddl
+    assert not inspect(mysql.engine).has_table("refresh_tokens")
+
+    result = runner.invoke(args=["auth", "create-token-table"])
+    assert result.exit_code == 0
+    assert inspect(mysql.engine).has_table("refresh_tokens")
+    # Safe to run again
+    assert runner.invoke(args=["auth", "create-token-table"]).exit_code == 0
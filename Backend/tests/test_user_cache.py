@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import event
+from app.extensions import mysql
+from app.models.mysql import User
+from app.repositories import UserRepository
+from app.repositories.user_repository import _email_index, _user_cache
+from app.utils import lru_cache
+from app.utils.lru_cache import LRUCache
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache("test_cache", capacity=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_lru_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(lru_cache.time, "monotonic", lambda: now[0])
+    cache = LRUCache("test_cache", ttl=10)
+    cache.set("a", 1)
+
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.fixture
+def user(app):
+    _user_cache.clear()
+    _email_index.clear()
+    user = User(email="user@example.com", name="User", oauth_id="sub-1", password_hash="hash",
+                access_token="google-access", refresh_token="google-refresh")
+    mysql.session.add(user)
+    mysql.session.commit()
+    user_id = user.id
+    mysql.session.expunge_all()
+    return user_id
+
+
+@pytest.fixture
+def selects(app):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(mysql.engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(mysql.engine, "before_cursor_execute", count)
+
+
+def test_cache_holds_no_secret_columns(user):
+    UserRepository().get_user_by_id(user)
+
+    cached = _user_cache.get(user)
+    assert cached["email"] == "user@example.com"
+    assert not {"password_hash", "access_token", "refresh_token"} & set(cached)
+
+
+def test_cached_user_is_served_without_a_select(user, selects):
+    UserRepository().get_user_by_id(user)
+    mysql.session.expunge_all()
+    before = len(selects)
+
+    cached = UserRepository().get_user_by_id(user)
+    by_email = UserRepository().get_user_by_email("user@example.com")
+
+    assert cached.name == "User" and by_email.id == user
+    assert len(selects) == before
+    # Secrets are loaded from MySQL on access
+    assert cached.access_token == "google-access"
+    assert len(selects) == before + 1
+
+
+def test_updates_invalidate_the_cached_user(user):
+    repo = UserRepository()
+    repo.get_user_by_id(user)
+
+    repo.update_user_profile(user, name="Renamed", email="new@example.com")
+    mysql.session.expunge_all()
+
+    assert UserRepository().get_user_by_id(user).name == "Renamed"
+    assert not UserRepository().get_user_by_email("user@example.com")
+
+
+def test_fresh_reads_skip_the_cache(user):
+    UserRepository().get_user_by_id(user)
+    # Changed by another process: this cache is not told
+    mysql.session.execute(User.__table__.update().where(User.id == user).values(name="Elsewhere"))
+    mysql.session.commit()
+    mysql.session.expunge_all()
+
+    assert UserRepository().get_user_by_id(user).name == "User"
+    assert UserRepository().get_user_by_id(user, fresh=True).name == "Elsewhere"
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import event
+from app.extensions import mysql
+from app.models.mysql import User
+from app.repositories import UserRepository
+
+
+def add_users(count, **fields):
+    users = [User(email=f"user{i}@example.com", name=f"User {i}", oauth_id=f"sub-{i}", **fields) for i in range(count)]
+    mysql.session.add_all(users)
+    mysql.session.commit()
+    return sorted(user.id for user in users)
+
+
+@pytest.fixture
+def select_count(app):
+    """Number of SELECT statements run on the engine since the fixture started."""
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(mysql.engine, "before_cursor_execute", count)
+    yield lambda: len(statements)
+    event.remove(mysql.engine, "before_cursor_execute", count)
+
+
+@pytest.mark.parametrize("count", [0, 1, 10, 25])
+def test_iter_user_ids_yields_every_id_once_in_order(app, count):
+    ids = add_users(count)
+
+    assert list(UserRepository().iter_user_ids(batch_size=10)) == ids
+
+
+def test_iter_user_ids_fetches_one_page_per_batch(app, select_count):
+    add_users(25)
+    before = select_count()
+
+    list(UserRepository().iter_user_ids(batch_size=10))
+
+    # Pages of 10, 10 and 5; the short page ends the stream
+    assert select_count() - before == 3
+
+
+def test_iter_google_fit_tokens_skips_users_without_tokens(app):
+    with_tokens = add_users(3, access_token="access", refresh_token="refresh")
+    mysql.session.add(User(email="plain@example.com", name="Plain", oauth_id="sub-plain"))
+    mysql.session.commit()
+
+    rows = list(UserRepository().iter_google_fit_tokens(batch_size=2))
+
+    assert rows == [(user_id, "access", "refresh") for user_id in with_tokens]